@@ -9,13 +9,91 @@ class Config:
     GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
     GROQ_MODEL_NAME = "llama3-70b-8192"
     
+    # LLM backend: groq, local (a chat-completions server at LLM_BASE_URL) or stub (in-process, no network)
+    LLM_BACKEND = os.getenv("LLM_BACKEND", "groq").lower()
+    LLM_BASE_URL = os.getenv("LLM_BASE_URL", "")
+    LLM_STUB_LATENCY_MS = float(os.getenv("LLM_STUB_LATENCY_MS", "500"))
+    # Serve the template mock report when the provider fails; off makes failures show as failed reports
+    LLM_MOCK_FALLBACK = os.getenv("LLM_MOCK_FALLBACK", "true").lower() == "true"
+    
+    # LLM HTTP client settings
+    LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+    LLM_CONNECT_TIMEOUT_SECONDS = float(os.getenv("LLM_CONNECT_TIMEOUT_SECONDS", "5"))
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+    LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "10"))
+    LLM_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("LLM_KEEPALIVE_EXPIRY_SECONDS", "30"))
+    
+    # LLM latency budget and circuit breaker settings
+    LLM_CALL_DEADLINE_SECONDS = float(os.getenv("LLM_CALL_DEADLINE_SECONDS", "20"))
+    LLM_BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5"))
+    LLM_BREAKER_RECOVERY_SECONDS = float(os.getenv("LLM_BREAKER_RECOVERY_SECONDS", "30"))
+    
     # File Paths - Use absolute paths to avoid issues
     BASE_DIR = os.path.abspath(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     MODELS_PATH = os.path.join(BASE_DIR, "final_models")
-    DATA_PATH = os.path.join(BASE_DIR, "data", "unique_companies_dataset.csv")
+    DATA_PATH = os.path.join(BASE_DIR, "data", "final_processed_dataset.xlsx")
+    SNAPSHOT_PATH = os.path.join(BASE_DIR, "data", "company_snapshot")
+    
+    # Use the ML model's class 1 probability as the risk probability instead of deriving it from the ESG score
+    USE_ML_RISK_MODEL = os.getenv("USE_ML_RISK_MODEL", "false").lower() == "true"
+    # Flatten the random forest into NumPy arrays for fast inference
+    COMPILE_ML_MODEL = os.getenv("COMPILE_ML_MODEL", "true").lower() == "true"
+    
+    # Micro-batching of concurrent model calls (a window of 0 disables batching)
+    MICRO_BATCH_WINDOW_MS = float(os.getenv("MICRO_BATCH_WINDOW_MS", "2"))
+    MICRO_BATCH_MAX_SIZE = int(os.getenv("MICRO_BATCH_MAX_SIZE", "64"))
+    
+    # How often to check MODELS_PATH for new artifact versions (0 disables hot reload)
+    MODEL_RELOAD_INTERVAL_SECONDS = float(os.getenv("MODEL_RELOAD_INTERVAL_SECONDS", "30"))
+    
+    # Logging settings; LOG_MODULE_LEVELS overrides levels per logger, e.g. "app.utils.auth=DEBUG,httpx=WARNING"
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+    LOG_MODULE_LEVELS = os.getenv("LOG_MODULE_LEVELS", "")
+    LOG_FILE = os.getenv("LOG_FILE", "app.log")
+    LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    # Fraction of requests whose DEBUG logs are kept when DEBUG is enabled
+    LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.01"))
     
     # Database Settings
     DATABASE_URL = "sqlite:///./green_finance.db"
+    # URL for the async engine used by the routes; derived from DATABASE_URL when empty
+    ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", "")
+    # SQLite performance profile (WAL, synchronous=NORMAL, mmap and page cache) applied on connect
+    SQLITE_TUNING = os.getenv("SQLITE_TUNING", "true").lower() == "true"
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    
+    # Predictions per dashboard page
+    DASHBOARD_PAGE_SIZE = int(os.getenv("DASHBOARD_PAGE_SIZE", "25"))
+    
+    # Rows per admin list page, and the window in which a user with a prediction counts as active
+    ADMIN_PAGE_SIZE = int(os.getenv("ADMIN_PAGE_SIZE", "20"))
+    ADMIN_ACTIVE_USER_DAYS = int(os.getenv("ADMIN_ACTIVE_USER_DAYS", "30"))
+    
+    # Rows fetched from the database cursor and written per chunk of an export
+    EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "1000"))
+    
+    # Background report generation settings
+    REPORT_WORKER_CONCURRENCY = int(os.getenv("REPORT_WORKER_CONCURRENCY", "4"))
+    REPORT_QUEUE_MAX_SIZE = int(os.getenv("REPORT_QUEUE_MAX_SIZE", "1000"))
+    
+    # Rows per batch prediction request; queued reports make a batch with reports costlier
+    BATCH_MAX_ROWS = int(os.getenv("BATCH_MAX_ROWS", "5000"))
+    BATCH_MAX_REPORT_ROWS = int(os.getenv("BATCH_MAX_REPORT_ROWS", "100"))
+    
+    # LLM report cache settings
+    REPORT_CACHE_MEMORY_SIZE = int(os.getenv("REPORT_CACHE_MEMORY_SIZE", "256"))
+    REPORT_CACHE_MAX_ENTRIES = int(os.getenv("REPORT_CACHE_MAX_ENTRIES", "10000"))
+    REPORT_CACHE_TTL_SECONDS = int(os.getenv("REPORT_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+    # Hits are recorded in batches and eviction runs as a periodic sweep, off the request path
+    REPORT_CACHE_ACCESS_FLUSH_SECONDS = int(os.getenv("REPORT_CACHE_ACCESS_FLUSH_SECONDS", "30"))
+    REPORT_CACHE_SWEEP_SECONDS = int(os.getenv("REPORT_CACHE_SWEEP_SECONDS", "600"))
+    
+    # Authenticated user cache settings
+    USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "1024"))
+    USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
     
     # ESG Weights
     ESG_WEIGHTS = {
@@ -29,6 +107,17 @@ class Config:
     ALGORITHM = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES = 30
     
+    # bcrypt cost factor for new hashes (pick one with `python -m app.utils.password_hasher`)
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    # Dedicated pool for password hashing and verification
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", "32"))
+    
+    # Failed login limits, counted over a sliding window
+    LOGIN_MAX_ATTEMPTS_PER_USERNAME = int(os.getenv("LOGIN_MAX_ATTEMPTS_PER_USERNAME", "5"))
+    LOGIN_MAX_ATTEMPTS_PER_IP = int(os.getenv("LOGIN_MAX_ATTEMPTS_PER_IP", "20"))
+    LOGIN_ATTEMPT_WINDOW_SECONDS = int(os.getenv("LOGIN_ATTEMPT_WINDOW_SECONDS", "300"))
+    
     # Print configuration for debugging
     @classmethod
     def print_config(cls):
@@ -47,4 +136,5 @@ class Config:
         
         # Check if data file exists
         print(f"\nChecking if data file exists:")
-        print(f"Data path: {cls.DATA_PATH} - Exists: {os.path.exists(cls.DATA_PATH)}") 
\ No newline at end of file
+        print(f"Data path: {cls.DATA_PATH} - Exists: {os.path.exists(cls.DATA_PATH)}")
+        print(f"Snapshot path: {cls.SNAPSHOT_PATH} - Exists: {os.path.exists(cls.SNAPSHOT_PATH)}") 
\ No newline at end of file
@@ -1,4 +1,6 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import Config
@@ -9,8 +11,62 @@ engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
 
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Performance profile applied to every new SQLite connection
+
+    WAL lets readers run alongside the single writer, and synchronous=NORMAL
+    is durable in WAL mode except for the last commits on power loss.
+    mmap_size and cache_size keep hot pages in memory.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA mmap_size={Config.SQLITE_MMAP_SIZE}")
+        # Negative cache_size is in KiB rather than pages
+        cursor.execute(f"PRAGMA cache_size=-{Config.SQLITE_CACHE_SIZE_KB}")
+        cursor.execute(f"PRAGMA busy_timeout={Config.SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+if engine.dialect.name == "sqlite" and Config.SQLITE_TUNING:
+    event.listen(engine, "connect", apply_sqlite_pragmas)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async drivers for the sync URLs we support
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg"
+}
+
+def async_database_url(url):
+    """
+    Async counterpart of a sync database URL
+
+    Raises:
+        ValueError: If there is no known async driver for the URL's database
+    """
+    url = make_url(url)
+    if url.get_dialect().is_async:
+        return url
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver for {url.get_backend_name()}, set ASYNC_DATABASE_URL")
+    return url.set(drivername=driver)
+
+# Async engine for the routes, so queries don't block the event loop. The sync
+# engine above stays for startup, background threads and scripts.
+async_engine = create_async_engine(async_database_url(Config.ASYNC_DATABASE_URL or SQLALCHEMY_DATABASE_URL))
+
+if async_engine.dialect.name == "sqlite" and Config.SQLITE_TUNING:
+    event.listen(async_engine.sync_engine, "connect", apply_sqlite_pragmas)
+
+# Objects stay loaded after commit, since lazy loads are not possible in async code
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 # Dependency
@@ -19,4 +75,9 @@ def get_db():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+ 
\ No newline at end of file
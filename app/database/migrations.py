@@ -0,0 +1,100 @@
+import logging
+from sqlalchemy import DateTime, inspect, text
+
+logger = logging.getLogger(__name__)
+
+# PRAGMA user_version of a SQLite database whose data migrations have run
+SQLITE_TIMESTAMPS_NORMALIZED = 1
+
+def add_missing_columns(engine, metadata):
+    """
+    Add columns that exist on the models but not yet in the database
+
+    create_all only creates missing tables, so columns added to existing
+    models are applied here with ALTER TABLE. Scalar Python defaults are
+    used as the column default so existing rows get a sensible value.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    with engine.begin() as conn:
+        for table in metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                statement = f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'
+                if column.default is not None and column.default.is_scalar:
+                    default = column.default.arg
+                    statement += f" DEFAULT '{default}'" if isinstance(default, str) else f" DEFAULT {default}"
+                conn.execute(text(statement))
+                logger.info(f"Added column {table.name}.{column.name}")
+
+def add_missing_indexes(engine, metadata):
+    """
+    Create indexes that exist on the models but not yet in the database
+
+    Tables refresh their query planner statistics afterwards so the new
+    indexes are picked up.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    created = False
+    with engine.begin() as conn:
+        for table in metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in existing_indexes:
+                    continue
+                index.create(bind=conn)
+                created = True
+                logger.info(f"Created index {index.name} on {table.name}")
+        if created and engine.dialect.name == "sqlite":
+            conn.execute(text("ANALYZE"))
+
+def normalize_sqlite_timestamps(engine, metadata):
+    """
+    Rewrite timestamps SQLite set itself into SQLAlchemy's storage format
+
+    SQLite keeps datetimes as text and CURRENT_TIMESTAMP omits the fraction
+    ("2024-01-01 12:00:00"), while SQLAlchemy binds "2024-01-01 12:00:00.000000".
+    Text comparison would put such a row before a bound parameter of the very
+    same time, so those values are padded to the full format.
+
+    Runs once per database: rows written since carry a Python-side
+    timestamp, so the database is marked with PRAGMA user_version.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    with engine.begin() as conn:
+        if conn.exec_driver_sql("PRAGMA user_version").scalar() >= SQLITE_TIMESTAMPS_NORMALIZED:
+            return
+        for table in metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            for column in table.columns:
+                if not isinstance(column.type, DateTime):
+                    continue
+                updated = conn.execute(text(
+                    f"UPDATE {table.name} SET {column.name} = {column.name} || '.000000' "
+                    f"WHERE length({column.name}) = 19"
+                )).rowcount
+                if updated:
+                    logger.info(f"Normalized {updated} timestamps in {table.name}.{column.name}")
+        # Part of the same transaction, so an interrupted run is repeated
+        conn.exec_driver_sql(f"PRAGMA user_version = {SQLITE_TIMESTAMPS_NORMALIZED}")
+
+def run_migrations(engine, metadata):
+    """Upgrade an existing database in place to match the models"""
+    add_missing_columns(engine, metadata)
+    add_missing_indexes(engine, metadata)
+    normalize_sqlite_timestamps(engine, metadata)
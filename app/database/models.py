@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Text, Boolean
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Date, Text, Boolean, Index, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -15,7 +15,8 @@ class User(Base):
     hashed_password = Column(String)
     is_active = Column(Boolean, default=True)
     is_admin = Column(Boolean, default=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Set in Python too, see Prediction.created_at
+    created_at = Column(DateTime(timezone=True), default=datetime.datetime.utcnow, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationship
@@ -23,10 +24,14 @@ class User(Base):
 
 class Prediction(Base):
     __tablename__ = "predictions"
+    __table_args__ = (
+        # Dashboard lists a user's predictions newest first
+        Index("ix_predictions_user_id_created_at", "user_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
-    company_name = Column(String)
+    company_name = Column(String, index=True)
     impact_area_community = Column(Float)
     impact_area_environment = Column(Float)
     impact_area_customers = Column(Float)
@@ -34,10 +39,77 @@ class Prediction(Base):
     certification_cycle = Column(Integer)
     esg_score = Column(Float)
     risk_probability = Column(Float)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Version of the model artifacts that produced this prediction
+    model_version = Column(String)
+    # Set in Python too, so SQLite stores the same text format as the timestamps compared against it
+    created_at = Column(DateTime(timezone=True), default=datetime.datetime.utcnow, server_default=func.now())
     
-    # LLM Response - stored as text
+    # LLM report, stored compressed and deduplicated in report_bodies
+    report_digest = Column(String, ForeignKey("report_bodies.digest"), index=True)
+    # Legacy inline report, moved to report_bodies on startup (see app/models/report_store.py)
     llm_response = Column(Text)
+    # pending while the report is generated in the background, then completed or failed
+    report_status = Column(String, default="completed")
     
     # Relationship
-    user = relationship("User", back_populates="predictions") 
\ No newline at end of file
+    user = relationship("User", back_populates="predictions")
+
+class ReportCacheEntry(Base):
+    __tablename__ = "report_cache"
+
+    key = Column(String, primary_key=True)
+    company_name = Column(String, index=True)
+    model_name = Column(String)
+    prompt_version = Column(Integer)
+    report = Column(Text)
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    accessed_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+    expires_at = Column(DateTime, index=True)
+
+class ReportDictionary(Base):
+    __tablename__ = "report_dictionaries"
+
+    # Preset zlib dictionaries; bodies keep the version they were compressed with
+    version = Column(Integer, primary_key=True)
+    source = Column(String)
+    data = Column(LargeBinary)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class ReportBody(Base):
+    __tablename__ = "report_bodies"
+
+    # SHA-256 of the markdown, so identical reports share one row
+    digest = Column(String, primary_key=True)
+    dictionary_version = Column(Integer, ForeignKey("report_dictionaries.version"))
+    markdown = Column(LargeBinary)
+    html = Column(LargeBinary)
+    html_version = Column(Integer)
+    markdown_size = Column(Integer)
+    html_size = Column(Integer)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+# Summary tables, kept up to date as predictions are inserted and deleted (see app/database/summary.py)
+class DailyPredictionStats(Base):
+    __tablename__ = "prediction_daily_stats"
+
+    day = Column(Date, primary_key=True)
+    prediction_count = Column(Integer, default=0)
+    esg_total = Column(Float, default=0.0)
+    risk_total = Column(Float, default=0.0)
+
+class CompanyPredictionStats(Base):
+    __tablename__ = "company_prediction_stats"
+
+    company_name = Column(String, primary_key=True)
+    prediction_count = Column(Integer, default=0, index=True)
+    esg_total = Column(Float, default=0.0)
+    risk_total = Column(Float, default=0.0)
+    last_prediction_at = Column(DateTime)
+
+class UserPredictionStats(Base):
+    __tablename__ = "user_prediction_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    prediction_count = Column(Integer, default=0)
+    last_prediction_at = Column(DateTime, index=True)
@@ -0,0 +1,245 @@
+import datetime
+import logging
+from collections import defaultdict
+from sqlalchemy import Date, event, func, select, delete, insert, update, type_coerce
+from sqlalchemy.orm import Session
+from app.database.upsert import upsert, greatest
+from app.database.models import (
+    User, Prediction, DailyPredictionStats, CompanyPredictionStats, UserPredictionStats
+)
+
+logger = logging.getLogger(__name__)
+
+class SummaryDelta:
+    """Net change to the summary tables from a set of inserted and deleted predictions"""
+    def __init__(self):
+        # key -> [count, esg total, risk total, latest prediction time]
+        self.daily = defaultdict(lambda: [0, 0.0, 0.0, None])
+        self.companies = defaultdict(lambda: [0, 0.0, 0.0, None])
+        self.users = defaultdict(lambda: [0, 0.0, 0.0, None])
+        # Keys that lost predictions, whose latest prediction time must be looked up again
+        self.deleted_companies = set()
+        self.deleted_users = set()
+
+    def __bool__(self):
+        return bool(self.daily or self.companies or self.users)
+
+    def add(self, day, company_name, user_id, count, esg_total, risk_total, last_at=None):
+        targets = [(self.daily, day)]
+        if company_name is not None:
+            targets.append((self.companies, company_name))
+            if count < 0:
+                self.deleted_companies.add(company_name)
+        if user_id is not None:
+            targets.append((self.users, user_id))
+            if count < 0:
+                self.deleted_users.add(user_id)
+        for table, key in targets:
+            entry = table[key]
+            entry[0] += count
+            entry[1] += esg_total or 0.0
+            entry[2] += risk_total or 0.0
+            if last_at is not None and (entry[3] is None or last_at > entry[3]):
+                entry[3] = last_at
+
+def _loaded(prediction, name):
+    # Read only already-loaded values; loading inside a flush would query mid-flush
+    return prediction.__dict__.get(name)
+
+def _day(column):
+    # date() returns text on SQLite; the Date type parses it into a date there too
+    return type_coerce(func.date(column), Date)
+
+def apply_delta(connection, delta):
+    """
+    Upsert a SummaryDelta into the summary tables and drop rows left empty
+
+    Run after the predictions themselves were written, since the latest
+    prediction time of keys that lost predictions is read back from them.
+    """
+    for model, key_column, entries, has_totals in (
+        (DailyPredictionStats, DailyPredictionStats.day, delta.daily, True),
+        (CompanyPredictionStats, CompanyPredictionStats.company_name, delta.companies, True),
+        (UserPredictionStats, UserPredictionStats.user_id, delta.users, False)
+    ):
+        if not entries:
+            continue
+        for key, (count, esg_total, risk_total, last_at) in entries.items():
+            values = {key_column.key: key, "prediction_count": count}
+            if has_totals:
+                values.update(esg_total=esg_total, risk_total=risk_total)
+            if hasattr(model, "last_prediction_at"):
+                values["last_prediction_at"] = last_at
+
+            def updates(proposed, model=model, has_totals=has_totals):
+                changes = {"prediction_count": model.prediction_count + proposed.prediction_count}
+                if has_totals:
+                    changes["esg_total"] = model.esg_total + proposed.esg_total
+                    changes["risk_total"] = model.risk_total + proposed.risk_total
+                if hasattr(model, "last_prediction_at"):
+                    changes["last_prediction_at"] = greatest(
+                        connection, model.last_prediction_at, proposed.last_prediction_at
+                    )
+                return changes
+            upsert(connection, model, values, [key_column], set_=updates)
+        connection.execute(delete(model).where(model.prediction_count <= 0))
+    refresh_last_prediction_at(connection, delta.deleted_companies, delta.deleted_users)
+
+def refresh_last_prediction_at(connection, company_names, user_ids):
+    """Recompute last_prediction_at from the predictions table for the given keys"""
+    for model, key_column, prediction_column, keys in (
+        (CompanyPredictionStats, CompanyPredictionStats.company_name, Prediction.company_name, company_names),
+        (UserPredictionStats, UserPredictionStats.user_id, Prediction.user_id, user_ids)
+    ):
+        if not keys:
+            continue
+        latest = select(func.max(Prediction.created_at)).where(prediction_column == key_column).scalar_subquery()
+        connection.execute(update(model).where(key_column.in_(list(keys))).values(last_prediction_at=latest))
+
+@event.listens_for(Session, "after_flush")
+def track_prediction_changes(session, flush_context):
+    """Fold predictions inserted or deleted by this flush into the summary tables"""
+    delta = SummaryDelta()
+    now = datetime.datetime.utcnow()
+    for obj in session.new:
+        if isinstance(obj, Prediction):
+            # Set by the column default, or explicitly by the caller
+            created_at = _loaded(obj, "created_at") or now
+            delta.add(
+                created_at.date(), obj.company_name, obj.user_id, 1,
+                obj.esg_score, obj.risk_probability, created_at
+            )
+    for obj in session.deleted:
+        if isinstance(obj, Prediction):
+            created_at = _loaded(obj, "created_at") or now
+            delta.add(
+                created_at.date(), _loaded(obj, "company_name"), _loaded(obj, "user_id"), -1,
+                -(_loaded(obj, "esg_score") or 0.0), -(_loaded(obj, "risk_probability") or 0.0)
+            )
+    if delta:
+        apply_delta(session.connection(), delta)
+
+def delete_predictions_where(db, *criteria):
+    """
+    Bulk-delete predictions matching criteria, keeping the summary tables in step
+
+    Bulk deletes bypass the flush hook, so the removed rows are aggregated
+    first and subtracted after the delete, in the same transaction.
+
+    Returns:
+        int: Number of predictions deleted
+    """
+    day = _day(Prediction.created_at)
+    groups = (
+        db.query(
+            day, Prediction.company_name, Prediction.user_id, func.count(Prediction.id),
+            func.sum(Prediction.esg_score), func.sum(Prediction.risk_probability)
+        )
+        .filter(*criteria)
+        .group_by(day, Prediction.company_name, Prediction.user_id)
+        .all()
+    )
+    delta = SummaryDelta()
+    for day_value, company_name, user_id, count, esg_total, risk_total in groups:
+        delta.add(
+            day_value, company_name, user_id, -count,
+            -(esg_total or 0.0), -(risk_total or 0.0)
+        )
+    deleted = db.query(Prediction).filter(*criteria).delete(synchronize_session=False)
+    if delta:
+        apply_delta(db.connection(), delta)
+    return deleted
+
+def rebuild_summaries(connection):
+    """Recompute all summary tables from the predictions table"""
+    for model in (DailyPredictionStats, CompanyPredictionStats, UserPredictionStats):
+        connection.execute(delete(model))
+
+    day = _day(Prediction.created_at)
+    connection.execute(insert(DailyPredictionStats).from_select(
+        ["day", "prediction_count", "esg_total", "risk_total"],
+        select(day, func.count(Prediction.id), func.coalesce(func.sum(Prediction.esg_score), 0.0),
+               func.coalesce(func.sum(Prediction.risk_probability), 0.0))
+        .where(Prediction.created_at.isnot(None))
+        .group_by(day)
+    ))
+    connection.execute(insert(CompanyPredictionStats).from_select(
+        ["company_name", "prediction_count", "esg_total", "risk_total", "last_prediction_at"],
+        select(Prediction.company_name, func.count(Prediction.id), func.coalesce(func.sum(Prediction.esg_score), 0.0),
+               func.coalesce(func.sum(Prediction.risk_probability), 0.0), func.max(Prediction.created_at))
+        .where(Prediction.company_name.isnot(None))
+        .group_by(Prediction.company_name)
+    ))
+    connection.execute(insert(UserPredictionStats).from_select(
+        ["user_id", "prediction_count", "last_prediction_at"],
+        select(Prediction.user_id, func.count(Prediction.id), func.max(Prediction.created_at))
+        .where(Prediction.user_id.isnot(None))
+        .group_by(Prediction.user_id)
+    ))
+
+def ensure_summaries(engine):
+    """Rebuild the summary tables if they don't account for every prediction, e.g. on first upgrade"""
+    with engine.begin() as conn:
+        predictions = conn.execute(
+            select(func.count(Prediction.id)).where(Prediction.created_at.isnot(None))
+        ).scalar()
+        summarized = conn.execute(select(func.coalesce(func.sum(DailyPredictionStats.prediction_count), 0))).scalar()
+        if predictions != summarized:
+            logger.info(f"Rebuilding prediction summaries ({summarized} of {predictions} predictions summarized)")
+            rebuild_summaries(conn)
+
+def get_admin_summary(db, days=14, top_companies=10, active_days=30):
+    """
+    Aggregates for the admin dashboard, read from the summary tables
+
+    Args:
+        db: Database session
+        days (int): Number of most recent days of prediction counts
+        top_companies (int): Number of most predicted companies
+        active_days (int): Window in which a user with a prediction counts as active
+
+    Returns:
+        dict: User counts, total predictions, daily counts and per-company averages
+    """
+    since = datetime.datetime.utcnow() - datetime.timedelta(days=active_days)
+    first_day = datetime.datetime.utcnow().date() - datetime.timedelta(days=days - 1)
+
+    daily = (
+        db.query(DailyPredictionStats)
+        .filter(DailyPredictionStats.day >= first_day)
+        .order_by(DailyPredictionStats.day.desc())
+        .all()
+    )
+    companies = (
+        db.query(CompanyPredictionStats)
+        .order_by(CompanyPredictionStats.prediction_count.desc(), CompanyPredictionStats.company_name)
+        .limit(top_companies)
+        .all()
+    )
+
+    return {
+        "total_users": db.query(func.count(User.id)).scalar(),
+        "admin_users": db.query(func.count(User.id)).filter(User.is_admin.is_(True)).scalar(),
+        "active_users": db.query(func.count(UserPredictionStats.user_id))
+            .filter(UserPredictionStats.last_prediction_at >= since).scalar(),
+        "active_days": active_days,
+        "total_predictions": db.query(func.coalesce(func.sum(DailyPredictionStats.prediction_count), 0)).scalar(),
+        "daily": [
+            {
+                "day": row.day.isoformat(),
+                "prediction_count": row.prediction_count,
+                "average_esg": row.esg_total / row.prediction_count,
+                "average_risk": row.risk_total / row.prediction_count
+            }
+            for row in daily
+        ],
+        "companies": [
+            {
+                "company_name": row.company_name,
+                "prediction_count": row.prediction_count,
+                "average_esg": row.esg_total / row.prediction_count,
+                "average_risk": row.risk_total / row.prediction_count
+            }
+            for row in companies
+        ]
+    }
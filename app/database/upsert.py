@@ -0,0 +1,64 @@
+"""
+Upserts that work on every database the app runs on
+
+SQLite and PostgreSQL both support INSERT ... ON CONFLICT, so their own
+insert constructs are used. Other databases fall back to an UPDATE and, if
+no row matched, an INSERT.
+"""
+from types import SimpleNamespace
+from sqlalchemy import and_, func, insert, literal, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+ON_CONFLICT_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert
+}
+
+def dialect_name(bind):
+    """Dialect name of a Connection or Session"""
+    if hasattr(bind, "get_bind"):
+        bind = bind.get_bind()
+    return bind.dialect.name
+
+def greatest(bind, *values):
+    """Largest of several SQL values, ignoring NULLs"""
+    # SQLite spells GREATEST as a multi-argument max(); both return NULL if any argument is NULL
+    largest = func.max if dialect_name(bind) == "sqlite" else func.greatest
+    return largest(*(func.coalesce(value, *(other for other in values if other is not value)) for value in values))
+
+def upsert(bind, model, values, index_elements, set_=None):
+    """
+    Insert a row, or update the row that has the same key
+
+    Args:
+        bind: Connection or Session to execute on
+        model: Mapped class to write to
+        values (dict): Column values of the new row
+        index_elements (list): Key columns identifying an existing row
+        set_ (callable): Takes the proposed row, whose attributes are its
+            values as SQL expressions (like ON CONFLICT's `excluded`), and
+            returns the values to update; None leaves an existing row as is
+    """
+    dialect_insert = ON_CONFLICT_INSERTS.get(dialect_name(bind))
+    if dialect_insert is not None:
+        statement = dialect_insert(model).values(**values)
+        if set_ is None:
+            statement = statement.on_conflict_do_nothing(index_elements=index_elements)
+        else:
+            statement = statement.on_conflict_do_update(index_elements=index_elements, set_=set_(statement.excluded))
+        bind.execute(statement)
+        return
+
+    # A concurrent insert of the same key can still fail here with an IntegrityError
+    table = model.__table__
+    existing = and_(*(column == values[column.key] for column in index_elements))
+    if set_ is None:
+        if bind.execute(select(1).select_from(table).where(existing)).first() is not None:
+            return
+    else:
+        proposed = SimpleNamespace(**{
+            name: literal(value, table.c[name].type) for name, value in values.items()
+        })
+        if bind.execute(update(model).where(existing).values(set_(proposed))).rowcount:
+            return
+    bind.execute(insert(model).values(**values))
@@ -5,22 +5,31 @@ from fastapi.responses import RedirectResponse
 import os
 import logging
 
-from app.database.database import engine, SessionLocal
-from app.database.models import Base, User
-from app.models.predictor import initialize_models
+from app.database.database import engine, SessionLocal, async_engine
+from app.database.migrations import run_migrations
+from app.database.summary import ensure_summaries
+from app.database.models import Base, User, Prediction
+from starlette.concurrency import run_in_threadpool
+from app.models.predictor import initialize_models, prepare_prediction, model_registry, micro_batcher, generate_report
+from app.models.report_queue import report_queue, save_report, mark_report_failed, REPORT_PENDING, REPORT_FAILED, REPORT_COMPLETED
+from app.models.report_store import upgrade_report_storage
+from app.models.report_cache import report_cache
+from app.models.llm_client import llm_client_manager
+from app.models.llm import llm_breaker
 from app.routers import auth, prediction, admin
 from app.config import Config
-from app.utils.auth import get_password_hash
+from app.utils.auth import get_password_hash_async
+from app.utils.logging_setup import configure_logging, sample_request, request_sampled, logging_stats
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+configure_logging()
 logger = logging.getLogger(__name__)
 
-# Create database tables
+# Create database tables and upgrade existing ones
 Base.metadata.create_all(bind=engine)
+run_migrations(engine, Base.metadata)
+ensure_summaries(engine)
+upgrade_report_storage()
 
 # Create FastAPI app
 app = FastAPI(title="Green Finance Risk Prediction")
@@ -34,6 +43,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def sample_request_logs(request: Request, call_next):
+    """Decide once per request whether its DEBUG logs are kept"""
+    token = sample_request()
+    try:
+        return await call_next(request)
+    finally:
+        request_sampled.reset(token)
+
 # Ensure static directory exists
 static_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
 os.makedirs(static_dir, exist_ok=True)
@@ -59,6 +77,22 @@ async def startup_event():
         initialize_models()
         logger.info("Models initialized successfully")
 
+        # Create the shared LLM clients
+        logger.info("Initializing LLM clients...")
+        llm_client_manager.start()
+
+        # Load company data up front so the first request doesn't pay for it
+        logger.info("Loading company data...")
+        try:
+            prediction.get_company_catalog()
+            logger.info("Company data loaded successfully")
+        except Exception as e:
+            logger.error(f"Error loading company data: {str(e)}")
+
+        # Start background report generation and pick up reports left pending
+        await report_queue.start()
+        await requeue_pending_reports()
+
         # Create superuser if it doesn't exist
         logger.info("Checking for superuser...")
         db = SessionLocal()
@@ -76,7 +110,7 @@ async def startup_event():
                 superuser = User(
                     username=username,
                     email=email,
-                    hashed_password=get_password_hash(password),
+                    hashed_password=await get_password_hash_async(password),
                     is_admin=True,
                     is_active=True
                 )
@@ -95,6 +129,72 @@ async def startup_event():
         logger.error(f"Error during startup: {e}")
         logger.error("Application may not function correctly due to startup errors")
 
+async def requeue_pending_reports():
+    """
+    Resubmit reports that were still pending when the application stopped
+
+    Reports the queue doesn't accept are generated inline, as /predict does,
+    so no prediction is left pending.
+    """
+    try:
+        pending = await run_in_threadpool(load_pending_reports)
+    except Exception as e:
+        logger.error(f"Error requeueing pending reports: {str(e)}")
+        return
+
+    inline = 0
+    for prediction_id, prepared, company_details in pending:
+        if report_queue.submit(prediction_id, prepared, company_details):
+            continue
+        inline += 1
+        try:
+            llm_report, llm_error = await generate_report(prepared, company_details)
+            status = REPORT_FAILED if llm_error else REPORT_COMPLETED
+            await run_in_threadpool(save_report, prediction_id, llm_report, status)
+        except Exception as e:
+            logger.error(f"Error generating pending report of prediction {prediction_id}: {str(e)}")
+            try:
+                await run_in_threadpool(mark_report_failed, prediction_id)
+            except Exception as e:
+                logger.error(f"Could not mark report of prediction {prediction_id} as failed: {str(e)}")
+    if pending:
+        logger.info(f"Requeued {len(pending) - inline} pending reports, generated {inline} inline")
+
+def load_pending_reports():
+    """Prepared inputs of every prediction whose report is still pending"""
+    db = SessionLocal()
+    try:
+        pending = db.query(Prediction).filter(Prediction.report_status == REPORT_PENDING).all()
+        catalog = prediction.get_company_catalog()
+        jobs = []
+        for row in pending:
+            company_details = catalog.get(row.company_name) or {"company_name": row.company_name}
+            try:
+                prepared = prepare_prediction(
+                    row.impact_area_community,
+                    row.impact_area_environment,
+                    row.impact_area_customers,
+                    row.impact_area_governance,
+                    row.certification_cycle,
+                    company_details
+                )
+            except Exception as e:
+                logger.error(f"Error preparing pending report of prediction {row.id}: {str(e)}")
+                mark_report_failed(row.id)
+                continue
+            jobs.append((row.id, prepared, company_details))
+        return jobs
+    finally:
+        db.close()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    model_registry.stop_watching()
+    await report_queue.stop()
+    await run_in_threadpool(report_cache.flush_access)
+    await llm_client_manager.aclose()
+    await async_engine.dispose()
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(prediction.router)
@@ -108,7 +208,15 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint to verify API is running"""
-    return {"status": "healthy", "message": "API is running"}
+    return {
+        "status": "healthy",
+        "message": "API is running",
+        "llm_pool": llm_client_manager.stats(),
+        "llm_circuit_breaker": llm_breaker.stats(),
+        "models": model_registry.stats(),
+        "micro_batcher": micro_batcher.stats(),
+        "logging": logging_stats()
+    }
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,88 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Breaker states
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """
+    Circuit breaker for calls to an external provider
+
+    After `failure_threshold` consecutive failures the breaker opens and
+    callers are told to skip the call and use their fallback. Once
+    `recovery_timeout` seconds have passed, a single probe call is let
+    through (half-open); its success closes the breaker, its failure opens
+    it again.
+    """
+    def __init__(self, name, failure_threshold, recovery_timeout):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = STATE_CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.probe_started_at = None
+        self.trip_count = 0
+        self.rejected_calls = 0
+        self.total_failures = 0
+        self.total_successes = 0
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        """Return True if a call may be attempted now"""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == STATE_CLOSED:
+                return True
+            if self.state == STATE_OPEN and now - self.opened_at >= self.recovery_timeout:
+                self.state = STATE_HALF_OPEN
+                self.probe_started_at = now
+                logger.info(f"Circuit breaker '{self.name}' half-open, probing provider")
+                return True
+            # A probe that never reported back is replaced after the recovery timeout
+            if self.state == STATE_HALF_OPEN and now - self.probe_started_at >= self.recovery_timeout:
+                self.probe_started_at = now
+                return True
+            self.rejected_calls += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.total_successes += 1
+            self.consecutive_failures = 0
+            if self.state != STATE_CLOSED:
+                logger.info(f"Circuit breaker '{self.name}' closed, provider recovered")
+            self.state = STATE_CLOSED
+            self.opened_at = None
+            self.probe_started_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.total_failures += 1
+            self.consecutive_failures += 1
+            if self.state == STATE_HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != STATE_OPEN:
+                    self.trip_count += 1
+                    logger.warning(f"Circuit breaker '{self.name}' opened after {self.consecutive_failures} consecutive failures")
+                self.state = STATE_OPEN
+                self.opened_at = time.monotonic()
+                self.probe_started_at = None
+
+    def stats(self):
+        """Return the breaker state and counters"""
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "recovery_timeout_seconds": self.recovery_timeout,
+                "trip_count": self.trip_count,
+                "rejected_calls": self.rejected_calls,
+                "total_failures": self.total_failures,
+                "total_successes": self.total_successes
+            }
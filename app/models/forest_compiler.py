@@ -0,0 +1,125 @@
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class CompiledForest:
+    """
+    A fitted sklearn random forest classifier flattened into contiguous NumPy arrays
+
+    All trees are concatenated into single node arrays (feature, threshold,
+    left, right, missing_left, value). Leaves point to themselves with an
+    infinite threshold, so every row can be pushed through every tree in
+    lock-step for max_depth vectorized steps, with no per-call sklearn overhead.
+
+    Missing (NaN) features follow each node's learned direction, as in
+    sklearn >= 1.3. Trees from older versions have no such direction, so
+    the compiled forest rejects NaN input for them.
+    """
+    def __init__(self, model):
+        estimators = getattr(model, "estimators_", None)
+        if not estimators:
+            raise ValueError("Model is not a fitted tree ensemble")
+        if getattr(model, "n_outputs_", 1) != 1:
+            raise ValueError("Only single-output forests can be compiled")
+
+        self.classes_ = model.classes_
+        self.n_features = model.n_features_in_
+
+        features, thresholds, lefts, rights, missing_lefts, values, roots = [], [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in estimators:
+            tree = estimator.tree_
+            node_ids = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+            missing_go_to_left = getattr(tree, "missing_go_to_left", None)
+            if missing_go_to_left is not None:
+                missing_lefts.append(np.asarray(missing_go_to_left, dtype=bool))
+
+            # Class probabilities per node, as DecisionTreeClassifier.predict_proba computes them
+            value = tree.value[:, 0, :].astype(np.float64)
+            totals = value.sum(axis=1, keepdims=True)
+            totals[totals == 0.0] = 1.0
+            values.append(value / totals)
+
+            roots.append(offset)
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        self.feature = np.ascontiguousarray(np.concatenate(features), dtype=np.intp)
+        self.threshold = np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64)
+        self.left = np.ascontiguousarray(np.concatenate(lefts), dtype=np.intp)
+        self.right = np.ascontiguousarray(np.concatenate(rights), dtype=np.intp)
+        if len(missing_lefts) == len(estimators):
+            self.missing_left = np.ascontiguousarray(np.concatenate(missing_lefts), dtype=bool)
+        else:
+            self.missing_left = None
+        self.value = np.ascontiguousarray(np.concatenate(values), dtype=np.float64)
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.max_depth = max_depth
+        self.n_trees = len(roots)
+
+    def predict_proba(self, X):
+        """Vectorized predict_proba over all rows and trees at once"""
+        # sklearn compares float32 features against float64 thresholds
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        n_rows = X.shape[0]
+        rows = np.arange(n_rows)[:, None]
+
+        has_missing = bool(np.isnan(X).any())
+        if has_missing and self.missing_left is None:
+            raise ValueError("Input contains NaN, which this model has no learned direction for")
+
+        nodes = np.broadcast_to(self.roots, (n_rows, self.n_trees)).copy()
+        for _ in range(self.max_depth):
+            values = X[rows, self.feature[nodes]]
+            go_left = values <= self.threshold[nodes]
+            if has_missing:
+                go_left = np.where(np.isnan(values), self.missing_left[nodes], go_left)
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+
+        return self.value[nodes].mean(axis=1)
+
+    def max_parity_error(self, model, n_samples=256, seed=0):
+        """Largest absolute difference from sklearn's predict_proba on random inputs"""
+        rng = np.random.default_rng(seed)
+        # Probe around every split threshold as well as random points
+        X = rng.normal(scale=3.0, size=(n_samples, self.n_features))
+        internal = np.isfinite(self.threshold)
+        if internal.any():
+            picks = rng.choice(np.flatnonzero(internal), size=n_samples)
+            X[np.arange(n_samples), self.feature[picks]] = self.threshold[picks]
+        error = float(np.abs(self.predict_proba(X) - model.predict_proba(X)).max())
+        if self.missing_left is not None:
+            # And with a missing feature in every row
+            X[np.arange(n_samples), rng.integers(self.n_features, size=n_samples)] = np.nan
+            error = max(error, float(np.abs(self.predict_proba(X) - model.predict_proba(X)).max()))
+        return error
+
+def compile_forest(model, tolerance=1e-9):
+    """
+    Compile a forest and verify it against sklearn
+
+    Returns:
+        CompiledForest or None if the model cannot be compiled or does not
+        reproduce sklearn's probabilities within tolerance
+    """
+    try:
+        compiled = CompiledForest(model)
+        error = compiled.max_parity_error(model)
+    except Exception as e:
+        logger.warning(f"Could not compile model, using sklearn predict_proba: {str(e)}")
+        return None
+    if error > tolerance:
+        logger.warning(f"Compiled model differs from sklearn by {error}, using sklearn predict_proba")
+        return None
+    logger.info(f"Compiled forest with {compiled.n_trees} trees and {len(compiled.feature)} nodes")
+    return compiled
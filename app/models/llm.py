@@ -1,21 +1,35 @@
-from groq import Groq
 from app.config import Config
+from app.models.llm_client import llm_client_manager
 from app.utils.exceptions import log_exception, APIError
+from app.models.report_cache import report_cache
+from app.models.circuit_breaker import CircuitBreaker
+from starlette.concurrency import run_in_threadpool
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Shared breaker for the LLM provider, visible on /health
+llm_breaker = CircuitBreaker(
+    "llm",
+    failure_threshold=Config.LLM_BREAKER_FAILURE_THRESHOLD,
+    recovery_timeout=Config.LLM_BREAKER_RECOVERY_SECONDS
+)
+
 class LLM:
+    # Bump whenever prompt_template changes so cached reports are not reused
+    PROMPT_VERSION = 1
+
     def __init__(self):
         try:
-            # Configure and initialize the Generative AI model
-            self.llm = Groq(api_key=Config.GROQ_API_KEY)
-            logger.info("LLM model initialized successfully.")
+            # Use the shared, connection-pooled clients
+            self.llm, self.async_llm = llm_client_manager.get_clients()
         except Exception as e:
             log_exception(e, "Failed to initialize the LLM model in LLM class.")
             raise APIError("Error initializing LLM model. Check API key and model name.") from e
 
-    def prompt_template(self, result):
+    @staticmethod
+    def prompt_template(result):
         # Generates a structured prompt for the LLM based on the provided data
         prompt = f"""You are a Green Finance Advisor specializing in evaluating companies based on sustainability impact areas, ESG scores, and risk probabilities predicted by an ML model. Your task is to generate a detailed and actionable Green Finance Diagnostic Report for investors, based on the provided data.
 
@@ -106,36 +120,152 @@ class LLM:
     """
         return prompt
 
-    def inference(self, result):
+    def _build_messages(self, result):
+        # Prepare the chat messages sent to the LLM model
+        return [
+            {
+                "role": "user",
+                "content": self.prompt_template(result),
+            }
+        ]
+
+    def _extract_response(self, chat_completion):
+        response = chat_completion.choices[0].message.content
+
+        if response:
+            logger.info("LLM inference successful.")
+            return response
+        else:
+            logger.warning("LLM did not return any response.")
+            raise APIError("LLM response is empty. Please check input format and prompt.")
+
+    async def _before(self, awaitable, deadline):
+        """Await with whatever is left of a wall-clock deadline from the event loop's clock"""
+        remaining = deadline - asyncio.get_running_loop().time()
+        if remaining > 0:
+            try:
+                return await asyncio.wait_for(awaitable, timeout=remaining)
+            except asyncio.TimeoutError:
+                pass
+        else:
+            awaitable.close()
+        raise asyncio.TimeoutError(f"No complete response within {Config.LLM_CALL_DEADLINE_SECONDS:g}s")
+
+    def _deadline(self):
+        return asyncio.get_running_loop().time() + Config.LLM_CALL_DEADLINE_SECONDS
+
+    async def ainference(self, result, cache_key=None, company_name=None):
+        """Generate the report without blocking the event loop"""
+        # The cache's database tier is synchronous, so it is read and written from the thread pool
+        if cache_key:
+            cached = await run_in_threadpool(report_cache.get, cache_key)
+            if cached is not None:
+                logger.info("LLM report served from cache.")
+                return cached
+
+        if not llm_breaker.allow_request():
+            return self._fallback(result, "LLM circuit breaker open")
+
         try:
-            # Prepare and send the request to the LLM model
-            refined_prompt = self.prompt_template(result)
-            chat_completion = self.llm.chat.completions.create(
-                messages=[
-                    {
-                        "role": "user",
-                        "content": refined_prompt,
-                    }
-                ],
-                model=Config.GROQ_MODEL_NAME,
+            # One deadline for the whole call: client retries and reading the body.
+            # However many attempts it takes, the breaker sees one outcome per call
+            chat_completion = await self._before(
+                self.async_llm.chat.completions.create(
+                    messages=self._build_messages(result),
+                    model=Config.GROQ_MODEL_NAME,
+                ),
+                self._deadline()
             )
-            
-            response = chat_completion.choices[0].message.content
+            response = self._extract_response(chat_completion)
+            llm_breaker.record_success()
+
+        except Exception as e:
+            llm_breaker.record_failure()
+            log_exception(e, "Error during async LLM inference in LLM class.")
+            return self._fallback(result, f"LLM API error: {str(e)}")
 
-            if response:
-                logger.info("LLM inference successful.")
-                return response
-            else:
-                logger.warning("LLM did not return any response.")
-                raise APIError("LLM response is empty. Please check input format and prompt.")
+        if cache_key:
+            await run_in_threadpool(report_cache.set, cache_key, response, company_name=company_name, prompt_version=self.PROMPT_VERSION)
+        return response
+    
+    async def astream(self, result, cache_key=None, company_name=None):
+        """
+        Stream the report as it is generated, yielding text chunks
+
+        A cached report is yielded as a single chunk. If the API fails before
+        any text was produced, the mock report is yielded instead, or APIError
+        is raised when LLM_MOCK_FALLBACK is off.
+        """
+        if cache_key:
+            cached = await run_in_threadpool(report_cache.get, cache_key)
+            if cached is not None:
+                logger.info("LLM report served from cache.")
+                yield cached
+                return
+
+        if not llm_breaker.allow_request():
+            yield self._fallback(result, "LLM circuit breaker open")
+            return
+
+        chunks = []
+        stream = None
+        deadline = self._deadline()
+        try:
+            # The deadline covers opening the stream and reading all of it
+            stream = await self._before(
+                self.async_llm.chat.completions.create(
+                    messages=self._build_messages(result),
+                    model=Config.GROQ_MODEL_NAME,
+                    stream=True,
+                ),
+                deadline
+            )
+            while True:
+                try:
+                    chunk = await self._before(stream.__anext__(), deadline)
+                except StopAsyncIteration:
+                    break
+                text = chunk.choices[0].delta.content if chunk.choices else None
+                if text:
+                    chunks.append(text)
+                    yield text
 
         except Exception as e:
-            log_exception(e, "Error during LLM inference in LLM class.")
-            # Create a mock response for testing purposes when the API fails
-            mock_response = self._generate_mock_response(result)
-            logger.warning("Using mock response due to API error.")
-            return mock_response
+            llm_breaker.record_failure()
+            log_exception(e, "Error during streaming LLM inference in LLM class.")
+            if not chunks:
+                yield self._fallback(result, f"LLM API error: {str(e)}")
+                return
+            # Keep what was received and flag the report as incomplete
+            yield "\n\n*The report was interrupted due to an API error.*\n"
+            return
+        finally:
+            # Release the provider connection on errors, cancellation and client disconnects
+            if stream is not None:
+                await stream.close()
+
+        if not chunks:
+            llm_breaker.record_failure()
+            yield self._fallback(result, "LLM did not return any response")
+            return
+
+        llm_breaker.record_success()
+        logger.info("LLM streaming inference successful.")
+        if cache_key:
+            await run_in_threadpool(report_cache.set, cache_key, "".join(chunks), company_name=company_name, prompt_version=self.PROMPT_VERSION)
     
+    def _fallback(self, result, reason):
+        """
+        Mock report used in place of a failed call
+
+        Raises:
+            APIError: Instead, if LLM_MOCK_FALLBACK is off
+        """
+        if not Config.LLM_MOCK_FALLBACK:
+            raise APIError(reason)
+        logger.warning(f"Using mock response: {reason}")
+        return self._generate_mock_response(result)
+
     def _generate_mock_response(self, result):
         """Generate a mock LLM response for testing when the API fails"""
         try:
@@ -0,0 +1,165 @@
+"""
+Backends for the shared LLM clients
+
+The LLM class only needs clients with `chat.completions.create(...)` in the
+chat-completions shape; a backend decides what builds them. LLM_BACKEND
+selects one:
+
+    groq   Groq's API with GROQ_API_KEY
+    local  Any server speaking the chat-completions protocol at LLM_BASE_URL,
+           e.g. `python -m benchmarks.fake_llm_server` for offline load tests
+    stub   In-process replies after LLM_STUB_LATENCY_MS, no network at all
+"""
+import abc
+import asyncio
+import time
+from types import SimpleNamespace
+from groq import Groq, AsyncGroq
+from app.config import Config
+
+class LLMBackend(abc.ABC):
+    """Builds the (sync, async) chat-completions clients"""
+    name = None
+    # Whether the clients need the shared httpx connection pools
+    uses_http = True
+
+    @abc.abstractmethod
+    def create_clients(self, http_client, async_http_client, timeout):
+        """
+        Build the clients the LLM class talks to
+
+        Args:
+            http_client (httpx.Client): Shared sync connection pool
+            async_http_client (httpx.AsyncClient): Shared async connection pool
+            timeout (httpx.Timeout): Per-request timeout
+
+        Returns:
+            tuple: (sync client, async client)
+        """
+
+    def stats(self):
+        return {"backend": self.name}
+
+class GroqBackend(LLMBackend):
+    name = "groq"
+
+    def base_url(self):
+        # None lets the SDK use GROQ_BASE_URL or its default
+        return None
+
+    def api_key(self):
+        return Config.GROQ_API_KEY
+
+    def create_clients(self, http_client, async_http_client, timeout):
+        options = {
+            "api_key": self.api_key(),
+            "base_url": self.base_url(),
+            "timeout": timeout,
+            "max_retries": Config.LLM_MAX_RETRIES
+        }
+        return Groq(http_client=http_client, **options), AsyncGroq(http_client=async_http_client, **options)
+
+    def stats(self):
+        return {"backend": self.name, "base_url": self.base_url()}
+
+class LocalServerBackend(GroqBackend):
+    """
+    Chat-completions server at LLM_BASE_URL, spoken to with the Groq SDK
+
+    The SDK posts to {LLM_BASE_URL}/openai/v1/chat/completions and honours
+    Retry-After on 429s, exactly as against Groq.
+    """
+    name = "local"
+
+    def base_url(self):
+        if not Config.LLM_BASE_URL:
+            raise ValueError("LLM_BASE_URL must be set for the local LLM backend")
+        return Config.LLM_BASE_URL
+
+    def api_key(self):
+        # Local servers don't check the key, but the SDK requires one
+        return Config.GROQ_API_KEY or "local"
+
+class _StubStream:
+    def __init__(self, text):
+        self._words = iter(text.split(" "))
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        word = next(self._words, None)
+        if word is None:
+            raise StopAsyncIteration
+        return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=word + " "))])
+
+    async def close(self):
+        self._words = iter(())
+
+class _StubCompletions:
+    def __init__(self, backend, asynchronous):
+        self.backend = backend
+        self.asynchronous = asynchronous
+
+    @staticmethod
+    def _completion(text):
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+    def create(self, messages, model, stream=False, timeout=None):
+        self.backend.calls += 1
+        text = self.backend.reply(messages)
+        if not self.asynchronous:
+            time.sleep(self.backend.latency_seconds)
+            return self._completion(text)
+
+        async def create():
+            await asyncio.sleep(self.backend.latency_seconds)
+            return _StubStream(text) if stream else self._completion(text)
+        return create()
+
+class _StubClient:
+    def __init__(self, backend, asynchronous):
+        self.chat = SimpleNamespace(completions=_StubCompletions(backend, asynchronous))
+
+    def with_options(self, **options):
+        return self
+
+class StubBackend(LLMBackend):
+    """
+    Answers in-process after a fixed delay, echoing the prompt's input data
+
+    Only the clients are replaced, so the report cache, circuit breaker and
+    report storage behave as with a real provider.
+    """
+    name = "stub"
+    uses_http = False
+
+    def __init__(self, latency_seconds=None):
+        self.latency_seconds = Config.LLM_STUB_LATENCY_MS / 1000.0 if latency_seconds is None else latency_seconds
+        self.calls = 0
+
+    @staticmethod
+    def reply(messages):
+        prompt = messages[-1]["content"]
+        data = prompt.split("**Input Data**:", 1)[-1].split("**Output Format:**", 1)[0].strip()
+        return f"### Stub Green Finance Investment Report\n\n#### 1. **Input Data**\n{data}\n"
+
+    def create_clients(self, http_client, async_http_client, timeout):
+        return _StubClient(self, asynchronous=False), _StubClient(self, asynchronous=True)
+
+    def stats(self):
+        return {"backend": self.name, "latency_ms": self.latency_seconds * 1000.0, "calls": self.calls}
+
+LLM_BACKENDS = {backend.name: backend for backend in (GroqBackend, LocalServerBackend, StubBackend)}
+
+def create_backend(name):
+    """
+    Backend registered under name
+
+    Raises:
+        ValueError: If no backend has that name
+    """
+    backend_class = LLM_BACKENDS.get(name)
+    if backend_class is None:
+        raise ValueError(f"Unknown LLM backend '{name}', use one of: {', '.join(LLM_BACKENDS)}")
+    return backend_class()
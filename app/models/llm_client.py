@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import threading
+import httpx
+from app.config import Config
+from app.models.llm_backends import create_backend
+
+logger = logging.getLogger(__name__)
+
+class LLMClientManager:
+    """
+    Process-wide LLM clients backed by shared, keep-alive HTTP connection pools
+
+    Created once at startup so reports reuse open TCP/TLS connections instead
+    of building a new client (and connection pool) for every request. The
+    backend (Config.LLM_BACKEND) decides what the clients talk to.
+    """
+    def __init__(self):
+        self.backend = None
+        self.client = None
+        self.async_client = None
+        self._http_client = None
+        self._async_http_client = None
+        self._lock = threading.Lock()
+        self.requests_sent = 0
+        self.responses_received = 0
+
+    @property
+    def started(self):
+        return self.client is not None
+
+    def _limits(self):
+        return httpx.Limits(
+            max_connections=Config.LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=Config.LLM_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=Config.LLM_KEEPALIVE_EXPIRY_SECONDS
+        )
+
+    def _timeout(self):
+        return httpx.Timeout(Config.LLM_TIMEOUT_SECONDS, connect=Config.LLM_CONNECT_TIMEOUT_SECONDS)
+
+    def _on_request(self, request):
+        self.requests_sent += 1
+
+    def _on_response(self, response):
+        self.responses_received += 1
+
+    async def _on_request_async(self, request):
+        self.requests_sent += 1
+
+    async def _on_response_async(self, response):
+        self.responses_received += 1
+
+    def start(self):
+        """Create the shared clients, if not created already"""
+        with self._lock:
+            if self.started:
+                return
+            backend = create_backend(Config.LLM_BACKEND)
+            http_client = async_http_client = None
+            if backend.uses_http:
+                http_client = httpx.Client(
+                    limits=self._limits(),
+                    timeout=self._timeout(),
+                    event_hooks={"request": [self._on_request], "response": [self._on_response]}
+                )
+                async_http_client = httpx.AsyncClient(
+                    limits=self._limits(),
+                    timeout=self._timeout(),
+                    event_hooks={"request": [self._on_request_async], "response": [self._on_response_async]}
+                )
+            try:
+                self.client, self.async_client = backend.create_clients(http_client, async_http_client, self._timeout())
+            except Exception:
+                if http_client is not None:
+                    http_client.close()
+                if async_http_client is not None:
+                    self._discard_async_client(async_http_client)
+                raise
+            self.backend = backend
+            self._http_client, self._async_http_client = http_client, async_http_client
+            logger.info(f"LLM clients initialized for the {backend.name} backend with up to {Config.LLM_MAX_CONNECTIONS} pooled connections.")
+
+    @staticmethod
+    def _discard_async_client(async_http_client):
+        """Close an async client from sync code; it has sent nothing, so any event loop will do"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(async_http_client.aclose())
+        else:
+            loop.create_task(async_http_client.aclose())
+
+    def get_clients(self):
+        """Return the shared (sync, async) clients, creating them on first use"""
+        if not self.started:
+            self.start()
+        return self.client, self.async_client
+
+    async def aclose(self):
+        """Close both connection pools"""
+        with self._lock:
+            http_client, async_http_client = self._http_client, self._async_http_client
+            self.client = self.async_client = self.backend = None
+            self._http_client = self._async_http_client = None
+        if http_client is not None:
+            http_client.close()
+        if async_http_client is not None:
+            await async_http_client.aclose()
+        logger.info("LLM clients closed.")
+
+    @staticmethod
+    def _pool_connections(http_client):
+        # httpx does not expose pool state publicly, read it from the transport when available
+        pool = getattr(getattr(http_client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []) or [])
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {"open": len(connections), "idle": idle, "active": len(connections) - idle}
+
+    def stats(self):
+        """Return pool configuration, connection counts and request counters"""
+        stats = {
+            "started": self.started,
+            "backend": self.backend.stats() if self.backend else {"backend": Config.LLM_BACKEND},
+            "max_connections": Config.LLM_MAX_CONNECTIONS,
+            "max_keepalive_connections": Config.LLM_MAX_KEEPALIVE_CONNECTIONS,
+            "keepalive_expiry_seconds": Config.LLM_KEEPALIVE_EXPIRY_SECONDS,
+            "timeout_seconds": Config.LLM_TIMEOUT_SECONDS,
+            "requests_sent": self.requests_sent,
+            "responses_received": self.responses_received
+        }
+        if self._http_client is not None:
+            stats["sync_pool"] = self._pool_connections(self._http_client)
+            stats["async_pool"] = self._pool_connections(self._async_http_client)
+        return stats
+
+# Shared LLM clients, started with the application
+llm_client_manager = LLMClientManager()
@@ -1,42 +1,172 @@
 import numpy as np
 import os
+import asyncio
+import hashlib
+import threading
 import joblib
 import logging
 import traceback
+from starlette.concurrency import run_in_threadpool
 from app.config import Config
 from app.utils.exceptions import log_exception, ModelLoadingError, PreprocessingError, PredictionError
 from app.utils.helper import calculate_esg
 from app.models.llm import LLM
+from app.models.report_cache import make_cache_key
+from app.models.forest_compiler import compile_forest
 
 logger = logging.getLogger(__name__)
 
-# Store loaded models
-models = {}
+SCALER_FILENAME = "scaler_object.joblib"
+ML_MODEL_FILENAME = "random_forest.joblib"
+
+class ModelBundle:
+    """A loaded, ready-to-use set of model artifacts with its version"""
+    def __init__(self, version, scaler, ml_model, fingerprint):
+        self.version = version
+        self.scaler = scaler
+        self.ml_model = ml_model
+        self.fingerprint = fingerprint
+        self.preprocessor = DataPreprocessor(scaler)
+        self.ml_predictor = MLModelPredictor(ml_model)
+
+class ModelRegistry:
+    """
+    Holds the active model bundle and hot-reloads it when artifacts change
+
+    Predictor instances are created once per artifact version and shared by
+    all requests. A background thread watches Config.MODELS_PATH; when the
+    artifacts change, the new version is loaded off the request path and
+    swapped in with a single reference assignment, so in-flight requests
+    finish on the bundle they started with.
+    """
+    def __init__(self, models_path):
+        self.models_path = models_path
+        self._active = None
+        self._load_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._watcher = None
+        self.reload_count = 0
+
+    @property
+    def artifact_paths(self):
+        return (
+            os.path.join(self.models_path, SCALER_FILENAME),
+            os.path.join(self.models_path, ML_MODEL_FILENAME)
+        )
+
+    def _fingerprint(self):
+        # Cheap change detection based on file size and modification time
+        return tuple(
+            (os.stat(path).st_size, os.stat(path).st_mtime_ns)
+            for path in self.artifact_paths
+        )
+
+    def _version(self):
+        # Version is a content hash of both artifacts, so it is stable across restarts
+        sha = hashlib.sha256()
+        for path in self.artifact_paths:
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    sha.update(chunk)
+        return sha.hexdigest()[:12]
+
+    def load(self):
+        """Load the artifacts from disk and make them the active bundle"""
+        with self._load_lock:
+            scaler_path, ml_model_path = self.artifact_paths
+            
+            # Print the actual paths for debugging
+            logger.info(f"Loading models from: {scaler_path} and {ml_model_path}")
+            
+            missing_files = [path for path in self.artifact_paths if not os.path.exists(path)]
+            if missing_files:
+                error_msg = f"Model files not found: {', '.join(missing_files)}"
+                logger.error(error_msg)
+                raise FileNotFoundError(error_msg)
+            
+            fingerprint = self._fingerprint()
+            version = self._version()
+            bundle = ModelBundle(
+                version=version,
+                scaler=joblib.load(scaler_path),
+                ml_model=joblib.load(ml_model_path),
+                fingerprint=fingerprint
+            )
+            
+            previous = self._active
+            self._active = bundle
+            if previous is not None:
+                self.reload_count += 1
+                logger.info(f"Models reloaded: version {previous.version} -> {version}")
+            else:
+                logger.info(f"Models loaded: version {version}")
+            return bundle
+
+    def current(self):
+        """Return the active model bundle"""
+        bundle = self._active
+        if bundle is None:
+            raise ModelLoadingError("Models not initialized. Call initialize_models() first.")
+        return bundle
+
+    @property
+    def version(self):
+        return self._active.version if self._active else None
+
+    def check_for_update(self):
+        """Reload the artifacts if they changed on disk; returns True if reloaded"""
+        try:
+            fingerprint = self._fingerprint()
+        except OSError:
+            # Artifacts are being replaced, try again on the next check
+            return False
+        if self._active is not None and fingerprint == self._active.fingerprint:
+            return False
+        try:
+            self.load()
+            return True
+        except Exception as e:
+            log_exception(e, "Error reloading models, keeping the active version.")
+            return False
+
+    def start_watching(self, interval):
+        """Start the background thread that polls for new artifact versions"""
+        if self._watcher is not None:
+            return
+        self._stop_event.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(interval,), name="model-registry-watcher", daemon=True)
+        self._watcher.start()
+        logger.info(f"Watching {self.models_path} for model updates every {interval}s")
+
+    def stop_watching(self):
+        self._stop_event.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+    def _watch(self, interval):
+        while not self._stop_event.wait(interval):
+            self.check_for_update()
+
+    def stats(self):
+        return {
+            "version": self.version,
+            "models_path": self.models_path,
+            "reload_count": self.reload_count,
+            "watching": self._watcher is not None
+        }
+
+# Shared model registry
+model_registry = ModelRegistry(Config.MODELS_PATH)
 
 def initialize_models():
-    """Initialize and load ML models from disk"""
+    """Initialize and load ML models from disk, then watch for new versions"""
     try:
-        scaler_path = os.path.join(Config.MODELS_PATH, "scaler_object.joblib")
-        ml_model_path = os.path.join(Config.MODELS_PATH, "random_forest.joblib")
-        
-        # Print the actual paths for debugging
-        logger.info(f"Loading models from: {scaler_path} and {ml_model_path}")
-        
-        if os.path.exists(scaler_path) and os.path.exists(ml_model_path):
-            models["scaler"] = joblib.load(scaler_path)
-            models["ml_model"] = joblib.load(ml_model_path)
-            logger.info("Models initialized successfully.")
-            return True
-        else:
-            missing_files = []
-            if not os.path.exists(scaler_path):
-                missing_files.append(scaler_path)
-            if not os.path.exists(ml_model_path):
-                missing_files.append(ml_model_path)
-            
-            error_msg = f"Model files not found: {', '.join(missing_files)}"
-            logger.error(error_msg)
-            raise FileNotFoundError(error_msg)
+        model_registry.load()
+        logger.info("Models initialized successfully.")
+        if Config.MODEL_RELOAD_INTERVAL_SECONDS > 0:
+            model_registry.start_watching(Config.MODEL_RELOAD_INTERVAL_SECONDS)
+        return True
     except Exception as e:
         error_msg = f"Error loading models: {str(e)}"
         logger.error(error_msg)
@@ -44,44 +174,66 @@ def initialize_models():
         raise e
 
 class DataPreprocessor:
-    def __init__(self):
+    def __init__(self, scaler=None):
         try:
-            self.scaler = models.get("scaler")
+            # Default to the scaler of the active model bundle
+            self.scaler = scaler if scaler is not None else model_registry.current().scaler
             if not self.scaler:
                 raise ModelLoadingError("Scaler not initialized. Call initialize_models() first.")
-            logger.info("Scaler loaded successfully.")
         except Exception as e:
             log_exception(e, "Error loading scaler in DataPreprocessor.")
             raise ModelLoadingError("Could not load the scaler for data preprocessing.")
         
     def preprocess(self, input_data):
         try:
-            logger.info(f"Preprocessing data: {input_data}")
+            logger.debug("Preprocessing data: %s", input_data)
             scaled_data = self.scaler.transform(np.array(input_data).reshape(1, -1))
-            logger.info("Data preprocessing completed successfully.")
+            logger.debug("Data preprocessing completed successfully.")
             return scaled_data
         except Exception as e:
             error_msg = f"Error in preprocessing data: {str(e)}"
             logger.error(error_msg)
             logger.error(traceback.format_exc())
             raise PreprocessingError(f"Preprocessing failed: {str(e)}") from e
+
+    def preprocess_batch(self, input_matrix):
+        """Scale many rows with a single transform call"""
+        try:
+            input_matrix = np.asarray(input_matrix, dtype=float)
+            if input_matrix.ndim != 2:
+                raise ValueError(f"Expected a 2D matrix, got shape {input_matrix.shape}")
+            logger.debug("Preprocessing batch of %s rows", input_matrix.shape[0])
+            scaled_data = self.scaler.transform(input_matrix)
+            logger.debug("Batch preprocessing completed successfully.")
+            return scaled_data
+        except Exception as e:
+            error_msg = f"Error in batch preprocessing: {str(e)}"
+            logger.error(error_msg)
+            logger.error(traceback.format_exc())
+            raise PreprocessingError(f"Batch preprocessing failed: {str(e)}") from e
         
 class MLModelPredictor:
-    def __init__(self):
+    def __init__(self, model=None):
         try:
-            self.model = models.get("ml_model")
+            # Default to the model of the active model bundle
+            self.model = model if model is not None else model_registry.current().ml_model
             if not self.model:
                 raise ModelLoadingError("ML model not initialized. Call initialize_models() first.")
-            logger.info("ML model loaded successfully.")
         except Exception as e:
             log_exception(e, "Failed to load ML model in MLModelPredictor.")
             raise ModelLoadingError("Could not load ML model. Please check model path and format.") from e
+        
+        # Array-compiled forest for low-overhead inference, None if the model can't be compiled
+        self.compiled = compile_forest(self.model) if Config.COMPILE_ML_MODEL else None
 
     def predict(self, preprocessed_data):
         try:
-            logger.info(f"Making prediction with data shape: {preprocessed_data.shape}")
-            prediction = self.model.predict_proba(preprocessed_data)
-            logger.info(f"ML model prediction result: {prediction}")
+            logger.debug("Making prediction with data shape: %s", preprocessed_data.shape)
+            if self.compiled is not None:
+                prediction = self.compiled.predict_proba(preprocessed_data)
+            else:
+                prediction = self.model.predict_proba(preprocessed_data)
+            logger.debug("ML model prediction result: %s", prediction)
             return prediction
         except Exception as e:
             error_msg = f"Error during ML model prediction: {str(e)}"
@@ -89,7 +241,216 @@ class MLModelPredictor:
             logger.error(traceback.format_exc())
             raise PredictionError(f"Prediction failed: {str(e)}") from e
 
-def run_prediction(
+def build_llm_input(
+    esg_score,
+    risk_probability,
+    impact_area_community,
+    impact_area_environment,
+    impact_area_customers,
+    impact_area_governance,
+    certification_cycle,
+    company_details
+):
+    """Format the prediction result and company details as the LLM input block"""
+    # Format raw input for LLM
+    input_raw_data = f"""
+Company Name: {company_details.get('company_name', 'Unknown')}
+Place: {company_details.get('country', 'Unknown')}  
+Industry Category: {company_details.get('industry_category', 'Unknown')}  
+Sector: {company_details.get('sector', 'Unknown')}  
+Industry: {company_details.get('industry', 'Unknown')}  
+Products and Services: {company_details.get('products_and_services', 'Unknown')}  
+Description: {company_details.get('description', 'Unknown')}
+Impact Area Community Value: {impact_area_community}
+Impact Area Environment Value: {impact_area_environment}
+Impact Area Customers Value: {impact_area_customers}
+Impact Area Governance Value: {impact_area_governance}
+Certification Cycle: {certification_cycle}
+        """
+    
+    return f"""
+        Green Finance Report:
+
+        **ESG Score:** {esg_score}
+        
+        **ML Model Risk Probability:** {risk_probability}
+        
+        {input_raw_data}
+        """
+
+def build_fallback_report(company_details, esg_score, risk_probability):
+    """Basic markdown report used when the LLM service fails"""
+    return f"""
+            ### {company_details.get('company_name', 'Unknown')} - Green Finance Report
+            
+            **Note:** This is a simplified report due to an error in the LLM service.
+            
+            #### ESG Score: {esg_score:.2f}
+            #### Risk Probability: {risk_probability:.2%}
+            
+            Please try again later for a complete analysis.
+            """
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-row model calls into one matrix call
+
+    Rows submitted within `window_ms` of the first pending row (or until
+    `max_batch_size` rows are pending) are scaled with one transform and
+    scored with one predict_proba in the threadpool. Each caller gets back
+    its own row of the result. Only used while the ML risk model is enabled.
+    """
+    def __init__(self, window_ms, max_batch_size):
+        self.window_ms = window_ms
+        self.max_batch_size = max_batch_size
+        self._pending = []
+        self._timer = None
+        self.batches = 0
+        self.rows = 0
+        self.largest_batch = 0
+
+    async def score(self, structured_data):
+        """
+        Queue one row for the next batch and wait for its result
+
+        Returns:
+            tuple: (ML risk probability, model version)
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((structured_data, future))
+        
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_ms / 1000, self._flush)
+        
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        
+        self.batches += 1
+        self.rows += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        asyncio.ensure_future(self._score(batch))
+
+    async def _score(self, batch):
+        try:
+            risks, version = await run_in_threadpool(self._score_batch, [row for row, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, future), risk in zip(batch, risks):
+            if not future.done():
+                future.set_result((risk, version))
+
+    @staticmethod
+    def _score_batch(rows):
+        bundle = model_registry.current()
+        preprocessed_data = bundle.preprocessor.preprocess_batch(rows)
+        return bundle.ml_predictor.predict(preprocessed_data)[:, 1].tolist(), bundle.version
+
+    def stats(self):
+        return {
+            "window_ms": self.window_ms,
+            "max_batch_size": self.max_batch_size,
+            "batches": self.batches,
+            "rows": self.rows,
+            "average_batch_size": self.rows / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "pending": len(self._pending)
+        }
+
+# Shared micro-batcher for async prediction routes
+micro_batcher = MicroBatcher(
+    window_ms=Config.MICRO_BATCH_WINDOW_MS,
+    max_batch_size=Config.MICRO_BATCH_MAX_SIZE
+)
+
+def _score_row(structured_data):
+    """Run the model step for a single row, returns (ML risk probability or None, model version)"""
+    # Use the warm predictors of the active model version
+    bundle = model_registry.current()
+    
+    ml_risk = None
+    if Config.USE_ML_RISK_MODEL:
+        # Preprocess the data and get predictions from ML model
+        preprocessed_data = bundle.preprocessor.preprocess(structured_data)
+        ml_prediction_result = bundle.ml_predictor.predict(preprocessed_data)
+        ml_risk = float(ml_prediction_result[0][1])  # Class 1 probability
+    return ml_risk, bundle.version
+
+def _complete_prediction(
+    impact_area_community, 
+    impact_area_environment, 
+    impact_area_customers, 
+    impact_area_governance, 
+    certification_cycle, 
+    company_details,
+    ml_risk,
+    model_version
+):
+    """Compute the ESG score and risk probability and format the LLM input"""
+    # Calculate ESG score
+    esg_score = calculate_esg(
+        impact_area_environment, 
+        impact_area_community, 
+        impact_area_governance,
+        Config.ESG_WEIGHTS
+    )
+    logger.debug("ESG score: %s", esg_score)
+
+    if ml_risk is not None:
+        risk_probability = ml_risk
+        logger.debug("Risk probability: %s", risk_probability)
+    else:
+        # Derive risk probability from ESG score
+        risk_probability = max(0.0, min(1.0, (100 - esg_score) / 100))
+        logger.debug("Calculated risk probability from ESG score: %s", risk_probability)
+    
+    # Prepare result for LLM
+    result_for_llm = build_llm_input(
+        esg_score,
+        risk_probability,
+        impact_area_community,
+        impact_area_environment,
+        impact_area_customers,
+        impact_area_governance,
+        certification_cycle,
+        company_details
+    )
+    
+    # Key for reusing reports generated for the same inputs
+    cache_key = make_cache_key(
+        company_details,
+        impact_area_community,
+        impact_area_environment,
+        impact_area_customers,
+        impact_area_governance,
+        certification_cycle,
+        LLM.PROMPT_VERSION,
+        model_version=model_version,
+        use_ml_risk_model=ml_risk is not None
+    )
+    
+    return {
+        "esg_score": esg_score,
+        "risk_probability": risk_probability,
+        "result_for_llm": result_for_llm,
+        "cache_key": cache_key,
+        "model_version": model_version
+    }
+
+def prepare_prediction(
     impact_area_community, 
     impact_area_environment, 
     impact_area_customers, 
@@ -98,7 +459,7 @@ def run_prediction(
     company_details
 ):
     """
-    Runs the full prediction pipeline for green finance risk analysis
+    Runs the numeric part of the prediction pipeline (preprocessing and ESG score)
     
     Args:
         impact_area_community (float): Community impact score
@@ -109,17 +470,11 @@ def run_prediction(
         company_details (dict): Dictionary containing company details
         
     Returns:
-        dict: Dictionary containing prediction results
+        dict: ESG score, risk probability, the formatted LLM input, its report cache key
+              and the model version used
     """
-    llm_report = None
-    llm_error = None
-    
     try:
-        logger.info(f"Starting prediction for company: {company_details.get('company_name', 'Unknown')}")
-        
-        # Initialize classes
-        preprocessor = DataPreprocessor()
-        ml_predictor = MLModelPredictor()
+        logger.debug("Starting prediction for company: %s", company_details.get('company_name', 'Unknown'))
         
         # Prepare structured data input for ML model
         structured_data = [
@@ -130,87 +485,178 @@ def run_prediction(
             certification_cycle
         ]
         
-        logger.info(f"Input data: {structured_data}")
-        
-        # Preprocess the data
-        preprocessed_data = preprocessor.preprocess(structured_data)
+        logger.debug("Input data: %s", structured_data)
         
-        # Get predictions from ML model
-        # ml_prediction_result = ml_predictor.predict(preprocessed_data)
-        # risk_probability = float(ml_prediction_result[0][1])  # Class 1 probability
-        # logger.info(f"Risk probability: {risk_probability}")
+        ml_risk, model_version = _score_row(structured_data)
         
-        # Calculate ESG score
-        esg_score = calculate_esg(
-            impact_area_environment, 
-            impact_area_community, 
+        return _complete_prediction(
+            impact_area_community,
+            impact_area_environment,
+            impact_area_customers,
             impact_area_governance,
-            Config.ESG_WEIGHTS
+            certification_cycle,
+            company_details,
+            ml_risk,
+            model_version
         )
-        logger.info(f"ESG score: {esg_score}")
+    
+    except Exception as e:
+        error_msg = f"Error in prediction function: {str(e)}"
+        logger.error(error_msg)
+        logger.error(traceback.format_exc())
+        raise PredictionError(error_msg) from e
 
-        # Derive risk probability from ESG score
-        risk_probability = max(0.0, min(1.0, (100 - esg_score) / 100))
-        logger.info(f"Calculated risk probability from ESG score: {risk_probability}")
+async def prepare_prediction_async(
+    impact_area_community, 
+    impact_area_environment, 
+    impact_area_customers, 
+    impact_area_governance, 
+    certification_cycle, 
+    company_details
+):
+    """
+    Async variant of prepare_prediction that micro-batches the model step
+    with other concurrent requests when the ML risk model is enabled
+    
+    Returns:
+        dict: Same as prepare_prediction
+    """
+    try:
+        structured_data = [
+            impact_area_community, 
+            impact_area_customers, 
+            impact_area_environment, 
+            impact_area_governance, 
+            certification_cycle
+        ]
         
-        # Format raw input for LLM
-        input_raw_data = f"""
-Company Name: {company_details.get('company_name', 'Unknown')}
-Place: {company_details.get('country', 'Unknown')}  
-Industry Category: {company_details.get('industry_category', 'Unknown')}  
-Sector: {company_details.get('sector', 'Unknown')}  
-Industry: {company_details.get('industry', 'Unknown')}  
-Products and Services: {company_details.get('products_and_services', 'Unknown')}  
-Description: {company_details.get('description', 'Unknown')}
-Impact Area Community Value: {impact_area_community}
-Impact Area Environment Value: {impact_area_environment}
-Impact Area Customers Value: {impact_area_customers}
-Impact Area Governance Value: {impact_area_governance}
-Certification Cycle: {certification_cycle}
-        """
+        if not Config.USE_ML_RISK_MODEL:
+            # The risk is derived from the ESG score, there is nothing to batch
+            ml_risk, model_version = None, model_registry.current().version
+        elif micro_batcher.window_ms > 0:
+            ml_risk, model_version = await micro_batcher.score(structured_data)
+        else:
+            # Scaling and the forest are CPU work, keep them off the event loop
+            ml_risk, model_version = await run_in_threadpool(_score_row, structured_data)
         
-        # Prepare result for LLM
-        result_for_llm = f"""
-        Green Finance Report:
+        return _complete_prediction(
+            impact_area_community,
+            impact_area_environment,
+            impact_area_customers,
+            impact_area_governance,
+            certification_cycle,
+            company_details,
+            ml_risk,
+            model_version
+        )
+    
+    except Exception as e:
+        error_msg = f"Error in prediction function: {str(e)}"
+        logger.error(error_msg)
+        logger.error(traceback.format_exc())
+        raise PredictionError(error_msg) from e
 
-        **ESG Score:** {esg_score}
+async def generate_report(prepared, company_details):
+    """
+    Generate the LLM report for a prepared prediction without blocking the event loop
+    
+    Args:
+        prepared (dict): Result of prepare_prediction
+        company_details (dict): Dictionary containing company details
         
-        **ML Model Risk Probability:** {risk_probability}
+    Returns:
+        tuple: (llm_report, llm_error), llm_error is None on success
+    """
+    try:
+        llm = LLM()
+        llm_report = await llm.ainference(
+            result=prepared["result_for_llm"],
+            cache_key=prepared["cache_key"],
+            company_name=company_details.get('company_name')
+        )
+        logger.info("LLM report generated successfully.")
+        return llm_report, None
+    except Exception as e:
+        llm_error = str(e)
+        logger.error(f"Error generating LLM report: {llm_error}")
+        logger.error(traceback.format_exc())
+        return build_fallback_report(company_details, prepared["esg_score"], prepared["risk_probability"]), llm_error
+
+def run_batch_prediction(rows, company_details_list, generate_reports=False):
+    """
+    Runs the numeric part of the prediction pipeline over many rows at once
+    
+    All rows are scaled with a single transform call and the ESG scores are
+    computed as one vectorized expression. Reports are not generated here:
+    with generate_reports each result also carries the LLM input and cache
+    key, so it can be submitted to the report queue like prepare_prediction's.
+    
+    Args:
+        rows (list): List of dicts with the impact area values and certification cycle
+        company_details_list (list): Company details dict for each row, in the same order
+        generate_reports (bool): Whether to include the report inputs
         
-        {input_raw_data}
-        """
+    Returns:
+        list: One result dict per input row
+    """
+    try:
+        logger.info(f"Starting batch prediction for {len(rows)} rows")
         
-        # Try to get LLM report, but continue even if it fails
-        try:
-            llm = LLM()
-            llm_report = llm.inference(result=result_for_llm)
-            logger.info("LLM report generated successfully.")
-        except Exception as e:
-            llm_error = str(e)
-            logger.error(f"Error generating LLM report: {llm_error}")
-            logger.error(traceback.format_exc())
-            # Create a basic report if LLM fails
-            llm_report = f"""
-            ### {company_details.get('company_name', 'Unknown')} - Green Finance Report
-            
-            **Note:** This is a simplified report due to an error in the LLM service.
-            
-            #### ESG Score: {esg_score:.2f}
-            #### Risk Probability: {risk_probability:.2%}
-            
-            Please try again later for a complete analysis.
-            """
+        bundle = model_registry.current()
         
-        # Return complete results
-        return {
-            "esg_score": esg_score,
-            "risk_probability": risk_probability,
-            "llm_report": llm_report,
-            "llm_error": llm_error
-        }
+        # Same column order the scaler was fitted on
+        input_matrix = np.array([
+            [
+                row["impact_area_community"],
+                row["impact_area_customers"],
+                row["impact_area_environment"],
+                row["impact_area_governance"],
+                row["certification_cycle"]
+            ]
+            for row in rows
+        ], dtype=float)
+        
+        community = input_matrix[:, 0]
+        environment = input_matrix[:, 2]
+        governance = input_matrix[:, 3]
+        esg_scores = calculate_esg(environment, community, governance, Config.ESG_WEIGHTS)
+        if Config.USE_ML_RISK_MODEL:
+            preprocessed_data = bundle.preprocessor.preprocess_batch(input_matrix)
+            risk_probabilities = bundle.ml_predictor.predict(preprocessed_data)[:, 1]
+        else:
+            risk_probabilities = np.clip((100 - esg_scores) / 100, 0.0, 1.0)
+        
+        results = []
+        for i, row in enumerate(rows):
+            result = {
+                "esg_score": float(esg_scores[i]),
+                "risk_probability": float(risk_probabilities[i]),
+                "model_version": bundle.version
+            }
+            if generate_reports:
+                company_details = company_details_list[i]
+                inputs = (
+                    row["impact_area_community"],
+                    row["impact_area_environment"],
+                    row["impact_area_customers"],
+                    row["impact_area_governance"],
+                    row["certification_cycle"]
+                )
+                result["result_for_llm"] = build_llm_input(
+                    result["esg_score"], result["risk_probability"], *inputs, company_details
+                )
+                result["cache_key"] = make_cache_key(
+                    company_details, *inputs, LLM.PROMPT_VERSION,
+                    model_version=bundle.version,
+                    use_ml_risk_model=Config.USE_ML_RISK_MODEL
+                )
+            results.append(result)
+        
+        logger.info(f"Batch prediction completed for {len(results)} rows")
+        return results
     
     except Exception as e:
-        error_msg = f"Error in prediction function: {str(e)}"
+        error_msg = f"Error in batch prediction function: {str(e)}"
         logger.error(error_msg)
         logger.error(traceback.format_exc())
-        raise PredictionError(error_msg) from e 
\ No newline at end of file
+        raise PredictionError(error_msg) from e
@@ -0,0 +1,347 @@
+import datetime
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from sqlalchemy import bindparam, func, update
+from app.config import Config
+from app.database.database import SessionLocal
+from app.database.models import ReportCacheEntry
+from app.database.upsert import upsert
+from app.utils.exceptions import log_exception
+
+logger = logging.getLogger(__name__)
+
+# Company fields that influence the generated report
+KEY_COMPANY_FIELDS = [
+    'company_name', 'country', 'industry_category', 'sector',
+    'industry', 'products_and_services', 'description'
+]
+
+def make_cache_key(
+    company_details,
+    impact_area_community,
+    impact_area_environment,
+    impact_area_customers,
+    impact_area_governance,
+    certification_cycle,
+    prompt_version,
+    model_version=None,
+    use_ml_risk_model=None
+):
+    """
+    Build the report cache key from normalized prediction inputs
+
+    Impact values are rounded to one decimal (the form's step size) so that
+    equivalent submissions share a report. The LLM name, prompt version, risk
+    model version and whether the risk model is used are part of the key, so
+    none of them can change without the report being regenerated.
+    """
+    if use_ml_risk_model is None:
+        use_ml_risk_model = Config.USE_ML_RISK_MODEL
+    payload = {
+        "company": {field: company_details.get(field) for field in KEY_COMPANY_FIELDS},
+        "impact": [
+            round(float(impact_area_community), 1),
+            round(float(impact_area_environment), 1),
+            round(float(impact_area_customers), 1),
+            round(float(impact_area_governance), 1)
+        ],
+        "certification_cycle": int(certification_cycle),
+        "model": Config.GROQ_MODEL_NAME,
+        "prompt_version": prompt_version,
+        "model_version": model_version,
+        "ml_risk_model": bool(use_ml_risk_model)
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+class ReportCache:
+    """
+    Two-tier cache for generated LLM reports
+
+    The first tier is an in-memory LRU, the second a table in the application
+    database that survives restarts. Both tiers honour the same TTL; the
+    database tier is trimmed to a maximum number of entries, least recently
+    used first.
+
+    Hits don't write to the database: access times and hit counts are
+    buffered and written in one batch every access_flush_seconds (or once
+    ACCESS_FLUSH_SIZE keys are pending). Expired and excess entries are
+    removed by a sweep that runs every sweep_seconds, or sooner once an
+    approximate count of entries reaches max_entries.
+    """
+    # Pending access updates that trigger a flush regardless of the interval
+    ACCESS_FLUSH_SIZE = 256
+    # A sweep trims the table to this fraction of max_entries, so the next one isn't due right away
+    SWEEP_TARGET_RATIO = 0.9
+
+    def __init__(
+        self, memory_size, max_entries, ttl_seconds, session_factory=SessionLocal,
+        access_flush_seconds=30, sweep_seconds=600
+    ):
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self.ttl = datetime.timedelta(seconds=ttl_seconds)
+        self.session_factory = session_factory
+        self.access_flush_interval = datetime.timedelta(seconds=access_flush_seconds)
+        self.sweep_interval = datetime.timedelta(seconds=sweep_seconds)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        # key -> [last access time, hits since the last flush]
+        self._pending_access = {}
+        self._last_access_flush = datetime.datetime.utcnow()
+        # Entry count as of the last sweep plus sets since; None until the first sweep
+        self._approx_entries = None
+        self._last_sweep = None
+        self._sweeping = False
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _remember(self, key, report, expires_at):
+        with self._lock:
+            self._memory[key] = (report, expires_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def _record_access(self, key, now):
+        """Buffer an access; must be called with the lock held"""
+        pending = self._pending_access.get(key)
+        if pending is None:
+            self._pending_access[key] = [now, 1]
+        else:
+            pending[0] = now
+            pending[1] += 1
+
+    def _access_flush_due(self, now):
+        with self._lock:
+            return bool(self._pending_access) and (
+                len(self._pending_access) >= self.ACCESS_FLUSH_SIZE
+                or now - self._last_access_flush >= self.access_flush_interval
+            )
+
+    def flush_access(self):
+        """Write buffered access times and hit counts to the database in one batch"""
+        with self._lock:
+            pending, self._pending_access = self._pending_access, {}
+            self._last_access_flush = datetime.datetime.utcnow()
+        if not pending:
+            return
+
+        table = ReportCacheEntry.__table__
+        statement = (
+            update(table)
+            .where(table.c.key == bindparam("entry_key"))
+            .values(
+                accessed_at=bindparam("accessed"),
+                hit_count=func.coalesce(table.c.hit_count, 0) + bindparam("hits")
+            )
+        )
+        db = self.session_factory()
+        try:
+            db.execute(statement, [
+                {"entry_key": key, "accessed": accessed, "hits": hits}
+                for key, (accessed, hits) in pending.items()
+            ])
+            db.commit()
+        except Exception as e:
+            # Access times only order eviction, losing a batch is harmless
+            db.rollback()
+            log_exception(e, "Error updating report cache access times.")
+        finally:
+            db.close()
+
+    def get(self, key):
+        """Return the cached report for key, or None on a miss"""
+        now = datetime.datetime.utcnow()
+
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                if cached[1] > now:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    self._record_access(key, now)
+                    report = cached[0]
+                else:
+                    del self._memory[key]
+                    cached = None
+
+        if cached is None:
+            db = self.session_factory()
+            try:
+                entry = db.query(ReportCacheEntry.report, ReportCacheEntry.expires_at).filter(ReportCacheEntry.key == key).first()
+            except Exception as e:
+                log_exception(e, "Error reading report cache.")
+                entry = None
+            finally:
+                db.close()
+
+            if entry is None or entry.expires_at <= now:
+                with self._lock:
+                    self.misses += 1
+                return None
+            report = entry.report
+            with self._lock:
+                self.db_hits += 1
+                self._record_access(key, now)
+            self._remember(key, report, entry.expires_at)
+
+        if self._access_flush_due(now):
+            self.flush_access()
+        return report
+
+    def set(self, key, report, company_name=None, prompt_version=None):
+        """Store a report in both tiers"""
+        now = datetime.datetime.utcnow()
+        expires_at = now + self.ttl
+        self._remember(key, report, expires_at)
+
+        db = self.session_factory()
+        try:
+            upsert(db, ReportCacheEntry, {
+                "key": key,
+                "company_name": company_name,
+                "model_name": Config.GROQ_MODEL_NAME,
+                "prompt_version": prompt_version,
+                "report": report,
+                "hit_count": 0,
+                "created_at": now,
+                "accessed_at": now,
+                "expires_at": expires_at
+            }, [ReportCacheEntry.key], set_=lambda row: {
+                "company_name": row.company_name,
+                "model_name": row.model_name,
+                "prompt_version": row.prompt_version,
+                "report": row.report,
+                "hit_count": row.hit_count,
+                "created_at": row.created_at,
+                "accessed_at": row.accessed_at,
+                "expires_at": row.expires_at
+            })
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            log_exception(e, "Error writing report cache.")
+            return
+        finally:
+            db.close()
+
+        with self._lock:
+            # Replacing an entry also counts, so the estimate only errs high
+            if self._approx_entries is not None:
+                self._approx_entries += 1
+            due = not self._sweeping and (
+                self._approx_entries is None
+                or self._approx_entries >= self.max_entries
+                or now - self._last_sweep >= self.sweep_interval
+            )
+            if due:
+                self._sweeping = True
+        if due:
+            try:
+                self.sweep()
+            finally:
+                with self._lock:
+                    self._sweeping = False
+
+    def sweep(self):
+        """Drop expired entries and trim the table below max_entries"""
+        self.flush_access()
+        now = datetime.datetime.utcnow()
+        db = self.session_factory()
+        try:
+            removed = db.query(ReportCacheEntry).filter(ReportCacheEntry.expires_at <= now).delete(synchronize_session=False)
+
+            count = db.query(ReportCacheEntry).count()
+            excess = count - int(self.max_entries * self.SWEEP_TARGET_RATIO) if count > self.max_entries else 0
+            if excess > 0:
+                oldest = [
+                    key for (key,) in db.query(ReportCacheEntry.key)
+                    .order_by(ReportCacheEntry.accessed_at.asc())
+                    .limit(excess)
+                ]
+                trimmed = db.query(ReportCacheEntry).filter(ReportCacheEntry.key.in_(oldest)).delete(synchronize_session=False)
+                removed += trimmed
+                count -= trimmed
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            log_exception(e, "Error evicting report cache entries.")
+            return
+        finally:
+            db.close()
+
+        with self._lock:
+            self._approx_entries = count
+            self._last_sweep = now
+            self.evictions += removed
+
+    def purge(self, company_name=None):
+        """
+        Remove cached reports, either all of them or those for one company
+
+        Returns:
+            int: Number of database entries removed
+        """
+        db = self.session_factory()
+        try:
+            query = db.query(ReportCacheEntry)
+            keys = None
+            if company_name is not None:
+                query = query.filter(ReportCacheEntry.company_name == company_name)
+                keys = [key for (key,) in query.with_entities(ReportCacheEntry.key)]
+            removed = query.delete(synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        with self._lock:
+            if keys is None:
+                self._memory.clear()
+            else:
+                for key in keys:
+                    self._memory.pop(key, None)
+
+        logger.info(f"Purged {removed} report cache entries")
+        return removed
+
+    def stats(self):
+        """Return hit/miss counters and current sizes of both tiers"""
+        self.flush_access()
+        db = self.session_factory()
+        try:
+            db_entries = db.query(ReportCacheEntry).count()
+        finally:
+            db.close()
+
+        with self._lock:
+            lookups = self.memory_hits + self.db_hits + self.misses
+            return {
+                "memory_entries": len(self._memory),
+                "memory_size": self.memory_size,
+                "db_entries": db_entries,
+                "max_entries": self.max_entries,
+                "ttl_seconds": int(self.ttl.total_seconds()),
+                "memory_hits": self.memory_hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.memory_hits + self.db_hits) / lookups if lookups else 0.0
+            }
+
+# Shared report cache
+report_cache = ReportCache(
+    memory_size=Config.REPORT_CACHE_MEMORY_SIZE,
+    max_entries=Config.REPORT_CACHE_MAX_ENTRIES,
+    ttl_seconds=Config.REPORT_CACHE_TTL_SECONDS,
+    access_flush_seconds=Config.REPORT_CACHE_ACCESS_FLUSH_SECONDS,
+    sweep_seconds=Config.REPORT_CACHE_SWEEP_SECONDS
+)
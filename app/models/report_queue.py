@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import traceback
+from starlette.concurrency import run_in_threadpool
+from app.config import Config
+from app.database.database import SessionLocal
+from app.database.models import Prediction
+from app.models.predictor import generate_report, build_fallback_report
+from app.models.report_store import save_report_for
+
+logger = logging.getLogger(__name__)
+
+# Report status values stored on Prediction.report_status
+REPORT_PENDING = "pending"
+REPORT_COMPLETED = "completed"
+REPORT_FAILED = "failed"
+
+class ReportQueue:
+    """
+    In-process queue that generates LLM reports in the background
+
+    Predictions are saved with a pending report and submitted here; a fixed
+    number of worker tasks pull jobs off the queue, so at most `concurrency`
+    LLM calls run at once and bursts wait in the queue instead of holding
+    HTTP connections open.
+    """
+    def __init__(self, concurrency, max_size):
+        self.concurrency = concurrency
+        self.max_size = max_size
+        self._queue = None
+        self._workers = []
+        self.in_progress = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    @property
+    def running(self):
+        return bool(self._workers)
+
+    async def start(self):
+        """Start the worker tasks on the running event loop"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._workers = [asyncio.create_task(self._worker(i)) for i in range(self.concurrency)]
+        logger.info(f"Report queue started with {self.concurrency} workers")
+
+    async def stop(self):
+        """Cancel the worker tasks; pending jobs are picked up again on the next start"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        logger.info("Report queue stopped")
+
+    def submit(self, prediction_id, prepared, company_details):
+        """
+        Queue report generation for a saved prediction
+
+        Returns:
+            bool: False if the queue is not running or is full
+        """
+        if not self.running:
+            return False
+        try:
+            self._queue.put_nowait((prediction_id, prepared, company_details))
+            return True
+        except asyncio.QueueFull:
+            self.rejected += 1
+            logger.warning(f"Report queue full, rejected prediction {prediction_id}")
+            return False
+
+    async def _worker(self, worker_id):
+        while True:
+            prediction_id, prepared, company_details = await self._queue.get()
+            self.in_progress += 1
+            try:
+                llm_report, llm_error = await generate_report(prepared, company_details)
+                status = REPORT_FAILED if llm_error else REPORT_COMPLETED
+                await run_in_threadpool(save_report, prediction_id, llm_report, status)
+                if llm_error:
+                    self.failed += 1
+                else:
+                    self.completed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Report worker {worker_id} failed for prediction {prediction_id}: {str(e)}")
+                logger.error(traceback.format_exc())
+                # Don't leave the report pending forever
+                fallback = build_fallback_report(company_details, prepared["esg_score"], prepared["risk_probability"])
+                try:
+                    await run_in_threadpool(mark_report_failed, prediction_id, fallback)
+                except Exception as e:
+                    logger.error(f"Could not mark report of prediction {prediction_id} as failed: {str(e)}")
+            finally:
+                self.in_progress -= 1
+                self._queue.task_done()
+
+    def stats(self):
+        """Return queue depth and job counters"""
+        return {
+            "running": self.running,
+            "concurrency": self.concurrency,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "max_size": self.max_size,
+            "in_progress": self.in_progress,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected
+        }
+
+def save_report(prediction_id, llm_report, status):
+    """Store a finished report on its prediction, unless the prediction was deleted meanwhile"""
+    db = SessionLocal()
+    try:
+        if save_report_for(db, prediction_id, llm_report, status) is None:
+            logger.info(f"Prediction {prediction_id} was deleted before its report was saved")
+            return
+        db.commit()
+    finally:
+        db.close()
+
+def mark_report_failed(prediction_id, llm_report=None):
+    """
+    Mark a report that could not be generated or saved as failed
+
+    The fallback report is stored when given; if even that can't be saved,
+    only the status is updated.
+    """
+    if llm_report is not None:
+        try:
+            save_report(prediction_id, llm_report, REPORT_FAILED)
+            return
+        except Exception as e:
+            logger.error(f"Could not save fallback report of prediction {prediction_id}: {str(e)}")
+    db = SessionLocal()
+    try:
+        db.query(Prediction).filter(
+            Prediction.id == prediction_id,
+            Prediction.report_status == REPORT_PENDING
+        ).update({"report_status": REPORT_FAILED})
+        db.commit()
+    finally:
+        db.close()
+
+# Shared report queue, started with the application
+report_queue = ReportQueue(
+    concurrency=Config.REPORT_WORKER_CONCURRENCY,
+    max_size=Config.REPORT_QUEUE_MAX_SIZE
+)
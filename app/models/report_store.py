@@ -0,0 +1,494 @@
+"""
+Compressed, content-addressed storage for LLM report bodies
+
+Report markdown and its rendered HTML live in report_bodies, keyed by the
+SHA-256 of the markdown, so identical reports are stored once. Both are
+zlib-compressed with a preset dictionary: the first one is the report
+skeleton from LLM.prompt_template, and better ones can be trained from the
+stored reports. Bodies are only decompressed when a report is opened.
+
+    python -m app.models.report_store stats
+    python -m app.models.report_store train [--samples 2000] [--recompress]
+    python -m app.models.report_store migrate|rerender|gc
+
+Existing inline reports are moved here on startup (upgrade_report_storage),
+and bodies are dropped when the last prediction using them is deleted.
+"""
+import argparse
+import hashlib
+import logging
+import threading
+import zlib
+from collections import Counter
+from sqlalchemy import exists, func
+from sqlalchemy.exc import IntegrityError
+from app.database.database import SessionLocal
+from app.database.models import Prediction, ReportBody, ReportDictionary
+from app.database.upsert import upsert
+from app.models.llm import LLM
+from app.utils.report_renderer import render_markdown_to_html, RENDERER_VERSION
+
+logger = logging.getLogger(__name__)
+
+# zlib only looks back 32 KiB, so a longer dictionary is never used
+MAX_DICTIONARY_SIZE = 32 * 1024
+COMPRESSION_LEVEL = 9
+
+def report_digest(markdown_text):
+    """Content address of a report"""
+    return hashlib.sha256(markdown_text.encode("utf-8")).hexdigest()
+
+def template_dictionary():
+    """Preset dictionary from the report skeleton the LLM is asked to fill in"""
+    prompt = LLM.prompt_template("")
+    skeleton = prompt.split("**Output Format:**", 1)[-1]
+    return skeleton.encode("utf-8")[-MAX_DICTIONARY_SIZE:]
+
+def train_dictionary(samples, seed=b"", size=MAX_DICTIONARY_SIZE, min_count=2):
+    """
+    Build a preset dictionary from lines shared by many reports
+
+    Args:
+        samples (list): Report markdown texts
+        seed (bytes): Content kept at the start of the dictionary
+        size (int): Maximum dictionary size in bytes
+        min_count (int): Minimum number of reports a line must appear in
+
+    Returns:
+        bytes: Dictionary with the most common lines last, where zlib reaches them most cheaply
+    """
+    counts = Counter(
+        line for sample in samples for line in set(sample.splitlines())
+        if len(line.strip()) >= 8
+    )
+    budget = size - len(seed)
+    chosen = []
+    for line, count in counts.most_common():
+        if count < min_count:
+            break
+        encoded = (line + "\n").encode("utf-8")
+        if len(encoded) > budget:
+            break
+        chosen.append(encoded)
+        budget -= len(encoded)
+    return (seed + b"".join(reversed(chosen)))[-size:]
+
+class ReportStore:
+    """
+    Reads and writes report bodies in report_bodies
+
+    Dictionaries are immutable once written, so they are cached per version
+    in memory; new bodies use the newest version.
+    """
+    def __init__(self, level=COMPRESSION_LEVEL):
+        self.level = level
+        self._dictionaries = {}
+        self._lock = threading.Lock()
+
+    def _compress(self, data, dictionary):
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 15, 9, zlib.Z_DEFAULT_STRATEGY, dictionary)
+        return compressor.compress(data) + compressor.flush()
+
+    def _decompress(self, blob, dictionary):
+        decompressor = zlib.decompressobj(15, zdict=dictionary)
+        return decompressor.decompress(blob) + decompressor.flush()
+
+    def dictionary(self, db, version):
+        """Dictionary bytes of a version"""
+        with self._lock:
+            cached = self._dictionaries.get(version)
+        if cached is None:
+            cached = db.query(ReportDictionary.data).filter(ReportDictionary.version == version).scalar()
+            if cached is None:
+                raise LookupError(f"Report dictionary {version} not found")
+            with self._lock:
+                self._dictionaries[version] = cached
+        return cached
+
+    def current_version(self, db):
+        """Newest dictionary version, creating the template dictionary on first use"""
+        version = db.query(func.max(ReportDictionary.version)).scalar()
+        if version is None:
+            upsert(
+                db, ReportDictionary,
+                {"version": 1, "source": "template", "data": template_dictionary()},
+                [ReportDictionary.version]
+            )
+            version = 1
+        return version
+
+    def add_dictionary(self, db, data, source):
+        """Store a new dictionary version, used for bodies written from now on"""
+        version = (db.query(func.max(ReportDictionary.version)).scalar() or 0) + 1
+        db.add(ReportDictionary(version=version, source=source, data=data))
+        db.flush()
+        return version
+
+    def save(self, db, markdown_text):
+        """
+        Store a report body, unless an identical one is stored already
+
+        Joins the caller's transaction; the caller commits.
+
+        Returns:
+            tuple: (digest, rendered HTML), or (None, None) for no report
+        """
+        if markdown_text is None:
+            return None, None
+        digest = report_digest(markdown_text)
+        html = render_markdown_to_html(markdown_text)
+
+        # Writing to an existing body locks it until the caller commits, so
+        # collect_garbage can't delete it before the new reference is visible
+        pinned = (
+            db.query(ReportBody)
+            .filter(ReportBody.digest == digest)
+            .update({ReportBody.digest: ReportBody.digest}, synchronize_session=False)
+        )
+        if not pinned:
+            version = self.current_version(db)
+            dictionary = self.dictionary(db, version)
+            markdown_bytes = markdown_text.encode("utf-8")
+            html_bytes = html.encode("utf-8")
+            # A concurrent writer may store the same report first; either copy is identical
+            upsert(db, ReportBody, {
+                "digest": digest,
+                "dictionary_version": version,
+                "markdown": self._compress(markdown_bytes, dictionary),
+                "html": self._compress(html_bytes, dictionary),
+                "html_version": RENDERER_VERSION,
+                "markdown_size": len(markdown_bytes),
+                "html_size": len(html_bytes)
+            }, [ReportBody.digest])
+        return digest, html
+
+    def load_markdown(self, db, digest):
+        """Decompressed markdown of a stored report"""
+        row = db.query(ReportBody.markdown, ReportBody.dictionary_version).filter(ReportBody.digest == digest).first()
+        if row is None:
+            return None
+        return self.decompress_markdown(db, row.markdown, row.dictionary_version)
+
+    def decompress_markdown(self, db, blob, dictionary_version):
+        """Markdown from a compressed body already selected by the caller"""
+        return self._decompress(blob, self.dictionary(db, dictionary_version)).decode("utf-8")
+
+    def load_html(self, db, digest):
+        """
+        Decompressed HTML of a stored report, re-rendered if an older renderer made it
+
+        Returns:
+            tuple: (HTML string, True if the body was updated and needs a commit)
+        """
+        body = db.query(ReportBody).filter(ReportBody.digest == digest).first()
+        if body is None:
+            return "", False
+        dictionary = self.dictionary(db, body.dictionary_version)
+        if body.html_version == RENDERER_VERSION:
+            return self._decompress(body.html, dictionary).decode("utf-8"), False
+
+        html = render_markdown_to_html(self._decompress(body.markdown, dictionary).decode("utf-8"))
+        html_bytes = html.encode("utf-8")
+        body.html = self._compress(html_bytes, dictionary)
+        body.html_size = len(html_bytes)
+        body.html_version = RENDERER_VERSION
+        return html, True
+
+    def _rewrite_bodies(self, session_factory, batch_size, criteria, rewrite):
+        """Apply rewrite to bodies matching criteria, one batch per transaction"""
+        updated = 0
+        last_digest = ""
+        while True:
+            db = session_factory()
+            try:
+                bodies = (
+                    db.query(ReportBody)
+                    .filter(ReportBody.digest > last_digest, *criteria(db))
+                    .order_by(ReportBody.digest)
+                    .limit(batch_size)
+                    .all()
+                )
+                if not bodies:
+                    return updated
+                for body in bodies:
+                    rewrite(db, body)
+                last_digest = bodies[-1].digest
+                db.commit()
+            finally:
+                db.close()
+            updated += len(bodies)
+
+    def rerender_stale(self, session_factory=SessionLocal, batch_size=500):
+        """
+        Re-render the HTML of every body made by an older renderer
+
+        Returns:
+            int: Number of bodies updated
+        """
+        def rewrite(db, body):
+            dictionary = self.dictionary(db, body.dictionary_version)
+            html_bytes = render_markdown_to_html(self._decompress(body.markdown, dictionary).decode("utf-8")).encode("utf-8")
+            body.html = self._compress(html_bytes, dictionary)
+            body.html_size = len(html_bytes)
+            body.html_version = RENDERER_VERSION
+
+        return self._rewrite_bodies(
+            session_factory, batch_size,
+            lambda db: [(ReportBody.html_version.is_(None)) | (ReportBody.html_version != RENDERER_VERSION)],
+            rewrite
+        )
+
+    def recompress(self, session_factory=SessionLocal, batch_size=500):
+        """
+        Re-encode every body compressed with an older dictionary using the newest one
+
+        Returns:
+            int: Number of bodies updated
+        """
+        def rewrite(db, body):
+            old = self.dictionary(db, body.dictionary_version)
+            version = self.current_version(db)
+            new = self.dictionary(db, version)
+            body.markdown = self._compress(self._decompress(body.markdown, old), new)
+            body.html = self._compress(self._decompress(body.html, old), new)
+            body.dictionary_version = version
+
+        return self._rewrite_bodies(
+            session_factory, batch_size,
+            lambda db: [ReportBody.dictionary_version != self.current_version(db)],
+            rewrite
+        )
+
+    def train(self, session_factory=SessionLocal, samples=2000):
+        """
+        Train a dictionary on the most recent reports and make it current
+
+        Returns:
+            int: New dictionary version, or None if there are no reports to train on
+        """
+        db = session_factory()
+        try:
+            digests = [
+                digest for (digest,) in db.query(ReportBody.digest)
+                .order_by(ReportBody.created_at.desc())
+                .limit(samples)
+            ]
+            texts = [self.load_markdown(db, digest) for digest in digests]
+            if not texts:
+                return None
+            data = train_dictionary(texts, seed=template_dictionary()[:MAX_DICTIONARY_SIZE // 4])
+            version = self.add_dictionary(db, data, source=f"trained on {len(texts)} reports")
+            db.commit()
+            logger.info(f"Trained report dictionary {version} ({len(data)} bytes) on {len(texts)} reports")
+            return version
+        finally:
+            db.close()
+
+    def collect_garbage(self, db, digests=None):
+        """
+        Delete bodies no prediction refers to any more
+
+        Joins the caller's transaction; the caller commits. References are
+        checked by the DELETE itself, so a body referenced since the caller
+        looked it up is kept.
+
+        Args:
+            db: Session to run in
+            digests (iterable): Only consider these bodies, e.g. those of
+                just-deleted predictions; None checks every body
+
+        Returns:
+            int: Number of bodies deleted
+        """
+        unreferenced = ~exists().where(Prediction.report_digest == ReportBody.digest)
+        query = db.query(ReportBody).filter(unreferenced)
+        if digests is not None:
+            digests = [digest for digest in set(digests) if digest]
+            if not digests:
+                return 0
+            query = query.filter(ReportBody.digest.in_(digests))
+        try:
+            with db.begin_nested():
+                return query.delete(synchronize_session=False)
+        except IntegrityError:
+            # Where the foreign key is enforced, a reference committed while the
+            # DELETE waited fails it; the next collection picks those bodies up
+            return 0
+
+    def stats(self, db):
+        """Sizes before and after compression and deduplication"""
+        bodies, raw_bytes, stored_bytes = db.query(
+            func.count(ReportBody.digest),
+            func.coalesce(func.sum(ReportBody.markdown_size + ReportBody.html_size), 0),
+            func.coalesce(func.sum(func.length(ReportBody.markdown) + func.length(ReportBody.html)), 0)
+        ).one()
+        references, referenced_bytes = (
+            db.query(
+                func.count(Prediction.id),
+                func.coalesce(func.sum(ReportBody.markdown_size + ReportBody.html_size), 0)
+            )
+            .join(ReportBody, Prediction.report_digest == ReportBody.digest)
+            .one()
+        )
+        inline_reports = db.query(func.count(Prediction.id)).filter(Prediction.llm_response.isnot(None)).scalar()
+
+        return {
+            "bodies": bodies,
+            "references": references,
+            "inline_reports": inline_reports,
+            "dictionary_version": db.query(func.max(ReportDictionary.version)).scalar(),
+            # Bytes as if every prediction kept its own uncompressed report
+            "logical_bytes": referenced_bytes,
+            "deduplicated_bytes": raw_bytes,
+            "stored_bytes": stored_bytes,
+            "deduplication_ratio": referenced_bytes / raw_bytes if raw_bytes else 0.0,
+            "compression_ratio": raw_bytes / stored_bytes if stored_bytes else 0.0,
+            "bytes_saved": referenced_bytes - stored_bytes
+        }
+
+# Shared report store
+report_store = ReportStore()
+
+def set_report(db, prediction, markdown_text):
+    """
+    Store a report for a prediction
+
+    Returns:
+        str: Rendered HTML of the report
+    """
+    digest, html = report_store.save(db, markdown_text)
+    prediction.report_digest = digest
+    return html or ""
+
+def lock_predictions(db, *criteria):
+    """
+    Lock the matching predictions for the caller's transaction and read their reports
+
+    SQLite has no SELECT ... FOR UPDATE, so the rows are locked with an
+    UPDATE that changes nothing. A report saved concurrently is then either
+    visible in the result or waits for the caller to commit.
+
+    Returns:
+        list: (id, report_digest) of each matching prediction
+    """
+    db.query(Prediction).filter(*criteria).update(
+        {Prediction.report_status: Prediction.report_status}, synchronize_session=False
+    )
+    return db.query(Prediction.id, Prediction.report_digest).filter(*criteria).all()
+
+def save_report_for(db, prediction_id, markdown_text, status):
+    """
+    Store a report on a prediction by id, unless the prediction has been deleted
+
+    Joins the caller's transaction; the caller commits.
+
+    Returns:
+        str: Rendered HTML of the report, or None if the prediction is gone
+    """
+    if not lock_predictions(db, Prediction.id == prediction_id):
+        return None
+    digest, html = report_store.save(db, markdown_text)
+    db.query(Prediction).filter(Prediction.id == prediction_id).update(
+        {"report_digest": digest, "report_status": status}, synchronize_session=False
+    )
+    return html or ""
+
+def get_report_html(db, prediction):
+    """
+    Rendered HTML of a prediction's report
+
+    Reports still stored inline are moved to report_bodies on the way.
+
+    Returns:
+        tuple: (HTML string, True if anything was updated and needs a commit)
+    """
+    if prediction.report_digest:
+        return report_store.load_html(db, prediction.report_digest)
+    if prediction.llm_response is not None:
+        html = set_report(db, prediction, prediction.llm_response)
+        prediction.llm_response = None
+        return html, True
+    return "", False
+
+def get_report_markdown(db, prediction):
+    """Markdown of a prediction's report, or None if it has none"""
+    if prediction.report_digest:
+        return report_store.load_markdown(db, prediction.report_digest)
+    return prediction.llm_response
+
+def migrate_inline_reports(session_factory=SessionLocal, batch_size=500):
+    """
+    Move reports stored inline on predictions into report_bodies
+
+    Returns:
+        int: Number of predictions migrated
+    """
+    migrated = 0
+    while True:
+        db = session_factory()
+        try:
+            predictions = (
+                db.query(Prediction.id, Prediction.llm_response)
+                .filter(Prediction.llm_response.isnot(None), Prediction.report_digest.is_(None))
+                .order_by(Prediction.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not predictions:
+                return migrated
+            for prediction_id, markdown_text in predictions:
+                digest, _ = report_store.save(db, markdown_text)
+                db.query(Prediction).filter(Prediction.id == prediction_id).update({
+                    "report_digest": digest,
+                    "llm_response": None
+                }, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+        migrated += len(predictions)
+        logger.info(f"Moved {migrated} inline reports to report_bodies")
+
+def upgrade_report_storage(session_factory=SessionLocal):
+    """Move inline reports into the store and drop bodies no prediction uses, run at startup"""
+    migrate_inline_reports(session_factory)
+    db = session_factory()
+    try:
+        removed = report_store.collect_garbage(db)
+        db.commit()
+    finally:
+        db.close()
+    if removed:
+        logger.info(f"Deleted {removed} unreferenced report bodies")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Maintain the compressed report store")
+    parser.add_argument("command", choices=["stats", "migrate", "rerender", "train", "gc"])
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows per transaction")
+    parser.add_argument("--samples", type=int, default=2000, help="Reports to train a dictionary on")
+    parser.add_argument("--recompress", action="store_true", help="Re-encode existing bodies after training")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        print(f"Moved {migrate_inline_reports(batch_size=args.batch_size)} inline reports")
+    elif args.command == "rerender":
+        print(f"Re-rendered {report_store.rerender_stale(batch_size=args.batch_size)} reports with renderer version {RENDERER_VERSION}")
+    elif args.command == "train":
+        version = report_store.train(samples=args.samples)
+        print(f"Trained dictionary version {version}" if version else "No reports to train on")
+        if version and args.recompress:
+            print(f"Recompressed {report_store.recompress(batch_size=args.batch_size)} reports")
+    elif args.command == "gc":
+        session = SessionLocal()
+        try:
+            removed = report_store.collect_garbage(session)
+            session.commit()
+        finally:
+            session.close()
+        print(f"Deleted {removed} unreferenced reports")
+
+    session = SessionLocal()
+    try:
+        print(report_store.stats(session))
+    finally:
+        session.close()
@@ -1,15 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Form
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Form, Query
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
-from typing import List
-from datetime import datetime
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import defer, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import datetime, date, time, timedelta
+from sqlalchemy import select, or_
 import logging
 
-from app.database.database import get_db
+from app.database.database import get_async_db
 from app.database.models import User, Prediction
-from app.utils.auth import get_current_user, create_access_token, verify_password, get_password_hash
+from app.utils.auth import get_current_user, create_access_token, verify_password, get_password_hash_async
+from app.utils.password_hasher import password_hasher
+from app.utils.login_limiter import login_limiter
 from app.utils.helper import clean_text
+from app.utils.exceptions import PasswordHasherBusyError
+from app.utils.pagination import keyset_page_async
+from app.utils.export import parse_export_dates, export_writer, export_response
+from app.models.report_store import report_store, lock_predictions, get_report_html
+from app.database.summary import get_admin_summary, delete_predictions_where
+from app.config import Config
+from app.models.report_cache import report_cache
+from app.utils.user_cache import user_cache
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -19,39 +32,58 @@ templates = Jinja2Templates(directory="app/templates")
 
 async def get_current_admin(
     request: Request,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user)
 ):
-    logger.info(f"Checking admin access for user: {current_user.username}")
+    logger.debug("Checking admin access for user: %s", current_user.username)
     if not current_user.is_admin:
         logger.warning(f"User {current_user.username} attempted to access admin page without admin privileges")
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions"
         )
-    logger.info(f"Admin access granted for user: {current_user.username}")
+    logger.debug("Admin access granted for user: %s", current_user.username)
     return current_user
 
+async def hash_password(password):
+    """Hash a password on the bounded pool, answering 503 while it is saturated"""
+    try:
+        return await get_password_hash_async(password)
+    except PasswordHasherBusyError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many requests, try again shortly",
+            headers={"Retry-After": "1"},
+        )
+
 @router.get("/admin", response_class=HTMLResponse)
 async def admin_dashboard(
     request: Request,
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         logger.info(f"Admin dashboard accessed by: {current_user.username}")
-        # Get all users and sort by created_at
-        users = db.query(User).order_by(User.created_at.desc()).all()
+        # Counts and averages come from the summary tables
+        summary = await db.run_sync(get_admin_summary, active_days=Config.ADMIN_ACTIVE_USER_DAYS)
         
-        # Get all predictions and sort by created_at
-        predictions = db.query(Prediction).order_by(Prediction.created_at.desc()).all()
+        # Only the most recent users and predictions are listed
+        recent_users = (await db.execute(
+            select(User).order_by(User.created_at.desc(), User.id.desc()).limit(5)
+        )).scalars().all()
+        recent_predictions = (await db.execute(
+            select(Prediction)
+            .options(defer(Prediction.llm_response), joinedload(Prediction.user))
+            .order_by(Prediction.created_at.desc(), Prediction.id.desc())
+            .limit(5)
+        )).scalars().all()
         
         return templates.TemplateResponse(
             "admin/dashboard.html",
             {
                 "request": request,
-                "users": users,
-                "predictions": predictions,
+                "summary": summary,
+                "users": recent_users,
+                "predictions": recent_predictions,
                 "username": current_user.username
             }
         )
@@ -74,16 +106,16 @@ async def create_user(
     password: str = Form(...),
     is_admin: bool = Form(False),
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Check if user exists
-    if db.query(User).filter(User.email == email).first():
+    if (await db.execute(select(User.id).filter(User.email == email))).first():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
-    if db.query(User).filter(User.username == username).first():
+    if (await db.execute(select(User.id).filter(User.username == username))).first():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already registered"
@@ -93,13 +125,12 @@ async def create_user(
     new_user = User(
         username=username,
         email=email,
-        hashed_password=get_password_hash(password),
+        hashed_password=await hash_password(password),
         is_admin=is_admin
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
     
     return {"message": "User created successfully"}
 
@@ -112,64 +143,97 @@ async def update_user(
     is_active: bool = Form(None),
     is_admin: bool = Form(None),
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
+    previous_username = user.username
+    
     # Update user fields
     if username is not None:
         user.username = username
     if email is not None:
         user.email = email
     if password is not None:
-        user.hashed_password = get_password_hash(password)
+        user.hashed_password = await hash_password(password)
     if is_active is not None:
         user.is_active = is_active
     if is_admin is not None:
         user.is_admin = is_admin
     
-    db.commit()
+    await db.commit()
+    # Drop cached copies under both the old and the new username
+    user_cache.invalidate(previous_username, user.username)
     return {"message": "User updated successfully"}
 
 @router.delete("/admin/users/{user_id}")
 async def delete_user(
     user_id: int,
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    # Delete user's predictions first
-    db.query(Prediction).filter(Prediction.user_id == user_id).delete()
+    # Delete user's predictions first, then the report bodies only they used
+    digests = [digest for _, digest in await db.run_sync(lock_predictions, Prediction.user_id == user_id)]
+    await db.run_sync(delete_predictions_where, Prediction.user_id == user_id)
+    await db.run_sync(report_store.collect_garbage, digests)
     
     # Delete user
-    db.delete(user)
-    db.commit()
+    await db.delete(user)
+    await db.commit()
+    user_cache.invalidate(user.username)
     
     return {"message": "User deleted successfully"}
 
 @router.get("/admin/users", response_class=HTMLResponse)
 async def list_users(
     request: Request,
+    q: Optional[str] = None,
+    role: Optional[str] = None,
+    user_status: Optional[str] = Query(None, alias="status"),
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    users = db.query(User).all()
+    query = select(User)
+    if q:
+        pattern = f"%{q}%"
+        query = query.filter(or_(User.username.ilike(pattern), User.email.ilike(pattern)))
+    if role == "admin":
+        query = query.filter(User.is_admin.is_(True))
+    elif role == "user":
+        query = query.filter(User.is_admin.is_(False))
+    if user_status == "active":
+        query = query.filter(User.is_active.is_(True))
+    elif user_status == "inactive":
+        query = query.filter(User.is_active.is_(False))
+    
+    try:
+        users, next_cursor = await keyset_page_async(
+            db, query, User.created_at, User.id, cursor=cursor, limit=Config.ADMIN_PAGE_SIZE
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
     return templates.TemplateResponse(
         "admin/users.html",
         {
             "request": request,
             "users": users,
+            "filters": {"q": q or "", "role": role or "", "status": user_status or ""},
+            "next_cursor": next_cursor,
+            "is_first_page": not cursor,
             "username": current_user.username
         }
     )
@@ -177,15 +241,136 @@ async def list_users(
 @router.get("/admin/predictions", response_class=HTMLResponse)
 async def list_predictions(
     request: Request,
+    company: Optional[str] = None,
+    user: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    predictions = db.query(Prediction).all()
+    # Empty form fields arrive as empty strings
+    try:
+        date_from = date.fromisoformat(date_from) if date_from else None
+        date_to = date.fromisoformat(date_to) if date_to else None
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Dates must be in YYYY-MM-DD format")
+    
+    query = select(Prediction).options(joinedload(Prediction.user))
+    if company:
+        query = query.filter(Prediction.company_name.ilike(f"%{company}%"))
+    if user:
+        query = query.join(User, Prediction.user_id == User.id).filter(User.username == user)
+    if date_from:
+        query = query.filter(Prediction.created_at >= datetime.combine(date_from, time.min))
+    if date_to:
+        query = query.filter(Prediction.created_at < datetime.combine(date_to + timedelta(days=1), time.min))
+    
+    try:
+        predictions, next_cursor = await keyset_page_async(
+            db, query, Prediction.created_at, Prediction.id, cursor=cursor, limit=Config.ADMIN_PAGE_SIZE
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    # Decompressed report HTML, re-rendering any made by an older renderer
+    report_html = {}
+    re_rendered = False
+    for prediction in predictions:
+        report_html[prediction.id], changed = await db.run_sync(get_report_html, prediction)
+        re_rendered = re_rendered or changed
+    if re_rendered:
+        await db.commit()
+    
     return templates.TemplateResponse(
         "admin/predictions.html",
         {
             "request": request,
             "predictions": predictions,
+            "report_html": report_html,
+            "filters": {
+                "company": company or "",
+                "user": user or "",
+                "date_from": date_from.isoformat() if date_from else "",
+                "date_to": date_to.isoformat() if date_to else ""
+            },
+            "next_cursor": next_cursor,
+            "is_first_page": not cursor,
             "username": current_user.username
         }
-    ) 
\ No newline at end of file
+    )
+
+@router.get("/admin/predictions/export")
+async def export_predictions(
+    format: str = "csv",
+    company: Optional[str] = None,
+    user: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    include_reports: bool = False,
+    current_user: User = Depends(get_current_admin)
+):
+    """Stream all predictions matching the filters as CSV, NDJSON or Parquet"""
+    try:
+        date_from, date_to = parse_export_dates(date_from, date_to)
+        writer = export_writer(format, include_reports=include_reports)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    logger.info(f"Prediction export ({format}) started by {current_user.username}")
+    filters = {"username": user, "company": company, "date_from": date_from, "date_to": date_to}
+    return export_response(writer, filters, include_reports=include_reports)
+
+@router.get("/admin/summary")
+async def admin_summary(
+    days: int = Query(14, ge=1, le=366),
+    top_companies: int = Query(10, ge=1, le=100),
+    current_user: User = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Prediction and user aggregates from the summary tables"""
+    return await db.run_sync(
+        get_admin_summary, days=days, top_companies=top_companies, active_days=Config.ADMIN_ACTIVE_USER_DAYS
+    )
+
+@router.get("/admin/report-cache")
+async def report_cache_stats(
+    current_user: User = Depends(get_current_admin)
+):
+    """Report cache hit/miss counters and sizes"""
+    return await run_in_threadpool(report_cache.stats)
+
+@router.delete("/admin/report-cache")
+async def purge_report_cache(
+    company_name: Optional[str] = None,
+    current_user: User = Depends(get_current_admin)
+):
+    """Purge cached LLM reports, optionally only those for one company"""
+    removed = await run_in_threadpool(report_cache.purge, company_name=company_name)
+    logger.info(f"Report cache purged by {current_user.username}: {removed} entries")
+    return {"message": "Report cache purged", "removed": removed}
+
+@router.get("/admin/user-cache")
+async def user_cache_stats(
+    current_user: User = Depends(get_current_admin)
+):
+    """Authenticated user cache hit/miss counters and size"""
+    return user_cache.stats()
+
+@router.get("/admin/auth-stats")
+async def auth_stats(
+    current_user: User = Depends(get_current_admin)
+):
+    """Password hashing pool load and login limiter counters"""
+    return {
+        "password_hasher": password_hasher.stats(),
+        "login_limiter": login_limiter.stats()
+    }
+
+@router.get("/admin/report-storage")
+async def report_storage_stats(
+    current_user: User = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Report body storage sizes and savings from compression and deduplication"""
+    return await db.run_sync(report_store.stats)
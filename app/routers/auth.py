@@ -2,10 +2,13 @@ from fastapi import APIRouter, Depends, HTTPException, status, Request, Form, Co
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
-from app.database.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.database import get_async_db
 from app.database.models import User
-from app.utils.auth import authenticate_user, create_access_token, get_password_hash
+from app.utils.auth import authenticate_user, create_access_token, get_password_hash_async
+from app.utils.login_limiter import login_limiter
+from app.utils.exceptions import PasswordHasherBusyError
 from datetime import timedelta
 from app.config import Config
 from pydantic import BaseModel
@@ -29,15 +32,37 @@ class UserCreate(BaseModel):
 
 # Routes for API access
 @router.post("/api/token")
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login_for_access_token(request: Request, form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
     """API endpoint for token acquisition"""
-    user = authenticate_user(db, form_data.username, form_data.password)
+    client_ip = request.client.host if request.client else "unknown"
+    retry_after = await login_limiter.acquire(form_data.username, client_ip)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts",
+            headers={"Retry-After": str(int(retry_after) + 1)},
+        )
+    try:
+        user = await authenticate_user(db, form_data.username, form_data.password)
+    except PasswordHasherBusyError:
+        login_limiter.release(form_data.username, client_ip)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many login requests, try again shortly",
+            headers={"Retry-After": "1"},
+        )
+    except BaseException:
+        # Errors and cancelled requests also end the attempt unverified
+        login_limiter.release(form_data.username, client_ip)
+        raise
     if not user:
+        login_limiter.record_failure(form_data.username, client_ip)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    login_limiter.record_success(form_data.username, client_ip)
     access_token_expires = timedelta(minutes=Config.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user.username}, expires_delta=access_token_expires
@@ -45,10 +70,10 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db:
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/api/signup")
-def signup_api(user_data: UserCreate, db: Session = Depends(get_db)):
+async def signup_api(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """API endpoint for user registration"""
     # Check if username already exists
-    db_username = db.query(User).filter(User.username == user_data.username).first()
+    db_username = (await db.execute(select(User.id).filter(User.username == user_data.username))).first()
     if db_username:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -56,7 +81,7 @@ def signup_api(user_data: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Check if email already exists
-    db_email = db.query(User).filter(User.email == user_data.email).first()
+    db_email = (await db.execute(select(User.id).filter(User.email == user_data.email))).first()
     if db_email:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -64,7 +89,14 @@ def signup_api(user_data: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    try:
+        hashed_password = await get_password_hash_async(user_data.password)
+    except PasswordHasherBusyError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many requests, try again shortly",
+            headers={"Retry-After": "1"},
+        )
     new_user = User(
         username=user_data.username,
         email=user_data.email,
@@ -72,8 +104,7 @@ def signup_api(user_data: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
     
     return {"message": "User created successfully"}
 
@@ -85,23 +116,39 @@ def login_page(request: Request):
     return templates.TemplateResponse("login.html", {"request": request})
 
 @router.post("/login", response_class=HTMLResponse)
-def login(
+async def login(
     request: Request,
     username: str = Form(...),
     password: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Handle login form submission"""
+    client_ip = request.client.host if request.client else "unknown"
+    acquired = False
     try:
         logger.info(f"Login attempt for user: {username}")
-        user = authenticate_user(db, username, password)
+        if await login_limiter.acquire(username, client_ip):
+            logger.warning(f"Login attempt blocked for user: {username} from {client_ip}")
+            return templates.TemplateResponse(
+                "login.html", 
+                {"request": request, "error": "Too many failed login attempts, please try again later"},
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS
+            )
+        acquired = True
+        
+        user = await authenticate_user(db, username, password)
         if not user:
+            login_limiter.record_failure(username, client_ip)
+            acquired = False
             logger.warning(f"Failed login attempt for user: {username}")
             return templates.TemplateResponse(
                 "login.html", 
                 {"request": request, "error": "Invalid username or password"}
             )
         
+        login_limiter.record_success(username, client_ip)
+        acquired = False
+        
         # Create access token
         access_token_expires = timedelta(minutes=Config.ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
@@ -123,12 +170,23 @@ def login(
             secure=False  # Set to False for local development
         )
         return response
+    except PasswordHasherBusyError:
+        logger.warning(f"Password hashing queue full, login deferred for user: {username}")
+        return templates.TemplateResponse(
+            "login.html", 
+            {"request": request, "error": "Too many login requests, please try again shortly"},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
     except Exception as e:
         logger.error(f"Error during login: {str(e)}")
         return templates.TemplateResponse(
             "login.html", 
             {"request": request, "error": "An error occurred during login"}
         )
+    finally:
+        # A busy hasher, errors and cancelled requests end the attempt unverified
+        if acquired:
+            login_limiter.release(username, client_ip)
 
 @router.get("/signup", response_class=HTMLResponse)
 def signup_page(request: Request):
@@ -136,16 +194,16 @@ def signup_page(request: Request):
     return templates.TemplateResponse("signup.html", {"request": request})
 
 @router.post("/signup", response_class=HTMLResponse)
-def signup(
+async def signup(
     request: Request,
     username: str = Form(...),
     email: str = Form(...),
     password: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Handle signup form submission"""
     # Check if username already exists
-    db_username = db.query(User).filter(User.username == username).first()
+    db_username = (await db.execute(select(User.id).filter(User.username == username))).first()
     if db_username:
         return templates.TemplateResponse(
             "signup.html", 
@@ -153,7 +211,7 @@ def signup(
         )
     
     # Check if email already exists
-    db_email = db.query(User).filter(User.email == email).first()
+    db_email = (await db.execute(select(User.id).filter(User.email == email))).first()
     if db_email:
         return templates.TemplateResponse(
             "signup.html", 
@@ -161,7 +219,14 @@ def signup(
         )
     
     # Create new user
-    hashed_password = get_password_hash(password)
+    try:
+        hashed_password = await get_password_hash_async(password)
+    except PasswordHasherBusyError:
+        return templates.TemplateResponse(
+            "signup.html", 
+            {"request": request, "error": "Too many requests, please try again shortly"},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
     new_user = User(
         username=username,
         email=email,
@@ -169,7 +234,7 @@ def signup(
     )
     
     db.add(new_user)
-    db.commit()
+    await db.commit()
     
     # Redirect to login page
     return RedirectResponse(url="/login", status_code=status.HTTP_303_SEE_OTHER)
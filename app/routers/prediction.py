@@ -1,17 +1,31 @@
-from fastapi import APIRouter, Depends, Request, Form, HTTPException, status, Cookie
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import APIRouter, Depends, Request, Form, HTTPException, Query, status, Cookie
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.orm import defer
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel, ValidationError
 import pandas as pd
-from typing import Optional
+from typing import Optional, List
+import io
 import json
-import markdown2
+import math
+import anyio
 
-from app.database.database import get_db
+from app.database.database import get_async_db, AsyncSessionLocal
 from app.database.models import User, Prediction
 from app.utils.auth import get_current_user
-from app.models.predictor import run_prediction
-from app.utils.helper import clean_text
+from app.models.predictor import run_batch_prediction, prepare_prediction_async, generate_report, build_fallback_report
+from app.models.report_queue import report_queue, mark_report_failed, REPORT_PENDING, REPORT_COMPLETED, REPORT_FAILED
+from app.models.llm import LLM
+from app.utils.exceptions import APIError
+from app.utils.company_catalog import CompanyCatalog
+from app.utils.data_snapshot import load_company_data
+from app.utils.pagination import keyset_page_async
+from app.utils.export import parse_export_dates, export_writer, export_response
+from app.utils.helper import utc_isoformat
+from app.models.report_store import report_store, set_report, save_report_for, lock_predictions, get_report_html
 from app.config import Config
 
 router = APIRouter(tags=["Prediction"])
@@ -21,44 +35,50 @@ templates = Jinja2Templates(directory="app/templates")
 
 # Cache for company data
 companies_df = None
+company_catalog = None
+
+# Models
+class BatchPredictionRow(BaseModel):
+    company_name: str
+    impact_area_community: float
+    impact_area_environment: float
+    impact_area_customers: float
+    impact_area_governance: float
+    certification_cycle: int
+
+IMPACT_FIELDS = (
+    "impact_area_community", "impact_area_environment", "impact_area_customers", "impact_area_governance"
+)
+
+class BatchPredictionRequest(BaseModel):
+    rows: List[BatchPredictionRow]
+    generate_reports: bool = False
 
 def get_company_data():
-    """Get company data from CSV file and cache it"""
+    """Get company data from the binary snapshot (rebuilt from the source when stale) and cache it"""
     global companies_df
     if companies_df is None:
-        companies_df = pd.read_csv(Config.DATA_PATH)
+        companies_df = load_company_data(Config.DATA_PATH, Config.SNAPSHOT_PATH)
     return companies_df
 
-def render_markdown_to_html(markdown_text):
-    """Convert markdown text to HTML"""
-    if not markdown_text:
-        return ""
-    
-    # Add extra extensions for better rendering
-    html = markdown2.markdown(
-        markdown_text,
-        extras=[
-            "tables",
-            "break-on-newline",
-            "cuddled-lists",
-            "fenced-code-blocks"
-        ]
-    )
-    return html
+def get_company_catalog():
+    """Get the company catalog built from the cached company data"""
+    global company_catalog
+    if company_catalog is None:
+        company_catalog = CompanyCatalog(get_company_data())
+    return company_catalog
 
 @router.get("/home", response_class=HTMLResponse)
-async def home(request: Request, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def home(request: Request, current_user: User = Depends(get_current_user)):
     """Home page with prediction form"""
-    # Get company data
+    # Company names are fetched through the search API, only make sure data is available
     try:
-        df = get_company_data()
-        companies = df["company_name"].unique().tolist()
+        get_company_catalog()
         
         return templates.TemplateResponse(
             "home.html", 
             {
                 "request": request, 
-                "companies": companies,
                 "username": current_user.username
             }
         )
@@ -68,11 +88,32 @@ async def home(request: Request, db: Session = Depends(get_db), current_user: Us
             {
                 "request": request,
                 "error": f"Error loading company data: {str(e)}",
-                "companies": [],
                 "username": current_user.username
             }
         )
 
+def format_sse(event, data):
+    """Format a Server-Sent Events message with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.get("/api/companies/search")
+async def search_companies(
+    q: str = "",
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_user)
+):
+    """API endpoint for company name typeahead search"""
+    results, has_more = get_company_catalog().search(q, limit=limit, offset=offset)
+    
+    return {
+        "query": q,
+        "results": results,
+        "offset": offset,
+        "limit": limit,
+        "next_offset": offset + limit if has_more else None
+    }
+
 @router.get("/api/company/{company_name}")
 async def get_company_details(
     company_name: str, 
@@ -80,20 +121,11 @@ async def get_company_details(
     current_user: User = Depends(get_current_user)
 ):
     """API endpoint to get company details"""
-    df = get_company_data()
-    company = df[df['company_name'] == company_name]
+    company_data = get_company_catalog().get(company_name)
     
-    if company.empty:
+    if company_data is None:
         raise HTTPException(status_code=404, detail="Company not found")
     
-    # Convert to dict
-    company_data = company.iloc[0].to_dict()
-    
-    # Clean text fields
-    for field in ['description', 'products_and_services']:
-        if field in company_data:
-            company_data[field] = clean_text(company_data[field])
-    
     return company_data
 
 @router.post("/predict", response_class=HTMLResponse)
@@ -105,27 +137,19 @@ async def predict(
     impact_area_customers: float = Form(...),
     impact_area_governance: float = Form(...),
     certification_cycle: int = Form(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Handle prediction form submission"""
     try:
         # Get company details
-        df = get_company_data()
-        company = df[df['company_name'] == company_name]
+        company_details = get_company_catalog().get(company_name)
         
-        if company.empty:
+        if company_details is None:
             raise HTTPException(status_code=404, detail="Company not found")
         
-        company_details = company.iloc[0].to_dict()
-        
-        # Clean text fields
-        for field in ['description', 'products_and_services']:
-            if field in company_details:
-                company_details[field] = clean_text(company_details[field])
-        
-        # Run prediction
-        result = run_prediction(
+        # Run the numeric part of the prediction, the report is generated in the background
+        prepared = await prepare_prediction_async(
             impact_area_community=impact_area_community,
             impact_area_environment=impact_area_environment,
             impact_area_customers=impact_area_customers,
@@ -134,7 +158,7 @@ async def predict(
             company_details=company_details
         )
         
-        # Save prediction to database
+        # Save prediction to database with a pending report
         new_prediction = Prediction(
             user_id=current_user.id,
             company_name=company_name,
@@ -143,25 +167,37 @@ async def predict(
             impact_area_customers=impact_area_customers,
             impact_area_governance=impact_area_governance,
             certification_cycle=certification_cycle,
-            esg_score=result["esg_score"],
-            risk_probability=result["risk_probability"],
-            llm_response=result["llm_report"]
+            esg_score=prepared["esg_score"],
+            risk_probability=prepared["risk_probability"],
+            model_version=prepared["model_version"],
+            report_status=REPORT_PENDING
         )
         
         db.add(new_prediction)
-        db.commit()
-        db.refresh(new_prediction)
+        await db.commit()
+        
+        llm_report_html = ""
+        llm_error = None
+        if not report_queue.submit(new_prediction.id, prepared, company_details):
+            # Queue unavailable or full, generate the report inline
+            llm_report, llm_error = await generate_report(prepared, company_details)
+            llm_report_html = await db.run_sync(set_report, new_prediction, llm_report)
+            new_prediction.report_status = REPORT_FAILED if llm_error else REPORT_COMPLETED
+            await db.commit()
         
         # Return page with result
         return templates.TemplateResponse(
             "result.html", 
             {
                 "request": request,
+                "prediction_id": new_prediction.id,
+                "report_status": new_prediction.report_status,
                 "company_name": company_name,
-                "esg_score": result["esg_score"],
-                "risk_probability": result["risk_probability"],
-                "llm_report": render_markdown_to_html(result["llm_report"]),
-                "llm_error": result.get("llm_error"),
+                "esg_score": prepared["esg_score"],
+                "risk_probability": prepared["risk_probability"],
+                "model_version": prepared["model_version"],
+                "llm_report": llm_report_html,
+                "llm_error": llm_error,
                 "username": current_user.username
             }
         )
@@ -171,36 +207,334 @@ async def predict(
             {
                 "request": request,
                 "error": f"Prediction error: {str(e)}",
-                "companies": get_company_data()["company_name"].unique().tolist(),
+                "company_name": company_name,
                 "username": current_user.username
             }
         )
 
+@router.post("/predict/stream")
+async def predict_stream(
+    request: Request,
+    company_name: str = Form(...),
+    impact_area_community: float = Form(...),
+    impact_area_environment: float = Form(...),
+    impact_area_customers: float = Form(...),
+    impact_area_governance: float = Form(...),
+    certification_cycle: int = Form(...),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Streaming variant of /predict using Server-Sent Events
+    
+    Sends a "scores" event with the ESG score and risk probability right away,
+    then "token" events as the report is generated, and a final "done" event
+    with the rendered HTML once the report has been saved.
+    """
+    company_details = get_company_catalog().get(company_name)
+    
+    if company_details is None:
+        raise HTTPException(status_code=404, detail="Company not found")
+    
+    try:
+        prepared = await prepare_prediction_async(
+            impact_area_community=impact_area_community,
+            impact_area_environment=impact_area_environment,
+            impact_area_customers=impact_area_customers,
+            impact_area_governance=impact_area_governance,
+            certification_cycle=certification_cycle,
+            company_details=company_details
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+    
+    # Save the prediction now, the report is filled in when the stream completes
+    new_prediction = Prediction(
+        user_id=current_user.id,
+        company_name=company_name,
+        impact_area_community=impact_area_community,
+        impact_area_environment=impact_area_environment,
+        impact_area_customers=impact_area_customers,
+        impact_area_governance=impact_area_governance,
+        certification_cycle=certification_cycle,
+        esg_score=prepared["esg_score"],
+        risk_probability=prepared["risk_probability"],
+        model_version=prepared["model_version"],
+        report_status=REPORT_PENDING
+    )
+    db.add(new_prediction)
+    await db.commit()
+    prediction_id = new_prediction.id
+    
+    async def event_stream():
+        yield format_sse("scores", {
+            "prediction_id": prediction_id,
+            "company_name": company_name,
+            "esg_score": prepared["esg_score"],
+            "risk_probability": prepared["risk_probability"],
+            "model_version": prepared["model_version"]
+        })
+        
+        chunks = []
+        llm_error = None
+        try:
+            try:
+                llm = LLM()
+            except Exception as e:
+                llm = None
+                llm_error = str(e)
+            
+            if llm is None:
+                report = build_fallback_report(company_details, prepared["esg_score"], prepared["risk_probability"])
+                chunks.append(report)
+                yield format_sse("token", {"text": report})
+            else:
+                try:
+                    async for text in llm.astream(
+                        result=prepared["result_for_llm"],
+                        cache_key=prepared["cache_key"],
+                        company_name=company_name
+                    ):
+                        chunks.append(text)
+                        yield format_sse("token", {"text": text})
+                except APIError as e:
+                    # Raised only when the mock fallback is disabled
+                    llm_error = str(e)
+                    report = build_fallback_report(company_details, prepared["esg_score"], prepared["risk_probability"])
+                    chunks.append(report)
+                    yield format_sse("token", {"text": report})
+        finally:
+            # Persist whatever was generated, even if the client went away and the stream is cancelled
+            with anyio.CancelScope(shield=True):
+                report_html = await save_streamed_report(prediction_id, "".join(chunks), llm_error)
+        
+        yield format_sse("done", {
+            "prediction_id": prediction_id,
+            "llm_report": report_html,
+            "llm_error": llm_error
+        })
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def save_streamed_report(prediction_id, report, llm_error):
+    """Store a streamed report on its prediction and return the rendered HTML"""
+    async with AsyncSessionLocal() as session:
+        report_html = await session.run_sync(
+            save_report_for, prediction_id, report, REPORT_FAILED if llm_error else REPORT_COMPLETED
+        )
+        await session.commit()
+    return report_html or ""
+
+async def parse_batch_request(request: Request):
+    """Parse a batch prediction request sent as JSON or CSV"""
+    content_type = request.headers.get("content-type", "")
+    
+    if content_type.startswith("multipart/form-data"):
+        # CSV uploaded through a form
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None:
+            raise HTTPException(status_code=400, detail="Missing CSV file upload")
+        csv_bytes = await upload.read()
+        generate_reports = str(form.get("generate_reports", "false")).lower() in ("1", "true", "yes", "on")
+    elif content_type.startswith("text/csv"):
+        csv_bytes = await request.body()
+        generate_reports = request.query_params.get("generate_reports", "false").lower() in ("1", "true", "yes", "on")
+    else:
+        try:
+            return BatchPredictionRequest(**await request.json())
+        except (ValueError, ValidationError) as e:
+            raise HTTPException(status_code=422, detail=f"Invalid batch request: {str(e)}")
+    
+    try:
+        rows_df = pd.read_csv(io.BytesIO(csv_bytes))
+        rows = [BatchPredictionRow(**row) for row in rows_df.to_dict(orient="records")]
+    except (ValueError, ValidationError) as e:
+        raise HTTPException(status_code=422, detail=f"Invalid CSV: {str(e)}")
+    
+    return BatchPredictionRequest(rows=rows, generate_reports=generate_reports)
+
+@router.post("/api/predict/batch")
+async def predict_batch(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """API endpoint to score many companies in one request (JSON or CSV)"""
+    batch = await parse_batch_request(request)
+    
+    if not batch.rows:
+        raise HTTPException(status_code=400, detail="No rows to predict")
+    max_rows = Config.BATCH_MAX_REPORT_ROWS if batch.generate_reports else Config.BATCH_MAX_ROWS
+    if len(batch.rows) > max_rows:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {max_rows} rows per batch{' with reports' if batch.generate_reports else ''}"
+        )
+    
+    catalog = get_company_catalog()
+    company_details_list = []
+    for index, row in enumerate(batch.rows):
+        # float() accepts "nan" and "inf", and empty CSV cells are read as NaN
+        invalid = [field for field in IMPACT_FIELDS if not math.isfinite(getattr(row, field))]
+        if invalid:
+            raise HTTPException(status_code=422, detail=f"Row {index + 1}: {', '.join(invalid)} must be a finite number")
+        company_details = catalog.get(row.company_name)
+        if company_details is None:
+            raise HTTPException(status_code=404, detail=f"Company not found: {row.company_name}")
+        company_details_list.append(company_details)
+    
+    rows = [row.model_dump() for row in batch.rows]
+    results = await run_in_threadpool(
+        run_batch_prediction,
+        rows,
+        company_details_list,
+        generate_reports=batch.generate_reports
+    )
+    
+    # Save all predictions in one transaction
+    new_predictions = [
+        Prediction(
+            user_id=current_user.id,
+            company_name=row["company_name"],
+            impact_area_community=row["impact_area_community"],
+            impact_area_environment=row["impact_area_environment"],
+            impact_area_customers=row["impact_area_customers"],
+            impact_area_governance=row["impact_area_governance"],
+            certification_cycle=row["certification_cycle"],
+            esg_score=result["esg_score"],
+            risk_probability=result["risk_probability"],
+            model_version=result["model_version"],
+            report_status=REPORT_PENDING if batch.generate_reports else REPORT_COMPLETED
+        )
+        for row, result in zip(rows, results)
+    ]
+    
+    try:
+        db.add_all(new_predictions)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error saving predictions: {str(e)}")
+    
+    # Reports are generated in the background, clients poll /api/prediction/{id}/status
+    report_statuses = [prediction.report_status for prediction in new_predictions]
+    if batch.generate_reports:
+        for index, (prediction, result, company_details) in enumerate(zip(new_predictions, results, company_details_list)):
+            if not report_queue.submit(prediction.id, result, company_details):
+                report_statuses[index] = REPORT_FAILED
+                fallback = build_fallback_report(company_details, result["esg_score"], result["risk_probability"])
+                await run_in_threadpool(mark_report_failed, prediction.id, fallback)
+    
+    return {
+        "count": len(new_predictions),
+        "predictions": [
+            {
+                "id": prediction.id,
+                "company_name": prediction.company_name,
+                "esg_score": prediction.esg_score,
+                "risk_probability": prediction.risk_probability,
+                "model_version": prediction.model_version,
+                "report_status": report_status
+            }
+            for prediction, report_status in zip(new_predictions, report_statuses)
+        ]
+    }
+
+async def get_prediction_page(db, user_id, cursor=None, limit=Config.DASHBOARD_PAGE_SIZE):
+    """
+    One page of a user's predictions, newest first, without the report bodies
+    
+    Returns:
+        tuple: (list of Prediction, cursor for the next page or None)
+    """
+    statement = (
+        select(Prediction)
+        .options(defer(Prediction.llm_response))
+        .filter(Prediction.user_id == user_id)
+    )
+    return await keyset_page_async(db, statement, Prediction.created_at, Prediction.id, cursor=cursor, limit=limit)
+
+def prediction_summary(prediction):
+    """Dashboard row fields of a prediction"""
+    return {
+        "id": prediction.id,
+        "company_name": prediction.company_name,
+        "esg_score": prediction.esg_score,
+        "risk_probability": prediction.risk_probability,
+        "model_version": prediction.model_version,
+        "report_status": prediction.report_status or REPORT_COMPLETED,
+        "created_at": utc_isoformat(prediction.created_at),
+        # Same format and timezone as the server-rendered first page
+        "created_at_display": prediction.created_at.strftime('%Y-%m-%d %H:%M') if prediction.created_at else ""
+    }
+
 @router.get("/dashboard", response_class=HTMLResponse)
-async def dashboard(request: Request, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    """User dashboard showing prediction history"""
-    # Get user's predictions
-    predictions = db.query(Prediction).filter(Prediction.user_id == current_user.id).order_by(Prediction.created_at.desc()).all()
+async def dashboard(request: Request, db: AsyncSession = Depends(get_async_db), current_user: User = Depends(get_current_user)):
+    """User dashboard showing the first page of the prediction history"""
+    predictions, next_cursor = await get_prediction_page(db, current_user.id)
     
     return templates.TemplateResponse(
         "dashboard.html", 
         {
             "request": request,
             "predictions": predictions,
+            "next_cursor": next_cursor,
             "username": current_user.username
         }
     )
 
+@router.get("/api/predictions")
+async def list_predictions_page(
+    cursor: Optional[str] = None,
+    limit: int = Query(Config.DASHBOARD_PAGE_SIZE, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """API endpoint for further pages of the prediction history"""
+    try:
+        predictions, next_cursor = await get_prediction_page(db, current_user.id, cursor=cursor, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {
+        "predictions": [prediction_summary(prediction) for prediction in predictions],
+        "next_cursor": next_cursor
+    }
+
+@router.get("/api/predictions/export")
+async def export_my_predictions(
+    format: str = "csv",
+    company: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    include_reports: bool = False,
+    current_user: User = Depends(get_current_user)
+):
+    """Stream the user's predictions matching the filters as CSV, NDJSON or Parquet"""
+    try:
+        date_from, date_to = parse_export_dates(date_from, date_to)
+        writer = export_writer(format, include_reports=include_reports)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    filters = {"user_id": current_user.id, "company": company, "date_from": date_from, "date_to": date_to}
+    return export_response(writer, filters, include_reports=include_reports, name=f"predictions-{current_user.username}")
+
 @router.delete("/api/prediction/{prediction_id}")
 async def delete_prediction(
     prediction_id: int,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """API endpoint to delete a prediction"""
     # Get prediction
-    prediction = db.query(Prediction).filter(Prediction.id == prediction_id).first()
+    prediction = await db.get(Prediction, prediction_id)
     
     if not prediction:
         raise HTTPException(status_code=404, detail="Prediction not found")
@@ -209,9 +543,13 @@ async def delete_prediction(
     if prediction.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to delete this prediction")
     
-    # Delete prediction
-    db.delete(prediction)
-    db.commit()
+    # Delete prediction, and its report body if no other prediction shares it.
+    # The digest is read under the row lock, in case a report was saved since the load
+    digests = [digest for _, digest in await db.run_sync(lock_predictions, Prediction.id == prediction_id)]
+    await db.delete(prediction)
+    await db.flush()
+    await db.run_sync(report_store.collect_garbage, digests)
+    await db.commit()
     
     return {"message": "Prediction deleted successfully"}
 
@@ -219,12 +557,12 @@ async def delete_prediction(
 async def get_prediction_details(
     prediction_id: int,
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """API endpoint to get prediction details"""
     # Get prediction
-    prediction = db.query(Prediction).filter(Prediction.id == prediction_id).first()
+    prediction = await db.get(Prediction, prediction_id)
     
     if not prediction:
         raise HTTPException(status_code=404, detail="Prediction not found")
@@ -233,6 +571,11 @@ async def get_prediction_details(
     if prediction.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to view this prediction")
     
+    # Stored HTML, re-rendered once if an older renderer produced it
+    report_html, re_rendered = await db.run_sync(get_report_html, prediction)
+    if re_rendered:
+        await db.commit()
+    
     # Convert to dict
     prediction_data = {
         "id": prediction.id,
@@ -244,8 +587,39 @@ async def get_prediction_details(
         "certification_cycle": prediction.certification_cycle,
         "esg_score": prediction.esg_score,
         "risk_probability": prediction.risk_probability,
-        "llm_response": render_markdown_to_html(prediction.llm_response),
-        "created_at": prediction.created_at.isoformat()
+        "model_version": prediction.model_version,
+        "llm_response": report_html,
+        "report_status": prediction.report_status or REPORT_COMPLETED,
+        "created_at": utc_isoformat(prediction.created_at)
     }
     
-    return prediction_data 
\ No newline at end of file
+    return prediction_data
+
+@router.get("/api/prediction/{prediction_id}/status")
+async def get_prediction_status(
+    prediction_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """API endpoint to poll the report generation status of a prediction"""
+    prediction = await db.get(Prediction, prediction_id)
+    
+    if not prediction:
+        raise HTTPException(status_code=404, detail="Prediction not found")
+    
+    if prediction.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized to view this prediction")
+    
+    report_status = prediction.report_status or REPORT_COMPLETED
+    
+    report_html = None
+    if report_status != REPORT_PENDING:
+        report_html, re_rendered = await db.run_sync(get_report_html, prediction)
+        if re_rendered:
+            await db.commit()
+    
+    return {
+        "id": prediction.id,
+        "report_status": report_status,
+        "llm_response": report_html
+    } 
\ No newline at end of file
@@ -0,0 +1,134 @@
+import bisect
+import logging
+import re
+import pandas as pd
+from app.utils.helper import clean_text
+
+logger = logging.getLogger(__name__)
+
+# Text fields that are cleaned before being served
+CLEANED_FIELDS = ['description', 'products_and_services']
+
+# Splits company names into searchable tokens
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+def fold(text):
+    """Case-fold text for case-insensitive matching"""
+    return text.casefold().strip()
+
+class CompanyCatalog:
+    """
+    In-memory index of company records keyed by company name.
+
+    Built once when the company data is loaded so that request handlers get
+    O(1) lookups instead of scanning the data on every request. Only the
+    names are decoded up front; a company's record is decoded and cleaned
+    the first time it is requested.
+    """
+    def __init__(self, table):
+        self._table = table
+        self._rows = {}
+        self._records = {}
+
+        # Keep the first row for each company, as the DataFrame lookups did
+        names = table.column("company_name")
+        for i in range(len(table)):
+            name = names[i]
+            if name is None or (not isinstance(name, str) and pd.isna(name)):
+                continue
+            self._rows.setdefault(str(name), i)
+
+        self.names = sorted(self._rows)
+        self._build_prefix_index()
+        logger.info(f"Company catalog built with {len(self.names)} companies")
+
+    def _load_record(self, i):
+        """Decode and clean one row of the company data"""
+        record = self._table.row(i)
+        for key, value in record.items():
+            # Missing values are served as null instead of NaN
+            if not isinstance(value, str) and pd.isna(value):
+                record[key] = None
+        for field in CLEANED_FIELDS:
+            if record.get(field) is not None:
+                record[field] = clean_text(record[field])
+        return record
+
+    def _build_prefix_index(self):
+        """Build sorted arrays of folded names and name tokens for prefix search"""
+        name_entries = sorted((fold(name), i) for i, name in enumerate(self.names))
+        self._name_keys = [key for key, _ in name_entries]
+        self._name_ids = [i for _, i in name_entries]
+
+        token_entries = sorted({
+            (token, i)
+            for i, name in enumerate(self.names)
+            for token in TOKEN_PATTERN.findall(fold(name))
+        })
+        self._token_keys = [key for key, _ in token_entries]
+        self._token_ids = [i for _, i in token_entries]
+
+    @staticmethod
+    def _prefix_range(keys, prefix):
+        """Return the slice of a sorted key list that starts with prefix"""
+        start = bisect.bisect_left(keys, prefix)
+        end = bisect.bisect_left(keys, prefix + "\U0010ffff", lo=start)
+        return start, end
+
+    def search(self, query, limit=20, offset=0):
+        """
+        Find companies by name prefix
+
+        Names starting with the query come first, followed by names where
+        any word starts with the query. Matching is case-insensitive.
+
+        Args:
+            query (str): Search text
+            limit (int): Maximum number of results to return
+            offset (int): Number of matches to skip, for pagination
+
+        Returns:
+            tuple: (list of matching names, whether more matches exist)
+        """
+        prefix = fold(query)
+        if not prefix:
+            return self.names[offset:offset + limit], offset + limit < len(self.names)
+
+        wanted = offset + limit + 1
+        seen = set()
+        matches = []
+
+        start, end = self._prefix_range(self._name_keys, prefix)
+        for i in self._name_ids[start:min(end, start + wanted)]:
+            seen.add(i)
+            matches.append(i)
+
+        # Token matches are only needed for multi-word names or a later page
+        if len(matches) < wanted:
+            start, end = self._prefix_range(self._token_keys, prefix)
+            for pos in range(start, end):
+                i = self._token_ids[pos]
+                if i not in seen:
+                    seen.add(i)
+                    matches.append(i)
+                    if len(matches) >= wanted:
+                        break
+
+        page = matches[offset:offset + limit]
+        return [self.names[i] for i in page], len(matches) > offset + limit
+
+    def get(self, company_name):
+        """Return the company record (shared, treat as read-only), or None if unknown"""
+        record = self._records.get(company_name)
+        if record is None:
+            i = self._rows.get(company_name)
+            if i is None:
+                return None
+            record = self._records[company_name] = self._load_record(i)
+        return record
+
+    def __contains__(self, company_name):
+        return company_name in self._rows
+
+    def __len__(self):
+        return len(self._rows)
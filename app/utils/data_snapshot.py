@@ -0,0 +1,261 @@
+"""
+Columnar binary snapshot of the company dataset.
+
+The source spreadsheet/CSV is compiled into a directory of ``.npy`` arrays
+(one per numeric or datetime column, plus a UTF-8 string table with byte
+offsets for text columns) and a ``manifest.json``. Arrays are loaded with memory mapping
+and text values are only decoded when they are read, so a cold start does not pay
+for parsing the source file. The manifest records
+the source file's path, size, mtime and SHA-256 hash, so stale snapshots are
+rebuilt automatically, including snapshots compiled from a file other than
+DATA_PATH.
+
+Usage:
+    python -m app.utils.data_snapshot --source data/final_processed_dataset.xlsx
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 2
+MANIFEST_NAME = "manifest.json"
+
+def file_hash(path):
+    """Return the SHA-256 hex digest of a file's contents"""
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+def source_signature(path):
+    """Return (size, mtime) of a file, a cheap first check before hashing it"""
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+class TextColumn:
+    """Text column backed by a UTF-8 buffer and byte offsets, decoded one value at a time"""
+    def __init__(self, data, offsets, nulls):
+        self._data = data
+        self._offsets = offsets
+        self._nulls = nulls
+
+    def __len__(self):
+        return len(self._nulls)
+
+    def __getitem__(self, i):
+        if self._nulls[i]:
+            return None
+        return self._data[self._offsets[i]:self._offsets[i + 1]].tobytes().decode("utf-8")
+
+class SnapshotTable:
+    """
+    Rows of the company dataset, read column by column
+
+    Numeric and datetime columns are (memory-mapped) arrays and text columns
+    are TextColumns, so nothing is decoded until a row or column is read.
+    """
+    def __init__(self, columns, row_count):
+        self._columns = columns
+        self.row_count = row_count
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """Wrap an already parsed DataFrame"""
+        return cls({str(name): df[name].to_numpy() for name in df.columns}, len(df))
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    def column(self, name):
+        """Return a column as an indexable sequence"""
+        return self._columns[name]
+
+    def row(self, i):
+        """
+        Decode one row
+
+        Returns:
+            dict: Column name to value, with numpy scalars converted to Python
+                  values and datetimes to pandas Timestamps
+        """
+        record = {}
+        for name, column in self._columns.items():
+            value = column[i]
+            if isinstance(value, np.datetime64):
+                value = pd.Timestamp(value)
+            elif isinstance(value, np.generic):
+                value = value.item()
+            record[name] = value
+        return record
+
+    def __len__(self):
+        return self.row_count
+
+def read_source(source_path):
+    """Parse the source dataset (CSV or Excel) into a DataFrame"""
+    if source_path.lower().endswith((".xlsx", ".xls")):
+        return pd.read_excel(source_path)
+    return pd.read_csv(source_path)
+
+def compile_snapshot(source_path, snapshot_path):
+    """
+    Compile the source dataset into a binary snapshot directory
+
+    Args:
+        source_path (str): Path to the source CSV or Excel file
+        snapshot_path (str): Directory to write the snapshot to
+
+    Returns:
+        dict: The snapshot manifest
+    """
+    start = time.perf_counter()
+    df = read_source(source_path)
+
+    tmp_path = f"{snapshot_path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    columns = []
+    for i, name in enumerate(df.columns):
+        series = df[name]
+        base = f"col_{i}"
+        if pd.api.types.is_datetime64_any_dtype(series) or pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            np.save(os.path.join(tmp_path, f"{base}.npy"), series.to_numpy())
+            columns.append({"name": str(name), "kind": "array", "file": f"{base}.npy"})
+        else:
+            # Text column: one contiguous UTF-8 buffer plus byte offsets and a null mask
+            nulls = series.isna().to_numpy()
+            values = [b"" if is_null else str(value).encode("utf-8") for value, is_null in zip(series.tolist(), nulls)]
+            offsets = np.zeros(len(values) + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum([len(value) for value in values])
+            np.save(os.path.join(tmp_path, f"{base}.data.npy"), np.frombuffer(b"".join(values), dtype=np.uint8))
+            np.save(os.path.join(tmp_path, f"{base}.offsets.npy"), offsets)
+            np.save(os.path.join(tmp_path, f"{base}.nulls.npy"), nulls)
+            columns.append({"name": str(name), "kind": "text", "file": base})
+
+    source_size, source_mtime = source_signature(source_path)
+    manifest = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "source_path": os.path.abspath(source_path),
+        "source_size": source_size,
+        "source_mtime_ns": source_mtime,
+        "source_hash": file_hash(source_path),
+        "row_count": len(df),
+        "columns": columns,
+        "created_at": time.time()
+    }
+    with open(os.path.join(tmp_path, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    # Swap the finished snapshot into place
+    shutil.rmtree(snapshot_path, ignore_errors=True)
+    os.replace(tmp_path, snapshot_path)
+
+    logger.info(f"Compiled snapshot of {len(df)} rows from {source_path} in {time.perf_counter() - start:.2f}s")
+    return manifest
+
+def read_manifest(snapshot_path):
+    """Return the snapshot manifest, or None if there is no usable snapshot"""
+    manifest_path = os.path.join(snapshot_path, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return None
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable snapshot manifest {manifest_path}: {str(e)}")
+        return None
+    if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        return None
+    return manifest
+
+def load_snapshot(snapshot_path, manifest=None):
+    """Load a snapshot directory into a SnapshotTable of memory-mapped arrays"""
+    start = time.perf_counter()
+    manifest = manifest or read_manifest(snapshot_path)
+    if manifest is None:
+        raise FileNotFoundError(f"No valid snapshot found at {snapshot_path}")
+
+    data = {}
+    for column in manifest["columns"]:
+        base = os.path.join(snapshot_path, column["file"])
+        if column["kind"] == "array":
+            data[column["name"]] = np.load(base, mmap_mode="r")
+        else:
+            data[column["name"]] = TextColumn(
+                np.load(f"{base}.data.npy", mmap_mode="r"),
+                np.load(f"{base}.offsets.npy", mmap_mode="r"),
+                np.load(f"{base}.nulls.npy", mmap_mode="r")
+            )
+
+    table = SnapshotTable(data, manifest["row_count"])
+    logger.info(f"Loaded snapshot of {len(table)} rows in {(time.perf_counter() - start) * 1000:.1f}ms")
+    return table
+
+def snapshot_is_current(manifest, source_path):
+    """
+    Whether a snapshot was compiled from the current contents of source_path
+
+    Size and mtime are compared first; the file is only hashed when they
+    differ, so a touched but unchanged file doesn't force a rebuild.
+    """
+    if manifest is None:
+        return False
+    if (manifest.get("source_size"), manifest.get("source_mtime_ns")) == source_signature(source_path):
+        return True
+    return manifest.get("source_hash") == file_hash(source_path)
+
+def load_company_data(source_path=None, snapshot_path=None):
+    """
+    Load the company dataset as a SnapshotTable, preferring an up-to-date
+    binary snapshot
+
+    The snapshot is rebuilt from the source when it is missing or when the
+    source file has changed. Without an explicit source, DATA_PATH is used,
+    or the file the snapshot was compiled from if DATA_PATH doesn't exist.
+    If no source file is available, an existing snapshot is used as is.
+    """
+    snapshot_path = snapshot_path or Config.SNAPSHOT_PATH
+    manifest = read_manifest(snapshot_path)
+    if source_path is None:
+        source_path = Config.DATA_PATH
+        if not os.path.exists(source_path) and manifest and os.path.exists(manifest.get("source_path") or ""):
+            source_path = manifest["source_path"]
+
+    if not os.path.exists(source_path):
+        if manifest is None:
+            raise FileNotFoundError(f"Company data not found: {source_path}")
+        logger.warning(f"Source {source_path} not found, using existing snapshot")
+        return load_snapshot(snapshot_path, manifest)
+
+    if not snapshot_is_current(manifest, source_path):
+        logger.info(f"Snapshot missing or stale, rebuilding from {source_path}")
+        try:
+            manifest = compile_snapshot(source_path, snapshot_path)
+        except OSError as e:
+            # Read-only deployments can still serve straight from the source
+            logger.warning(f"Could not write snapshot, reading source directly: {str(e)}")
+            return SnapshotTable.from_dataframe(read_source(source_path))
+
+    return load_snapshot(snapshot_path, manifest)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Compile the company dataset into a binary snapshot")
+    parser.add_argument("--source", default=Config.DATA_PATH, help="Source CSV or Excel file")
+    parser.add_argument("--output", default=Config.SNAPSHOT_PATH, help="Snapshot directory")
+    args = parser.parse_args()
+
+    result = compile_snapshot(args.source, args.output)
+    print(f"Snapshot written to {args.output} ({result['row_count']} rows, source hash {result['source_hash'][:12]})")
@@ -1,16 +1,6 @@
 import traceback
 import logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("app.log"),
-        logging.StreamHandler()
-    ]
-)
-
 logger = logging.getLogger(__name__)
 
 # Custom Exceptions
@@ -30,6 +20,10 @@ class APIError(Exception):
     """Exception raised when API call fails."""
     pass
 
+class PasswordHasherBusyError(Exception):
+    """Exception raised when the password hashing queue is full."""
+    pass
+
 def log_exception(exception, message):
     """
     Log exception details with an informative message.
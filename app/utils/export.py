@@ -0,0 +1,279 @@
+"""
+Streaming bulk export of predictions as CSV, NDJSON or Parquet
+
+Rows are read from the database with yield_per, so only one chunk of rows is
+held in memory at a time, and each chunk is encoded and sent before the next
+one is fetched. Memory use is the same for a thousand rows or ten million.
+"""
+import csv
+import io
+import json
+import logging
+import re
+from datetime import date, datetime, time, timedelta
+from urllib.parse import quote
+from fastapi.responses import StreamingResponse
+from app.config import Config
+from app.database.database import SessionLocal
+from app.database.models import Prediction, ReportBody, User
+from app.models.report_store import report_store
+
+logger = logging.getLogger(__name__)
+
+# Exported fields with their Parquet types
+EXPORT_FIELDS = [
+    ("id", "int64"),
+    ("username", "string"),
+    ("company_name", "string"),
+    ("impact_area_community", "float64"),
+    ("impact_area_environment", "float64"),
+    ("impact_area_customers", "float64"),
+    ("impact_area_governance", "float64"),
+    ("certification_cycle", "int64"),
+    ("esg_score", "float64"),
+    ("risk_probability", "float64"),
+    ("model_version", "string"),
+    ("report_status", "string"),
+    ("created_at", "string")
+]
+REPORT_FIELD = ("llm_report", "string")
+CREATED_AT_INDEX = [name for name, _ in EXPORT_FIELDS].index("created_at")
+
+def parse_export_dates(date_from, date_to):
+    """
+    Parse optional YYYY-MM-DD filters; empty form fields arrive as empty strings
+
+    Raises:
+        ValueError: If a date is malformed
+    """
+    try:
+        return (
+            date.fromisoformat(date_from) if date_from else None,
+            date.fromisoformat(date_to) if date_to else None
+        )
+    except ValueError:
+        raise ValueError("Dates must be in YYYY-MM-DD format")
+
+def export_query(db, user_id=None, username=None, company=None, date_from=None, date_to=None, include_reports=False):
+    """
+    Column query over the predictions to export, in id order
+
+    Selecting columns rather than entities keeps rows out of the identity map.
+    """
+    columns = [
+        Prediction.id,
+        User.username,
+        Prediction.company_name,
+        Prediction.impact_area_community,
+        Prediction.impact_area_environment,
+        Prediction.impact_area_customers,
+        Prediction.impact_area_governance,
+        Prediction.certification_cycle,
+        Prediction.esg_score,
+        Prediction.risk_probability,
+        Prediction.model_version,
+        Prediction.report_status,
+        Prediction.created_at
+    ]
+    if include_reports:
+        columns += [ReportBody.markdown, ReportBody.dictionary_version, Prediction.llm_response]
+
+    query = db.query(*columns).outerjoin(User, Prediction.user_id == User.id)
+    if include_reports:
+        query = query.outerjoin(ReportBody, Prediction.report_digest == ReportBody.digest)
+
+    if user_id is not None:
+        query = query.filter(Prediction.user_id == user_id)
+    if username:
+        query = query.filter(User.username == username)
+    if company:
+        query = query.filter(Prediction.company_name.ilike(f"%{company}%"))
+    if date_from:
+        query = query.filter(Prediction.created_at >= datetime.combine(date_from, time.min))
+    if date_to:
+        query = query.filter(Prediction.created_at < datetime.combine(date_to + timedelta(days=1), time.min))
+    return query.order_by(Prediction.id)
+
+class CsvExportWriter:
+    media_type = "text/csv; charset=utf-8"
+    extension = "csv"
+
+    def __init__(self, field_names):
+        self.field_names = field_names
+
+    def _encode(self, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode("utf-8")
+
+    def begin(self):
+        return self._encode([self.field_names])
+
+    def write(self, records):
+        return self._encode([["" if value is None else value for value in record] for record in records])
+
+    def finish(self):
+        return b""
+
+class NdjsonExportWriter:
+    media_type = "application/x-ndjson"
+    extension = "ndjson"
+
+    def __init__(self, field_names):
+        self.field_names = field_names
+
+    def begin(self):
+        return b""
+
+    def write(self, records):
+        lines = [json.dumps(dict(zip(self.field_names, record))) + "\n" for record in records]
+        return "".join(lines).encode("utf-8")
+
+    def finish(self):
+        return b""
+
+class _ChunkSink:
+    """Write-only file object that collects what is written until it is drained"""
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+class ParquetExportWriter:
+    """Writes one row group per chunk, so the file can be streamed as it is built"""
+    media_type = "application/vnd.apache.parquet"
+    extension = "parquet"
+
+    def __init__(self, fields):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Parquet export requires pyarrow")
+        self._pa = pa
+        self.schema = pa.schema([(name, getattr(pa, type_name)()) for name, type_name in fields])
+        self._sink = _ChunkSink()
+        self._writer = pq.ParquetWriter(self._sink, self.schema, compression="zstd")
+
+    def begin(self):
+        return self._sink.drain()
+
+    def write(self, records):
+        columns = list(zip(*records))
+        table = self._pa.Table.from_arrays(
+            [self._pa.array(column, type=field.type) for column, field in zip(columns, self.schema)],
+            schema=self.schema
+        )
+        self._writer.write_table(table)
+        return self._sink.drain()
+
+    def finish(self):
+        self._writer.close()
+        return self._sink.drain()
+
+EXPORT_WRITERS = {
+    "csv": CsvExportWriter,
+    "ndjson": NdjsonExportWriter,
+    "parquet": ParquetExportWriter
+}
+
+def export_writer(export_format, include_reports=False):
+    """
+    Writer for an export format
+
+    Raises:
+        ValueError: If the format is unknown or its dependency is missing
+    """
+    writer_class = EXPORT_WRITERS.get(export_format)
+    if writer_class is None:
+        raise ValueError(f"Unsupported export format '{export_format}', use one of: {', '.join(EXPORT_WRITERS)}")
+    fields = EXPORT_FIELDS + ([REPORT_FIELD] if include_reports else [])
+    if writer_class is ParquetExportWriter:
+        return writer_class(fields)
+    return writer_class([name for name, _ in fields])
+
+def stream_export(writer, filters, include_reports=False, chunk_rows=None, session_factory=SessionLocal):
+    """
+    Generate an export chunk by chunk
+
+    Opens its own session, since the response is streamed after the request's
+    session has been closed.
+
+    Args:
+        writer: Writer from export_writer
+        filters (dict): Keyword filters for export_query
+        include_reports (bool): Add the report markdown of each prediction
+        chunk_rows (int): Rows fetched and encoded per chunk
+        session_factory: Session factory to read with
+
+    Yields:
+        bytes: Encoded chunks of the export file
+    """
+    chunk_rows = chunk_rows or Config.EXPORT_CHUNK_ROWS
+    db = session_factory()
+    try:
+        yield writer.begin()
+        query = export_query(db, include_reports=include_reports, **filters).yield_per(chunk_rows)
+        exported = 0
+        chunk = []
+        for row in query:
+            record = list(row[:len(EXPORT_FIELDS)])
+            created_at = record[CREATED_AT_INDEX]
+            record[CREATED_AT_INDEX] = created_at.isoformat(sep=" ") if created_at is not None else None
+            if include_reports:
+                blob, dictionary_version, inline_report = row[len(EXPORT_FIELDS):]
+                record.append(
+                    report_store.decompress_markdown(db, blob, dictionary_version)
+                    if blob is not None else inline_report
+                )
+            chunk.append(record)
+            if len(chunk) >= chunk_rows:
+                yield writer.write(chunk)
+                exported += len(chunk)
+                chunk = []
+        if chunk:
+            yield writer.write(chunk)
+            exported += len(chunk)
+        yield writer.finish()
+        logger.info(f"Exported {exported} predictions")
+    finally:
+        db.close()
+
+def content_disposition(filename):
+    """
+    Attachment header for a filename that may contain any characters
+
+    Browsers that support RFC 5987 use the exact UTF-8 name, others get a
+    copy restricted to characters that are safe in a quoted header value.
+    """
+    fallback = re.sub(r"[^A-Za-z0-9._-]", "_", filename)
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+def export_response(writer, filters, include_reports=False, name="predictions"):
+    """Streaming download of an export"""
+    filename = f"{name}-{datetime.utcnow():%Y%m%d-%H%M%S}.{writer.extension}"
+    return StreamingResponse(
+        stream_export(writer, filters, include_reports=include_reports),
+        media_type=writer.media_type,
+        headers={"Content-Disposition": content_disposition(filename)}
+    )
@@ -1,3 +1,5 @@
+from datetime import timezone
+
 def clean_text(text):
     """
     Helper function to clean and sanitize text by removing unwanted characters and escape sequences.
@@ -20,16 +22,38 @@ def calculate_esg(impact_area_environment, impact_area_community, impact_area_go
     """
     Calculate ESG score based on impact areas and weights.
     
+    Works on plain floats as well as NumPy arrays, in which case the scores
+    for all rows are computed in one vectorized expression.
+    
     Args:
-        impact_area_environment (float): Environment impact score
-        impact_area_community (float): Community/Social impact score
-        impact_area_governance (float): Governance impact score
+        impact_area_environment (float or np.ndarray): Environment impact score
+        impact_area_community (float or np.ndarray): Community/Social impact score
+        impact_area_governance (float or np.ndarray): Governance impact score
         weights (dict): Dictionary containing weights for each category
         
     Returns:
-        float: Calculated ESG score
+        float or np.ndarray: Calculated ESG score
     """
     esg_score = ((weights['environment'] * impact_area_environment) + 
                  (weights['social'] * impact_area_community) + 
                  (weights['governance'] * impact_area_governance))
-    return esg_score 
\ No newline at end of file
+    return esg_score
+
+def utc_isoformat(value):
+    """
+    ISO 8601 string of a timestamp with an explicit UTC offset
+    
+    Timestamps are stored as naive UTC; without the offset, browsers parse
+    them as local time.
+    
+    Args:
+        value (datetime): Naive UTC or timezone-aware timestamp, or None
+        
+    Returns:
+        str: e.g. "2024-01-01T12:00:00+00:00", or None
+    """
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.isoformat()
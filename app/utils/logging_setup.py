@@ -0,0 +1,115 @@
+import atexit
+import contextvars
+import logging
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener
+from app.config import Config
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Whether DEBUG records of the current request are kept, decided once per request
+request_sampled = contextvars.ContextVar("request_sampled", default=True)
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to the background writer without formatting them
+
+    The stock QueueHandler formats each record in the calling thread; the
+    listener runs in this process, so the record can be passed as is and
+    the message is only built when it is written. When the queue is full,
+    records are dropped and counted instead of blocking the caller.
+    """
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class RequestSamplingFilter(logging.Filter):
+    """Drop DEBUG records of requests that were not picked for sampling"""
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or request_sampled.get()
+
+def sample_request():
+    """
+    Decide whether the current request keeps its DEBUG logs
+
+    Returns:
+        contextvars.Token: Token to reset the decision at the end of the request
+    """
+    return request_sampled.set(random.random() < Config.LOG_DEBUG_SAMPLE_RATE)
+
+def parse_module_levels(spec):
+    """Parse 'app.utils.auth=WARNING,app.models=DEBUG' into {logger name: level}"""
+    levels = {}
+    for item in (spec or "").split(","):
+        if "=" not in item:
+            continue
+        name, level = item.split("=", 1)
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+_queue_handler = None
+_listener = None
+
+def configure_logging():
+    """
+    Route all logging through a bounded queue drained by a background writer
+
+    Console and LOG_FILE output happen on the listener thread. The root level
+    comes from Config.LOG_LEVEL and per-module overrides from
+    Config.LOG_MODULE_LEVELS. Safe to call more than once.
+    """
+    global _queue_handler, _listener
+    if _listener is not None:
+        return
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    writers = [logging.StreamHandler()]
+    if Config.LOG_FILE:
+        writers.append(logging.FileHandler(Config.LOG_FILE))
+    for writer in writers:
+        writer.setFormatter(formatter)
+
+    _queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=Config.LOG_QUEUE_SIZE))
+    _queue_handler.addFilter(RequestSamplingFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(Config.LOG_LEVEL)
+
+    for name, level in parse_module_levels(Config.LOG_MODULE_LEVELS).items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = QueueListener(_queue_handler.queue, *writers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+def shutdown_logging():
+    """Flush queued records and stop the background writer"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def logging_stats():
+    """Return queue depth and the number of dropped records"""
+    if _queue_handler is None:
+        return {"configured": False}
+    return {
+        "configured": True,
+        "queued": _queue_handler.queue.qsize(),
+        "queue_size": Config.LOG_QUEUE_SIZE,
+        "dropped": _queue_handler.dropped,
+        "debug_sample_rate": Config.LOG_DEBUG_SAMPLE_RATE
+    }
@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+class LoginAttemptLimiter:
+    """
+    Sliding-window limit on failed logins per username and per client IP
+
+    Checked before any password hashing, so a burst of bad logins is
+    rejected without spending bcrypt time. Only verified failures count
+    towards the limit. Attempts still being verified are tracked separately
+    and reserve the rest of the budget, so concurrent attempts can't
+    overshoot it; attempts beyond it wait for those to finish rather than
+    being turned away, since they may all have the right password. A
+    successful login clears the username's failures.
+
+    Every allowed attempt must end with record_success, record_failure or
+    release.
+    """
+    # How often a waiting attempt re-checks the in-flight ones
+    POLL_SECONDS = 0.01
+
+    def __init__(self, max_per_username, max_per_ip, window_seconds, max_tracked=10000):
+        self.max_per_username = max_per_username
+        self.max_per_ip = max_per_ip
+        self.window = window_seconds
+        self.max_tracked = max_tracked
+        self._failures = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.blocked = 0
+
+    def _recent(self, key, now):
+        attempts = self._failures.get(key)
+        if attempts is None:
+            return None
+        while attempts and attempts[0] <= now - self.window:
+            attempts.popleft()
+        if not attempts:
+            del self._failures[key]
+            return None
+        return attempts
+
+    def _limits(self, username, ip):
+        return ((("user", username), self.max_per_username), (("ip", ip), self.max_per_ip))
+
+    def _try_acquire(self, username, ip):
+        """
+        Returns:
+            float or None: Seconds until failures age out if blocked, 0 if the
+                           attempt is now in flight, None if it has to wait
+        """
+        now = time.monotonic()
+        with self._lock:
+            wait = 0.0
+            full = False
+            for key, limit in self._limits(username, ip):
+                failures = self._recent(key, now)
+                failed = len(failures) if failures is not None else 0
+                if failed >= limit:
+                    wait = max(wait, failures[-limit] + self.window - now)
+                elif failed + self._in_flight.get(key, 0) >= limit:
+                    full = True
+            if wait > 0:
+                self.blocked += 1
+                return wait
+            if full:
+                return None
+            for key, _ in self._limits(username, ip):
+                self._in_flight[key] = self._in_flight.get(key, 0) + 1
+            return 0.0
+
+    async def acquire(self, username, ip):
+        """
+        Check the limits and, if the attempt is allowed, mark it in flight
+
+        Waits while attempts in flight for the same username or IP could
+        use up the rest of the budget.
+
+        Returns:
+            float: Seconds until another attempt is allowed, or 0 if this one
+                   is allowed (and now in flight)
+        """
+        while True:
+            wait = self._try_acquire(username, ip)
+            if wait is not None:
+                return wait
+            await asyncio.sleep(self.POLL_SECONDS)
+
+    def _end(self, username, ip):
+        for key, _ in self._limits(username, ip):
+            remaining = self._in_flight.get(key, 0) - 1
+            if remaining > 0:
+                self._in_flight[key] = remaining
+            else:
+                self._in_flight.pop(key, None)
+
+    def release(self, username, ip):
+        """End an attempt that never got verified, e.g. when the hasher was busy"""
+        with self._lock:
+            self._end(username, ip)
+
+    def record_failure(self, username, ip):
+        """End an attempt whose password did not verify and count it"""
+        now = time.monotonic()
+        with self._lock:
+            self._end(username, ip)
+            if len(self._failures) >= self.max_tracked:
+                # Drop keys whose failures have all aged out
+                for key in list(self._failures):
+                    self._recent(key, now)
+                # Then the oldest keys, if still over the bound
+                while len(self._failures) >= self.max_tracked:
+                    self._failures.pop(next(iter(self._failures)))
+            for key, _ in self._limits(username, ip):
+                self._failures.setdefault(key, deque()).append(now)
+
+    def record_success(self, username, ip):
+        """End a successful attempt and clear the username's failures"""
+        with self._lock:
+            self._end(username, ip)
+            self._failures.pop(("user", username), None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "tracked_keys": len(self._failures),
+                "in_flight": sum(count for (kind, _), count in self._in_flight.items() if kind == "ip"),
+                "max_per_username": self.max_per_username,
+                "max_per_ip": self.max_per_ip,
+                "window_seconds": self.window,
+                "blocked": self.blocked
+            }
+
+# Shared limiter for the login routes
+login_limiter = LoginAttemptLimiter(
+    max_per_username=Config.LOGIN_MAX_ATTEMPTS_PER_USERNAME,
+    max_per_ip=Config.LOGIN_MAX_ATTEMPTS_PER_IP,
+    window_seconds=Config.LOGIN_ATTEMPT_WINDOW_SECONDS
+)
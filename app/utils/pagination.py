@@ -0,0 +1,76 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+def encode_cursor(sort_key, row_id):
+    """Encode the position after a row (a timestamp and an id) as an opaque URL-safe cursor"""
+    raw = json.dumps([sort_key.isoformat(), row_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor made by encode_cursor
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_key, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(sort_key), int(row_id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+def _keyset_query(query, sort_column, id_column, cursor, limit):
+    """Restrict a Query or select() to the page after the cursor, adding the sort key"""
+    if cursor:
+        after_key, after_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            sort_column < after_key,
+            and_(sort_column == after_key, id_column < after_id)
+        ))
+    return (
+        query.add_columns(sort_column.label("sort_key"))
+        .order_by(sort_column.desc(), id_column.desc())
+        .limit(limit + 1)
+    )
+
+def _keyset_result(rows, id_column, limit):
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_entity, last_key = rows[-1]
+        next_cursor = encode_cursor(last_key, getattr(last_entity, id_column.key))
+    return [entity for entity, _ in rows], next_cursor
+
+def keyset_page(query, sort_column, id_column, cursor=None, limit=25):
+    """
+    Fetch one page of a query ordered newest first by (sort_column, id_column)
+
+    The page starts after the row the cursor points at, so each page is an
+    index range scan no matter how deep it is, and rows inserted meanwhile
+    don't shift later pages.
+
+    Args:
+        query: SQLAlchemy query selecting the entity to page through
+        sort_column: Timestamp column to order by (descending)
+        id_column: Unique column breaking ties (descending)
+        cursor (str): Cursor from the previous page, or None for the first page
+        limit (int): Page size
+
+    Returns:
+        tuple: (list of entities, cursor for the next page or None)
+    """
+    rows = _keyset_query(query, sort_column, id_column, cursor, limit).all()
+    return _keyset_result(rows, id_column, limit)
+
+async def keyset_page_async(db, statement, sort_column, id_column, cursor=None, limit=25):
+    """
+    keyset_page for an AsyncSession and a select() of one entity
+
+    Returns:
+        tuple: (list of entities, cursor for the next page or None)
+    """
+    result = await db.execute(_keyset_query(statement, sort_column, id_column, cursor, limit))
+    return _keyset_result(result.all(), id_column, limit)
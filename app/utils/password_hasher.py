@@ -0,0 +1,121 @@
+import argparse
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from passlib.context import CryptContext
+from app.config import Config
+from app.utils.exceptions import PasswordHasherBusyError
+
+logger = logging.getLogger(__name__)
+
+# Password encryption context; hashes made with another cost still verify
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=Config.BCRYPT_ROUNDS)
+
+class PasswordHasher:
+    """
+    Dedicated thread pool for bcrypt hashing and verification
+
+    bcrypt releases the GIL while hashing, so a small pool of its own keeps
+    hashing off the event loop and out of the thread pool shared by sync
+    routes. At most `workers + queue_size` jobs are admitted at once; beyond
+    that callers get PasswordHasherBusyError instead of queueing unboundedly.
+    """
+    def __init__(self, workers, queue_size):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hasher")
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._lock = threading.Lock()
+        self.admitted = 0
+        self.rejected = 0
+        self.in_flight = 0
+
+    def _run(self, fn, *args):
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            self._slots.release()
+
+    def _submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordHasherBusyError("Password hashing queue is full")
+        with self._lock:
+            self.admitted += 1
+            self.in_flight += 1
+        return self._executor.submit(self._run, fn, *args)
+
+    async def hash(self, password):
+        """Hash a password on the pool"""
+        return await asyncio.wrap_future(self._submit(pwd_context.hash, password))
+
+    async def verify(self, plain_password, hashed_password):
+        """Verify a password against its hash on the pool"""
+        return await asyncio.wrap_future(self._submit(pwd_context.verify, plain_password, hashed_password))
+
+    def stats(self):
+        """Return pool size, load and admission counters"""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "in_flight": self.in_flight,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "bcrypt_rounds": Config.BCRYPT_ROUNDS
+            }
+
+# Shared password hasher
+password_hasher = PasswordHasher(
+    workers=Config.PASSWORD_HASH_WORKERS,
+    queue_size=Config.PASSWORD_HASH_QUEUE_SIZE
+)
+
+def time_bcrypt_rounds(rounds, samples=3):
+    """Return the median time in seconds to hash one password at the given cost"""
+    context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        context.hash("benchmark-password")
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)[len(timings) // 2]
+
+def choose_bcrypt_rounds(target_ms=250, min_rounds=10, max_rounds=16):
+    """
+    Benchmark bcrypt on this machine and pick a cost factor
+
+    Args:
+        target_ms (float): Time budget for one hash in milliseconds
+        min_rounds (int): Lowest cost considered
+        max_rounds (int): Highest cost considered
+
+    Returns:
+        tuple: (highest cost within the budget, or min_rounds, and a dict of rounds -> milliseconds)
+    """
+    timings = {}
+    chosen = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        elapsed_ms = time_bcrypt_rounds(rounds) * 1000
+        timings[rounds] = elapsed_ms
+        if elapsed_ms > target_ms:
+            break
+        chosen = rounds
+    return chosen, timings
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark bcrypt and suggest a BCRYPT_ROUNDS value")
+    parser.add_argument("--target-ms", type=float, default=250, help="Time budget for one hash in milliseconds")
+    parser.add_argument("--min-rounds", type=int, default=10)
+    parser.add_argument("--max-rounds", type=int, default=16)
+    args = parser.parse_args()
+
+    chosen, timings = choose_bcrypt_rounds(args.target_ms, args.min_rounds, args.max_rounds)
+    for rounds, elapsed_ms in timings.items():
+        print(f"rounds={rounds}: {elapsed_ms:.1f} ms")
+    print(f"Suggested BCRYPT_ROUNDS={chosen} (target {args.target_ms:.0f} ms per hash)")
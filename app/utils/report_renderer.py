@@ -0,0 +1,26 @@
+"""
+Rendering of LLM reports from markdown to sanitized HTML
+
+Reports are rendered once when they are saved and the HTML is stored with
+the report body, tagged with RENDERER_VERSION. Bump the version whenever the
+markdown extras or sanitization change: stored HTML from an older renderer
+is re-rendered the next time it is read, or all at once with
+
+    python -m app.models.report_store rerender
+"""
+import markdown2
+
+RENDERER_VERSION = 1
+
+MARKDOWN_EXTRAS = [
+    "tables",
+    "break-on-newline",
+    "cuddled-lists",
+    "fenced-code-blocks"
+]
+
+def render_markdown_to_html(markdown_text):
+    """Convert markdown text to HTML, escaping any raw HTML and unsafe links in the markdown"""
+    if not markdown_text:
+        return ""
+    return markdown2.markdown(markdown_text, safe_mode="escape", extras=MARKDOWN_EXTRAS)
@@ -0,0 +1,80 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+class UserCache:
+    """
+    Bounded TTL cache of active users, keyed by username
+
+    Saves the user lookup on every authenticated request. Entries are
+    detached User instances and must be treated as read-only. Admin changes
+    to a user invalidate its entry explicitly, so deactivation takes effect
+    on the next request; the TTL bounds staleness for any other change.
+    """
+    def __init__(self, max_size, ttl_seconds):
+        self.max_size = max_size
+        self.ttl = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, username):
+        """Return the cached user, or None on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._entries.get(username)
+            if cached is not None:
+                if cached[1] > now:
+                    self._entries.move_to_end(username)
+                    self.hits += 1
+                    return cached[0]
+                del self._entries[username]
+            self.misses += 1
+            return None
+
+    def set(self, username, user):
+        """Cache an active user; inactive users are never cached"""
+        if not user.is_active or self.max_size <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[username] = (user, time.monotonic() + self.ttl)
+            self._entries.move_to_end(username)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *usernames):
+        """Drop the entries for the given usernames"""
+        with self._lock:
+            for username in usernames:
+                if self._entries.pop(username, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return hit/miss counters and the current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+# Shared cache used by get_current_user
+user_cache = UserCache(
+    max_size=Config.USER_CACHE_MAX_SIZE,
+    ttl_seconds=Config.USER_CACHE_TTL_SECONDS
+)
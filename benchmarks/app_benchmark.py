@@ -0,0 +1,375 @@
+"""
+Load and latency benchmark for the full request path
+
+Drives the real FastAPI app in-process through httpx's ASGI transport: login
+with bcrypt, /home, /api/company/{name}, /predict with the LLM replaced by the
+in-process stub backend of configurable latency (or the local backend, pointed
+at benchmarks.fake_llm_server), /dashboard for users with seeded prediction
+histories, and the admin pages. Every run starts from a fresh SQLite database
+and a fixed random seed, so runs on different commits are comparable.
+
+For each scenario it reports p50/p95/p99 latency, requests per second and the
+peak RSS of the process so far, and writes everything to JSON.
+
+    python -m benchmarks.app_benchmark --output bench.json
+    python -m benchmarks.app_benchmark --history-sizes 10,1000,100000 --llm-latency-ms 800 --inline-reports
+    python -m benchmarks.app_benchmark --compare before.json after.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from urllib.parse import quote
+import httpx
+import numpy as np
+from app.config import Config
+
+BENCH_PASSWORD = "bench-password"
+SEED_BATCH_SIZE = 5000
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and KiB elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def git_revision():
+    """Current commit and whether the tree has local changes, if run from a git checkout"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=Config.BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=Config.BASE_DIR, capture_output=True, text=True
+        ).stdout.strip()
+        return {"commit": commit, "dirty": bool(dirty)}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+def configure(args, work_dir):
+    """Point the app at a fresh database and quiet logging; must run before the app is imported"""
+    Config.DATABASE_URL = f"sqlite:///{os.path.join(work_dir, 'benchmark.db')}"
+    Config.ASYNC_DATABASE_URL = ""
+    Config.SNAPSHOT_PATH = os.path.join(work_dir, "company_snapshot")
+    Config.LOG_LEVEL = args.log_level
+    Config.LOG_FILE = ""
+    Config.MODEL_RELOAD_INTERVAL_SECONDS = 0
+    Config.LLM_BACKEND = args.llm_backend
+    Config.LLM_STUB_LATENCY_MS = args.llm_latency_ms
+    if args.llm_base_url:
+        Config.LLM_BASE_URL = args.llm_base_url
+    if args.models_path:
+        Config.MODELS_PATH = args.models_path
+    if args.data_path:
+        Config.DATA_PATH = args.data_path
+    if args.bcrypt_rounds:
+        Config.BCRYPT_ROUNDS = args.bcrypt_rounds
+
+def seed_database(history_sizes, rng):
+    """
+    Create the benchmark users and their prediction histories
+
+    Returns:
+        dict: Usernames of the login user, the admin and each history size
+    """
+    from sqlalchemy import insert
+    from app.database.database import SessionLocal, engine
+    from app.database.models import User, Prediction
+    from app.database.summary import rebuild_summaries
+    from app.models.report_store import report_store
+    from app.utils.auth import get_password_hash
+
+    db = SessionLocal()
+    try:
+        hashed_password = get_password_hash(BENCH_PASSWORD)
+        users = {"login": "bench_login", "admin": "bench_admin"}
+        users.update({size: f"bench_history_{size}" for size in history_sizes})
+        db.add_all([
+            User(
+                username=username,
+                email=f"{username}@benchmark.local",
+                hashed_password=hashed_password,
+                is_admin=username == users["admin"]
+            )
+            for username in users.values()
+        ])
+        digest, _ = report_store.save(db, "### Seeded report\n\nStored once and shared by all seeded predictions.\n")
+        db.commit()
+        user_ids = dict(db.query(User.username, User.id).all())
+    finally:
+        db.close()
+
+    # Whole seconds, like timestamps set by the database
+    started = datetime.utcnow().replace(microsecond=0)
+    with engine.begin() as connection:
+        for size in history_sizes:
+            user_id = user_ids[users[size]]
+            for batch_start in range(0, size, SEED_BATCH_SIZE):
+                connection.execute(insert(Prediction), [
+                    {
+                        "user_id": user_id,
+                        "company_name": f"Seeded Company {rng.randrange(500)}",
+                        "impact_area_community": rng.uniform(0, 50),
+                        "impact_area_environment": rng.uniform(0, 50),
+                        "impact_area_customers": rng.uniform(0, 50),
+                        "impact_area_governance": rng.uniform(0, 50),
+                        "certification_cycle": rng.randrange(1, 5),
+                        "esg_score": rng.uniform(0, 100),
+                        "risk_probability": rng.random(),
+                        "model_version": "seeded",
+                        "report_digest": digest,
+                        "report_status": "completed",
+                        "created_at": started - timedelta(minutes=index)
+                    }
+                    for index in range(batch_start, min(size, batch_start + SEED_BATCH_SIZE))
+                ])
+        # Seeded rows bypass the flush hook
+        rebuild_summaries(connection)
+    return users
+
+def build_scenarios(args, users, company_names, rng):
+    """
+    Requests of each scenario, as (name, username, build) where build(i) returns (method, url, form data)
+
+    username None means the request is sent without credentials.
+    """
+    def login(i):
+        return "POST", "/login", {"username": users["login"], "password": BENCH_PASSWORD}
+
+    def company(i):
+        return "GET", f"/api/company/{quote(company_names[i % len(company_names)], safe='')}", None
+
+    # Inputs are drawn up front so every run sends the same requests
+    predict_inputs = [
+        {
+            "company_name": company_names[rng.randrange(len(company_names))],
+            "impact_area_community": round(rng.uniform(0, 50), 2),
+            "impact_area_environment": round(rng.uniform(0, 50), 2),
+            "impact_area_customers": round(rng.uniform(0, 50), 2),
+            "impact_area_governance": round(rng.uniform(0, 50), 2),
+            "certification_cycle": rng.randrange(1, 5)
+        }
+        for _ in range(args.requests + args.warmup)
+    ]
+
+    def predict(i):
+        return "POST", "/predict", predict_inputs[i % len(predict_inputs)]
+
+    def get(url):
+        return lambda i: ("GET", url, None)
+
+    scenarios = [
+        ("login", None, login),
+        ("home", users["login"], get("/home")),
+        ("company_details", users["login"], company),
+        ("predict", users["login"], predict)
+    ]
+    scenarios += [(f"dashboard_{size}", users[size], get("/dashboard")) for size in args.history_sizes]
+    scenarios += [
+        ("admin_dashboard", users["admin"], get("/admin")),
+        ("admin_users", users["admin"], get("/admin/users")),
+        ("admin_predictions", users["admin"], get("/admin/predictions")),
+        ("admin_summary", users["admin"], get("/admin/summary"))
+    ]
+    if args.scenarios:
+        selected = set(args.scenarios.split(","))
+        scenarios = [scenario for scenario in scenarios if scenario[0] in selected]
+    return scenarios
+
+async def run_scenario(client, name, headers, build, requests, concurrency, warmup):
+    """
+    Send warmup requests one by one, then `requests` requests from `concurrency` workers
+
+    Returns:
+        dict: Latency percentiles in milliseconds, throughput, status codes and peak RSS
+    """
+    async def send(i):
+        method, url, data = build(i)
+        started = time.perf_counter()
+        response = await client.request(method, url, data=data, headers=headers)
+        return time.perf_counter() - started, response.status_code
+
+    for i in range(warmup):
+        await send(requests + i)
+
+    latencies = []
+    statuses = Counter()
+    next_index = iter(range(requests))
+
+    async def worker():
+        for i in next_index:
+            elapsed, status_code = await send(i)
+            latencies.append(elapsed)
+            statuses[status_code] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall_seconds = time.perf_counter() - started
+
+    latencies_ms = np.array(latencies) * 1000.0
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+    result = {
+        "name": name,
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": sum(count for status_code, count in statuses.items() if status_code >= 400),
+        "status_codes": {str(status_code): count for status_code, count in sorted(statuses.items())},
+        "latency_ms": {
+            "mean": float(latencies_ms.mean()),
+            "p50": float(p50),
+            "p95": float(p95),
+            "p99": float(p99),
+            "max": float(latencies_ms.max())
+        },
+        "requests_per_second": requests / wall_seconds,
+        "peak_rss_mb": peak_rss_mb()
+    }
+    print(
+        f"{name:<24} p50 {p50:8.2f} ms  p95 {p95:8.2f} ms  p99 {p99:8.2f} ms  "
+        f"{result['requests_per_second']:9.1f} req/s  errors {result['errors']}  peak RSS {result['peak_rss_mb']:.0f} MB"
+    )
+    return result
+
+async def run_benchmark(args):
+    """Start the app, seed it and run every scenario"""
+    from app.main import app
+    from app.models.llm_client import llm_client_manager
+    from app.models.report_queue import report_queue
+    from app.routers import prediction
+    from app.utils.auth import create_access_token
+
+    started_at = datetime.utcnow().isoformat()
+    rng = random.Random(args.seed)
+
+    await app.router.startup()
+    try:
+        if args.inline_reports:
+            # Without the queue, /predict waits for the report
+            await report_queue.stop()
+
+        seed_started = time.perf_counter()
+        users = seed_database(args.history_sizes, rng)
+        seed_seconds = time.perf_counter() - seed_started
+        print(f"Seeded {sum(args.history_sizes)} predictions in {seed_seconds:.1f}s")
+
+        # A "/" in a name cannot be sent as a single path segment
+        company_names = [name for name in prediction.get_company_catalog().names if "/" not in name][:args.companies]
+        if not company_names:
+            raise RuntimeError(f"No companies loaded from {Config.DATA_PATH}")
+
+        results = []
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            for name, username, build in build_scenarios(args, users, company_names, rng):
+                # Tokens go in a header, the client's cookie jar stays empty
+                headers = {"Authorization": f"Bearer {create_access_token({'sub': username})}"} if username else None
+                requests = args.login_requests if name == "login" else args.requests
+                results.append(await run_scenario(
+                    client, name, headers, build, requests, args.concurrency, min(args.warmup, requests)
+                ))
+                client.cookies.clear()
+        llm_stats = llm_client_manager.stats()
+    finally:
+        await app.router.shutdown()
+
+    return {
+        "metadata": {
+            "started_at": started_at,
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()
+        },
+        "settings": {
+            "requests": args.requests,
+            "login_requests": args.login_requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "seed": args.seed,
+            "history_sizes": args.history_sizes,
+            "llm_backend": args.llm_backend,
+            "llm_latency_ms": args.llm_latency_ms if args.llm_backend == "stub" else None,
+            "inline_reports": args.inline_reports,
+            "bcrypt_rounds": Config.BCRYPT_ROUNDS
+        },
+        "seed_seconds": seed_seconds,
+        "llm": llm_stats,
+        "results": results
+    }
+
+def compare(base_path, new_path):
+    """Print the change in latency and throughput per scenario between two result files"""
+    with open(base_path) as f:
+        base = {result["name"]: result for result in json.load(f)["results"]}
+    with open(new_path) as f:
+        new = json.load(f)["results"]
+
+    def change(before, after):
+        return f"{(after - before) / before * 100:+7.1f}%" if before else "    n/a"
+
+    print(f"{'scenario':<24} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>8}")
+    for result in new:
+        before = base.get(result["name"])
+        if before is None:
+            print(f"{result['name']:<24} (new)")
+            continue
+        latencies = [change(before["latency_ms"][key], result["latency_ms"][key]) for key in ("p50", "p95", "p99")]
+        throughput = change(before["requests_per_second"], result["requests_per_second"])
+        print(f"{result['name']:<24} {' '.join(latencies)} {throughput}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the application's request path in-process")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the JSON results")
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario")
+    parser.add_argument("--login-requests", type=int, default=20, help="Measured logins (each costs a bcrypt verify)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight at once")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests sent first in each scenario")
+    parser.add_argument("--history-sizes", type=lambda s: [int(size) for size in s.split(",")],
+                        default=[10, 1000, 10000, 100000], help="Seeded predictions per dashboard user")
+    parser.add_argument("--llm-backend", default="stub", help="LLM backend: stub (in-process) or local (see --llm-base-url)")
+    parser.add_argument("--llm-latency-ms", type=float, default=500.0, help="Latency of the stub backend")
+    parser.add_argument("--llm-base-url", help="Chat-completions server for the local backend, e.g. benchmarks.fake_llm_server")
+    parser.add_argument("--inline-reports", action="store_true", help="Stop the report queue so /predict waits for the LLM")
+    parser.add_argument("--companies", type=int, default=200, help="Number of companies requests rotate over")
+    parser.add_argument("--scenarios", help="Comma-separated scenario names to run (default: all)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--bcrypt-rounds", type=int, help="Override BCRYPT_ROUNDS")
+    parser.add_argument("--models-path", help="Override MODELS_PATH")
+    parser.add_argument("--data-path", help="Override DATA_PATH")
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--keep-db", action="store_true", help="Keep the benchmark database directory")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="Compare two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    # Templates and static files are resolved relative to the project root
+    os.chdir(Config.BASE_DIR)
+    work_dir = tempfile.mkdtemp(prefix="benchmark-")
+    configure(args, work_dir)
+    try:
+        results = asyncio.run(run_benchmark(args))
+    finally:
+        if args.keep_db:
+            print(f"Benchmark database kept in {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Local stand-in for the LLM provider, speaking the chat-completions protocol
+
+Run it, then point the app at it to load-test the report pipeline offline:
+
+    python -m benchmarks.fake_llm_server --port 8100 --latency lognormal:400,0.6 \\
+        --tokens-per-second 80 --error-rate 0.02 --rate-limit-rpm 600
+    LLM_BACKEND=local LLM_BASE_URL=http://127.0.0.1:8100 python -m app.main
+
+Both /openai/v1/chat/completions (Groq SDK) and /v1/chat/completions (OpenAI
+SDK) are served, streaming and non-streaming. The reply is the report
+skeleton from the prompt, so reports have a realistic length. GET /stats
+returns request counters.
+
+Latency (milliseconds until the first token) is drawn from one of:
+    fixed:MS  uniform:LOW,HIGH  normal:MEAN,STD  lognormal:MEDIAN,SIGMA  exponential:MEAN
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+TOKEN_PATTERN = re.compile(r"\S+\s*|\s+")
+
+def parse_latency(spec):
+    """
+    Latency sampler from a distribution spec such as "lognormal:400,0.6"
+
+    Returns:
+        callable: Takes a random.Random and returns a delay in seconds
+
+    Raises:
+        ValueError: If the spec is malformed
+    """
+    name, _, params = spec.partition(":")
+    try:
+        values = [float(value) for value in params.split(",")] if params else []
+    except ValueError:
+        raise ValueError(f"Invalid latency parameters in '{spec}'")
+
+    samplers = {
+        "fixed": (1, lambda rng, ms: ms),
+        "uniform": (2, lambda rng, low, high: rng.uniform(low, high)),
+        "normal": (2, lambda rng, mean, std: rng.gauss(mean, std)),
+        # Parameterised by the median, which is what latency dashboards show
+        "lognormal": (2, lambda rng, median, sigma: rng.lognormvariate(math.log(median), sigma)),
+        "exponential": (1, lambda rng, mean: rng.expovariate(1.0 / mean) if mean > 0 else 0.0)
+    }
+    if name not in samplers:
+        raise ValueError(f"Unknown latency distribution '{name}', use one of: {', '.join(samplers)}")
+    arity, sample = samplers[name]
+    if len(values) != arity:
+        raise ValueError(f"'{name}' latency takes {arity} parameter(s)")
+    return lambda rng: max(0.0, sample(rng, *values)) / 1000.0
+
+class TokenBucket:
+    """Requests-per-minute limit with a burst allowance, like a provider's rate limiter"""
+    def __init__(self, per_minute, burst):
+        self.rate = per_minute / 60.0
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Take a token if one is available
+
+        Returns:
+            float: 0 if a token was taken, otherwise seconds until one is
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return 0.0
+            return (1.0 - self.tokens) / self.rate
+
+def reply_text(messages, max_tokens=None):
+    """Report skeleton from the prompt, or the prompt echoed back if it has none"""
+    prompt = messages[-1].get("content", "") if messages else ""
+    text = prompt.split("**Output Format:**", 1)[-1].strip() or "Fake report."
+    tokens = TOKEN_PATTERN.findall(text)
+    if max_tokens:
+        tokens = tokens[:max_tokens]
+    return tokens
+
+def error_body(message, error_type, code):
+    return {"error": {"message": message, "type": error_type, "code": code}}
+
+def create_app(args):
+    """Chat-completions app with the behaviour described by the parsed arguments"""
+    app = FastAPI(title="Fake LLM server")
+    rng = random.Random(args.seed)
+    sample_latency = parse_latency(args.latency)
+    bucket = TokenBucket(args.rate_limit_rpm, args.rate_limit_burst) if args.rate_limit_rpm else None
+    stats = {
+        "requests": 0, "completed": 0, "streamed": 0, "errors": 0, "rate_limited": 0,
+        "in_flight": 0, "max_in_flight": 0, "completion_tokens": 0
+    }
+
+    def token_delay():
+        return 1.0 / args.tokens_per_second if args.tokens_per_second > 0 else 0.0
+
+    def completion_id():
+        return f"chatcmpl-{uuid.uuid4().hex[:24]}"
+
+    async def chat_completions(request: Request):
+        stats["requests"] += 1
+        body = await request.json()
+        model = body.get("model", "fake-model")
+
+        retry_after = bucket.acquire() if bucket else 0.0
+        if not retry_after and rng.random() < args.rate_limit_rate:
+            retry_after = args.retry_after
+        if retry_after:
+            stats["rate_limited"] += 1
+            return JSONResponse(
+                error_body("Rate limit reached, please try again later", "tokens", "rate_limit_exceeded"),
+                status_code=429,
+                headers={"retry-after": str(max(1, math.ceil(retry_after)))}
+            )
+
+        latency = sample_latency(rng)
+        if rng.random() < args.error_rate:
+            # Failures still take time, as timeouts and upstream errors do
+            await asyncio.sleep(latency)
+            stats["errors"] += 1
+            return JSONResponse(
+                error_body("Injected server error", "internal_server_error", "internal_error"),
+                status_code=args.error_status
+            )
+
+        tokens = reply_text(body.get("messages", []), body.get("max_tokens"))
+        created = int(time.time())
+        response_id = completion_id()
+        usage = {
+            "prompt_tokens": sum(len(TOKEN_PATTERN.findall(m.get("content", ""))) for m in body.get("messages", [])),
+            "completion_tokens": len(tokens)
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+
+        if not body.get("stream"):
+            try:
+                await asyncio.sleep(latency + len(tokens) * token_delay())
+            finally:
+                stats["in_flight"] -= 1
+            stats["completed"] += 1
+            stats["completion_tokens"] += len(tokens)
+            return {
+                "id": response_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(tokens)},
+                    "finish_reason": "stop",
+                    "logprobs": None
+                }],
+                "usage": usage
+            }
+
+        def chunk(delta, finish_reason=None):
+            payload = {
+                "id": response_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason, "logprobs": None}]
+            }
+            return f"data: {json.dumps(payload)}\n\n"
+
+        async def stream():
+            try:
+                await asyncio.sleep(latency)
+                yield chunk({"role": "assistant", "content": ""})
+                # Tokens are paced against a schedule, so timer granularity doesn't slow the rate
+                delay = token_delay()
+                loop = asyncio.get_running_loop()
+                started = loop.time()
+                for index, token in enumerate(tokens, start=1):
+                    wait = started + index * delay - loop.time()
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                    stats["completion_tokens"] += 1
+                    yield chunk({"content": token})
+                yield chunk({}, finish_reason="stop")
+                yield "data: [DONE]\n\n"
+                stats["streamed"] += 1
+            finally:
+                stats["in_flight"] -= 1
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    app.add_api_route("/openai/v1/chat/completions", chat_completions, methods=["POST"])
+    app.add_api_route("/v1/chat/completions", chat_completions, methods=["POST"])
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake chat-completions server for offline load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", default="lognormal:400,0.5", help="Time to first token distribution, in ms")
+    parser.add_argument("--tokens-per-second", type=float, default=100.0, help="Generation rate, 0 for instant")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with --error-status")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--rate-limit-rpm", type=float, default=0.0, help="Requests per minute before 429s, 0 for no limit")
+    parser.add_argument("--rate-limit-burst", type=int, default=10, help="Requests allowed at once above the steady rate")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered 429 regardless of rate")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds for --rate-limit-rate 429s")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible latencies and failures")
+    args = parser.parse_args()
+
+    try:
+        parse_latency(args.latency)
+    except ValueError as e:
+        parser.error(str(e))
+
+    import uvicorn
+    uvicorn.run(create_app(args), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
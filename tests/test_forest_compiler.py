@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.ensemble import RandomForestClassifier
+from app.models.forest_compiler import CompiledForest, compile_forest
+
+# Summing the trees in a different order can move the last bit
+TOLERANCE = 1e-12
+
+def fit_forest(n_classes, seed=0):
+    X, y = make_classification(
+        n_samples=400, n_features=5, n_informative=4, n_redundant=0,
+        n_classes=n_classes, random_state=seed
+    )
+    model = RandomForestClassifier(n_estimators=25, max_depth=8, random_state=seed).fit(X, y)
+    return model, X
+
+def threshold_rows(compiled, X):
+    """Rows with one feature set exactly on a split threshold, one row per internal node"""
+    internal = np.flatnonzero(np.isfinite(compiled.threshold))
+    rows = np.repeat(X[:1], len(internal), axis=0)
+    rows[np.arange(len(internal)), compiled.feature[internal]] = compiled.threshold[internal]
+    return rows
+
+@pytest.fixture(params=[2, 3], ids=["binary", "multiclass"])
+def forest(request):
+    model, X = fit_forest(request.param)
+    return model, CompiledForest(model), X
+
+def test_batch_matches_sklearn(forest):
+    model, compiled, X = forest
+    np.testing.assert_allclose(compiled.predict_proba(X), model.predict_proba(X), rtol=0, atol=TOLERANCE)
+
+def test_single_rows_match_sklearn(forest):
+    model, compiled, X = forest
+    for row in X[:20]:
+        np.testing.assert_allclose(
+            compiled.predict_proba(row), model.predict_proba(row.reshape(1, -1)), rtol=0, atol=TOLERANCE
+        )
+
+def test_inputs_on_split_thresholds_match_sklearn(forest):
+    model, compiled, X = forest
+    rows = threshold_rows(compiled, X)
+    np.testing.assert_allclose(compiled.predict_proba(rows), model.predict_proba(rows), rtol=0, atol=TOLERANCE)
+    for row in rows[:50]:
+        np.testing.assert_allclose(
+            compiled.predict_proba(row), model.predict_proba(row.reshape(1, -1)), rtol=0, atol=TOLERANCE
+        )
+
+def test_compile_forest_rejects_unfitted_model():
+    assert compile_forest(RandomForestClassifier()) is None
+
+def missing_rows(X, seed=0):
+    """Rows with one or two features missing"""
+    rng = np.random.default_rng(seed)
+    rows = np.repeat(X[:40], 2, axis=0)
+    rows[np.arange(len(rows)), rng.integers(X.shape[1], size=len(rows))] = np.nan
+    rows[::2, 0] = np.nan
+    return rows
+
+def test_missing_features_match_sklearn(forest):
+    model, compiled, X = forest
+    rows = missing_rows(X)
+    np.testing.assert_allclose(compiled.predict_proba(rows), model.predict_proba(rows), rtol=0, atol=TOLERANCE)
+
+def test_missing_features_seen_in_training_match_sklearn():
+    X, y = make_classification(n_samples=400, n_features=5, n_informative=4, n_redundant=0, random_state=1)
+    X[::5, 2] = np.nan
+    model = RandomForestClassifier(n_estimators=25, max_depth=8, random_state=1).fit(X, y)
+    compiled = CompiledForest(model)
+    rows = np.vstack([X, missing_rows(X, seed=1)])
+    np.testing.assert_allclose(compiled.predict_proba(rows), model.predict_proba(rows), rtol=0, atol=TOLERANCE)
+
+def test_missing_features_rejected_without_learned_directions(forest):
+    _, compiled, X = forest
+    compiled.missing_left = None
+    with pytest.raises(ValueError):
+        compiled.predict_proba(missing_rows(X))
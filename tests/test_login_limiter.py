@@ -0,0 +1,51 @@
+import asyncio
+import pytest
+from app.utils.login_limiter import LoginAttemptLimiter
+
+LIMIT = 5
+
+@pytest.fixture
+def limiter():
+    return LoginAttemptLimiter(max_per_username=LIMIT, max_per_ip=4 * LIMIT, window_seconds=300)
+
+async def login(limiter, password_ok, verify_seconds=0.02):
+    """One login attempt as the routes make it, returning the HTTP status"""
+    if await limiter.acquire("alice", "10.0.0.1"):
+        return 429
+    await asyncio.sleep(verify_seconds)
+    if password_ok:
+        limiter.record_success("alice", "10.0.0.1")
+        return 303
+    limiter.record_failure("alice", "10.0.0.1")
+    return 200
+
+async def concurrent_logins(limiter, count, password_ok):
+    return await asyncio.gather(*(login(limiter, password_ok) for _ in range(count)))
+
+def test_concurrent_correct_logins_are_all_allowed(limiter):
+    statuses = asyncio.run(concurrent_logins(limiter, 4 * LIMIT, password_ok=True))
+    assert statuses == [303] * (4 * LIMIT)
+    assert limiter.stats()["tracked_keys"] == 0
+    assert limiter.stats()["in_flight"] == 0
+
+def test_concurrent_bad_logins_stop_at_the_limit(limiter):
+    statuses = asyncio.run(concurrent_logins(limiter, 4 * LIMIT, password_ok=False))
+    assert statuses.count(200) == LIMIT
+    assert statuses.count(429) == 3 * LIMIT
+    assert limiter.stats()["in_flight"] == 0
+
+def test_success_clears_username_failures(limiter):
+    async def attempts():
+        for _ in range(LIMIT - 1):
+            await login(limiter, password_ok=False)
+        await login(limiter, password_ok=True)
+        return await concurrent_logins(limiter, LIMIT, password_ok=False)
+    assert asyncio.run(attempts()).count(200) == LIMIT
+
+def test_released_attempts_do_not_count(limiter):
+    async def attempts():
+        for _ in range(2 * LIMIT):
+            assert await limiter.acquire("alice", "10.0.0.1") == 0
+            limiter.release("alice", "10.0.0.1")
+    asyncio.run(attempts())
+    assert limiter.stats()["tracked_keys"] == 0
@@ -0,0 +1,92 @@
+import datetime
+import threading
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.database.models import Base, ReportCacheEntry
+from app.models.report_cache import ReportCache
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'cache.db'}", connect_args={"timeout": 30})
+    Base.metadata.create_all(engine)
+    writes = []
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_writes(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith("SELECT"):
+            writes.append(statement)
+    factory = sessionmaker(bind=engine)
+    factory.writes = writes
+    yield factory
+    engine.dispose()
+
+def make_cache(session_factory, **kwargs):
+    options = {"memory_size": 0, "max_entries": 100, "ttl_seconds": 3600, "access_flush_seconds": 3600}
+    options.update(kwargs)
+    return ReportCache(session_factory=session_factory, **options)
+
+def entries(session_factory):
+    db = session_factory()
+    try:
+        return {entry.key: entry for entry in db.query(ReportCacheEntry)}
+    finally:
+        db.close()
+
+def test_hits_do_not_write_until_flushed(session_factory):
+    cache = make_cache(session_factory)
+    cache.set("a", "report a")
+    before = entries(session_factory)["a"].accessed_at
+    del session_factory.writes[:]
+
+    for _ in range(5):
+        assert cache.get("a") == "report a"
+    assert session_factory.writes == []
+
+    cache.flush_access()
+    entry = entries(session_factory)["a"]
+    assert entry.hit_count == 5
+    assert entry.accessed_at >= before
+
+def test_many_pending_keys_trigger_a_flush(session_factory):
+    cache = make_cache(session_factory, max_entries=1000)
+    keys = [f"k{i}" for i in range(ReportCache.ACCESS_FLUSH_SIZE)]
+    for key in keys:
+        cache.set(key, key)
+    for key in keys:
+        cache.get(key)
+    assert all(entry.hit_count == 1 for entry in entries(session_factory).values())
+
+def test_sweep_trims_least_recently_used(session_factory):
+    cache = make_cache(session_factory, max_entries=10)
+    for i in range(10):
+        cache.set(f"k{i}", "report")
+    # Touch the oldest entry so the next oldest ones get evicted instead
+    cache.get("k0")
+    cache.set("k10", "report")
+
+    remaining = entries(session_factory)
+    assert len(remaining) == int(10 * ReportCache.SWEEP_TARGET_RATIO)
+    assert "k0" in remaining and "k10" in remaining
+    assert cache.evictions == 2
+
+def test_sweep_drops_expired_entries(session_factory):
+    cache = make_cache(session_factory)
+    cache.set("old", "report")
+    db = session_factory()
+    db.query(ReportCacheEntry).update({ReportCacheEntry.expires_at: datetime.datetime.utcnow() - datetime.timedelta(seconds=1)})
+    db.commit()
+    db.close()
+
+    assert cache.get("old") is None
+    cache.sweep()
+    assert entries(session_factory) == {}
+
+def test_concurrent_sets_of_one_key(session_factory):
+    cache = make_cache(session_factory)
+    threads = [threading.Thread(target=cache.set, args=("same", f"report {i}")) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert list(entries(session_factory)) == ["same"]
+    assert cache.get("same").startswith("report ")
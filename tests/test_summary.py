@@ -0,0 +1,109 @@
+import datetime
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database.models import (
+    Base, User, Prediction, DailyPredictionStats, CompanyPredictionStats, UserPredictionStats
+)
+from app.database.summary import get_admin_summary, delete_predictions_where, rebuild_summaries
+
+NOW = datetime.datetime.utcnow().replace(microsecond=0)
+COMPANIES = ["Acme", "Globex", "Initech"]
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'summary.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([User(username=name, email=f"{name}@example.com") for name in ("alice", "bob", "carol")])
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+def add_predictions(db, count, offset=0):
+    users = db.query(User).order_by(User.id).all()
+    db.add_all([
+        Prediction(
+            user=users[i % len(users)],
+            company_name=COMPANIES[i % len(COMPANIES)],
+            esg_score=40.0 + i,
+            risk_probability=(i % 10) / 10,
+            # Spread over several days, some older than the active-user window
+            created_at=NOW - datetime.timedelta(hours=7 * i + offset)
+        )
+        for i in range(count)
+    ])
+    db.commit()
+
+def summary_state(db):
+    """Everything the summary tables feed into, with float sums rounded"""
+    def rounded(value):
+        return round(value, 6) if isinstance(value, float) else value
+    tables = {
+        model.__tablename__: sorted(
+            tuple(rounded(getattr(row, column.key)) for column in model.__table__.columns)
+            for row in db.query(model)
+        )
+        for model in (DailyPredictionStats, CompanyPredictionStats, UserPredictionStats)
+    }
+    admin = get_admin_summary(db, days=60)
+    for section in ("daily", "companies"):
+        admin[section] = [{key: rounded(value) for key, value in row.items()} for row in admin[section]]
+    return tables, admin
+
+def assert_matches_rebuild(db):
+    incremental = summary_state(db)
+    rebuild_summaries(db.connection())
+    assert incremental == summary_state(db)
+    db.rollback()
+
+def test_inserts_match_rebuild(db):
+    add_predictions(db, 60)
+    add_predictions(db, 15, offset=3)
+    assert_matches_rebuild(db)
+
+def test_deleting_predictions_matches_rebuild(db):
+    add_predictions(db, 40)
+    newest = db.query(Prediction).order_by(Prediction.created_at.desc()).limit(5).all()
+    for prediction in newest:
+        db.delete(prediction)
+    db.commit()
+    assert_matches_rebuild(db)
+
+def test_deleting_an_expired_prediction_matches_rebuild(db):
+    add_predictions(db, 20)
+    # Expired by the commit, so nothing about it is loaded
+    prediction = db.query(Prediction).order_by(Prediction.created_at.desc()).first()
+    db.commit()
+    db.delete(prediction)
+    db.commit()
+    assert_matches_rebuild(db)
+
+def test_bulk_delete_matches_rebuild(db):
+    add_predictions(db, 60)
+    deleted = delete_predictions_where(db, Prediction.company_name == "Acme")
+    db.commit()
+    assert deleted == 20
+    assert_matches_rebuild(db)
+
+def test_deleting_a_users_predictions_matches_rebuild(db):
+    add_predictions(db, 45)
+    bob = db.query(User).filter(User.username == "bob").one()
+    delete_predictions_where(db, Prediction.user_id == bob.id)
+    db.delete(bob)
+    db.commit()
+    assert_matches_rebuild(db)
+    assert db.query(UserPredictionStats).filter(UserPredictionStats.user_id == bob.id).count() == 0
+
+def test_updating_users_leaves_summaries_alone(db):
+    add_predictions(db, 30)
+    before = summary_state(db)
+    alice = db.query(User).filter(User.username == "alice").one()
+    alice.username = "alice2"
+    alice.is_admin = True
+    db.commit()
+    tables, admin = summary_state(db)
+    assert tables == before[0]
+    assert admin["admin_users"] == 1
+    assert_matches_rebuild(db)